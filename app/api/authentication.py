@@ -0,0 +1,116 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+
+# Tokens are resolved by the process-local LRU first, then by Redis and
+# only then by the database. Every process drops its own entries
+# on the signals in api/models.py, the entries of the other processes
+# live at most TOKEN_CACHE_LOCAL_TTL seconds.
+#
+# Only (user id, is_active) is cached, the password hash and the rest
+# of the user don't leave the database.
+LOCAL_TTL = getattr(settings, "TOKEN_CACHE_LOCAL_TTL", 10)
+LOCAL_SIZE = getattr(settings, "TOKEN_CACHE_LOCAL_SIZE", 1024)
+REDIS_TTL = getattr(settings, "TOKEN_CACHE_TTL", 60 * 10)
+
+
+class LRUCache:
+    """  Thread-safe LRU with a time to live for every entry  """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+local_tokens = LRUCache(LOCAL_SIZE, LOCAL_TTL)
+
+
+def token_cache_key(key: str) -> str:
+    # Don't keep the tokens themselves in the names of the Redis keys
+    return f"auth_token_user_{hashlib.sha256(key.encode()).hexdigest()[:32]}"
+
+
+def forget_tokens(*keys: str) -> None:
+    """  Drops the tokens from the local LRU and from Redis  """
+
+    for key in keys:
+        local_tokens.delete(key)
+    cache.delete_many([token_cache_key(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that doesn't query the database
+    for the tokens it has seen recently.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = local_tokens.get(key)
+
+        if cached is None:
+            cached = cache.get(token_cache_key(key))
+
+            if cached is None:
+                cached = self.get_model().objects.filter(key=key).values_list(
+                    "user_id", "user__is_active"
+                    ).first()
+                if cached is None:
+                    raise exceptions.AuthenticationFailed(_("Invalid token."))
+                cache.set(token_cache_key(key), cached, REDIS_TTL)
+
+            local_tokens.set(key, cached)
+
+        user_id, is_active = cached
+        if not is_active:
+            raise exceptions.AuthenticationFailed(
+                _("User inactive or deleted.")
+                )
+
+        # Like a user of only("id", "is_active"), the other fields
+        # are deferred
+        user = get_user_model().from_db(None, ["id", "is_active"], cached)
+        token = self.get_model()(key=key, user_id=user_id)
+        token.user = user
+
+        return (user, token)
@@ -1,13 +1,35 @@
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 from rest_framework.authtoken.models import Token
 
 from bugtracker.models import Project, Issue
+from .authentication import forget_tokens
 
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_auth_token(sender, instance=None, created=False, **kwargs):
     if created:
         Token.objects.create(user=instance)
+
+
+# Signals for the invalidation of the cached tokens
+
+
+@receiver(post_delete, sender=Token, dispatch_uid="token_deleted")
+def token_delete_handler(sender, instance, **kwargs):
+    forget_tokens(instance.key)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL,
+          dispatch_uid="token_user_updated")
+def token_user_save_handler(sender, instance, created=False,
+                            update_fields=None, **kwargs):
+    # Every login updates "last_login", it doesn't matter for the API
+    if created or update_fields == frozenset(["last_login"]):
+        return
+
+    forget_tokens(
+        *Token.objects.filter(user=instance).values_list("key", flat=True)
+        )
@@ -0,0 +1,171 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.core.exceptions import ValidationError
+from django.db.models import BooleanField, Expression, F, Value
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class RowComparison(Expression):
+    """  (a, b) < (1, 2) - compares whole rows, can seek in an index  """
+
+    conditional = True
+    output_field = BooleanField()
+
+    def __init__(self, fields, values, operator: str):
+        super().__init__()
+        self.lhs = [F(field) for field in fields]
+        self.rhs = [Value(value) for value in values]
+        self.operator = operator
+
+    def get_source_expressions(self):
+        return [*self.lhs, *self.rhs]
+
+    def set_source_expressions(self, exprs):
+        self.lhs, self.rhs = exprs[:len(self.lhs)], exprs[len(self.lhs):]
+
+    def as_sql(self, compiler, connection):
+        params = []
+        sides = []
+        for side in (self.lhs, self.rhs):
+            parts = []
+            for expression in side:
+                sql, expression_params = compiler.compile(expression)
+                parts.append(sql)
+                params.extend(expression_params)
+            sides.append(f"({', '.join(parts)})")
+
+        return f"{sides[0]} {self.operator} {sides[1]}", params
+
+
+def keyset_condition(ordering: list[tuple[str, bool]], values: list):
+    """
+    Condition for the rows after "values" in the given ordering,
+    a list of (field, descending).
+
+    Fields with the same direction are compared as one row, so the
+    database seeks to the position in an index with the same ordering:
+    ORDER BY a DESC, b DESC, c -> (a, b) <= (x, y) AND
+    ((a, b) < (x, y) OR c > z)
+    """
+
+    descending = ordering[0][1]
+    size = 1
+    while size < len(ordering) and ordering[size][1] == descending:
+        size += 1
+
+    fields = [field for field, _ in ordering[:size]]
+    operator = "<" if descending else ">"
+    after = RowComparison(fields, values[:size], operator)
+
+    if size == len(ordering):
+        return after
+
+    return (
+        RowComparison(fields, values[:size], f"{operator}=") &
+        (after | keyset_condition(ordering[size:], values[size:]))
+        )
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on a unique, stable ordering.
+
+    Unlike the page number pagination it doesn't count the rows and
+    doesn't use OFFSET: the cursor keeps the ordering values of the
+    last row of the page, so every page is one index seek.
+
+    The view sets the ordering with the "ordering" attribute (the last
+    field must be unique) and can cache the pages with a
+    "cache_page(queryset, cursor)" method.
+    """
+
+    cursor_query_param = "cursor"
+    page_size = api_settings.PAGE_SIZE
+
+    def get_ordering(self, view) -> list[tuple[str, bool]]:
+        return [
+            (field.removeprefix("-"), field.startswith("-"))
+            for field in view.ordering
+            ]
+
+    def decode_cursor(self, request, model, ordering):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+
+        try:
+            values = json.loads(urlsafe_b64decode(cursor.encode()))
+            if len(values) != len(ordering):
+                raise ValueError
+            return [
+                model._meta.get_field(field).to_python(value)
+                for (field, _), value in zip(ordering, values)
+                ]
+        except (TypeError, ValueError, ValidationError) as e:
+            raise NotFound("Invalid cursor") from e
+
+    def encode_cursor(self, row, ordering) -> str:
+        values = []
+        for field, _ in ordering:
+            value = getattr(row, field)
+            values.append(value.isoformat() if hasattr(value, "isoformat")
+                          else value)
+
+        return urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        ordering = self.get_ordering(view)
+        values = self.decode_cursor(request, queryset.model, ordering)
+
+        queryset = queryset.order_by(*view.ordering)
+        if values is not None:
+            queryset = queryset.filter(keyset_condition(ordering, values))
+        queryset = queryset[:self.page_size + 1]
+
+        cache_page = getattr(view, "cache_page", None)
+        if cache_page is None:
+            rows = list(queryset)
+        else:
+            rows = cache_page(
+                queryset, request.query_params.get(self.cursor_query_param)
+                )
+
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_cursor = (
+            self.encode_cursor(rows[-1], ordering) if self.has_next else None
+            )
+
+        return rows
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.next_cursor
+            )
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "results": data
+            })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+                },
+            }
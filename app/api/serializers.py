@@ -1,8 +1,28 @@
+from django.db.models.functions import Lower
+
 from rest_framework import serializers
 
 from .models import Project, Issue
 
 
+# The unique constraints ignore the case and DRF doesn't make validators
+# for such constraints, the serializers check them with the same Lower()
+# expressions, so the lookups use the unique indexes
+
+TITLE_EXISTS = "issue with this title already exists."
+
+
+def exists_lower(queryset, instance, field: str, value: str, **lookups):
+    """  Other rows with the same lowercased "field"  """
+
+    if instance is not None:
+        queryset = queryset.exclude(pk=instance.pk)
+
+    return queryset.alias(lowered=Lower(field)).filter(
+        lowered=value.lower(), **lookups
+        ).exists()
+
+
 class ProjectSerializer(serializers.HyperlinkedModelSerializer):
 
     author = serializers.HiddenField(default=serializers.CurrentUserDefault())
@@ -15,6 +35,20 @@ class ProjectSerializer(serializers.HyperlinkedModelSerializer):
             ]
         read_only_fields = ("id", "url", "author", "created")
 
+    def validate_name(self, name):
+        if exists_lower(Project.objects, self.instance, "name", name):
+            raise serializers.ValidationError(
+                "project with this name already exists."
+                )
+        return name
+
+    def validate_key(self, key):
+        if exists_lower(Project.objects, self.instance, "key", key):
+            raise serializers.ValidationError(
+                "project with this key already exists."
+                )
+        return key
+
 
 class IssueSerializer(serializers.HyperlinkedModelSerializer):
 
@@ -26,4 +60,37 @@ class IssueSerializer(serializers.HyperlinkedModelSerializer):
             "id", "url", "project", "author", "title", "description",
             "key", "type", "priority", "status", "created", "updated"
             ]
-        read_only_fields = ("id", "url", "author", "created")
+        read_only_fields = ("id", "url", "author", "key", "created")
+
+    def title_key(self, attrs) -> tuple[int, str] | None:
+        """
+        (project id, lowercased title) the issue takes,
+        None if neither of them changes.
+        """
+
+        if "project" not in attrs and "title" not in attrs:
+            return None
+
+        project = attrs.get("project")
+        project_id = project.id if project else self.instance.project_id
+        title = attrs["title"] if "title" in attrs else self.instance.title
+
+        return project_id, title.lower()
+
+    def validate(self, attrs):
+        key = self.title_key(attrs)
+        if key is not None and exists_lower(
+                Issue.objects, self.instance, "title", key[1],
+                project_id=key[0]
+                ):
+            raise serializers.ValidationError({"title": [TITLE_EXISTS]})
+
+        return attrs
+
+    def update(self, instance, validated_data):
+        # A moved issue gets the next key of its new project
+        project = validated_data.get("project")
+        if project is not None and project.id != instance.project_id:
+            instance.key = None
+
+        return super().update(instance, validated_data)
@@ -1,10 +1,17 @@
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.test import APITestCase
 
 from bugtracker.models import Project, Issue
+from .authentication import (
+    CachedTokenAuthentication, local_tokens, token_cache_key
+    )
 
 
 class ViewsTestCase(APITestCase):
@@ -200,3 +207,296 @@ class ViewsTestCase(APITestCase):
             reverse("issue-detail", args=[self.issue.id])
             )
         self.assertEqual(r.status_code, 204)
+
+
+class CachedTokenAuthenticationTestCase(APITestCase):
+
+    def setUp(self):
+        local_tokens.clear()
+        self.user = User.objects.create_user(
+            first_name="Test", last_name="Test", username="testing",
+            email="testemail@gmail.com", password="Password123#"
+            )
+        self.token = Token.objects.get(user=self.user)
+        self.auth = CachedTokenAuthentication()
+
+    def test_warm_cache_without_queries(self):
+        self.auth.authenticate_credentials(self.token.key)
+
+        with self.assertNumQueries(0):
+            user, token = self.auth.authenticate_credentials(self.token.key)
+
+        self.assertEqual(user.id, self.user.id)
+        self.assertEqual(token.key, self.token.key)
+
+    def test_redis_without_queries(self):
+        self.auth.authenticate_credentials(self.token.key)
+        local_tokens.clear()
+
+        with self.assertNumQueries(0):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_cached_without_password(self):
+        self.auth.authenticate_credentials(self.token.key)
+
+        self.assertEqual(
+            cache.get(token_cache_key(self.token.key)), (self.user.id, True)
+            )
+        with self.assertNumQueries(0):
+            user, token = self.auth.authenticate_credentials(self.token.key)
+        self.assertIn("password", user.get_deferred_fields())
+
+    def test_invalid_token(self):
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials("invalid")
+
+    def test_deleted_token(self):
+        self.auth.authenticate_credentials(self.token.key)
+        self.token.delete()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_deactivated_user(self):
+        self.auth.authenticate_credentials(self.token.key)
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_list_without_token_queries(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+        self.client.get(reverse("project-list"))
+
+        with CaptureQueriesContext(connection) as queries:
+            r = self.client.get(reverse("project-list"))
+
+        self.assertEqual(r.status_code, 200)
+        self.assertFalse(
+            [q for q in queries if "authtoken_token" in q["sql"]]
+            )
+
+
+class KeysetPaginationTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            first_name="Test", last_name="Test", username="testing",
+            email="testemail@gmail.com", password="Password123#"
+            )
+        self.projects = Project.objects.bulk_create([
+            Project(name=f"Testing{name}", key=f"TEST{name}",
+                    type="Fullstack", starred=name in "AEI",
+                    author_id=self.user.id)
+            for name in "ABCDEFGHIJKL"
+            ])
+        Issue.objects.bulk_create([
+            Issue(project_id=project.id, title=f"Issue {project.key} {i}",
+                  type="Bug", priority="Low", status="To do",
+                  author_id=self.user.id)
+            for project in self.projects for i in range(3)
+            ])
+        token = Token.objects.get(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + token.key)
+
+    def get_all(self, url_name):
+        url = reverse(url_name)
+        results = []
+
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                r = self.client.get(url)
+
+            self.assertEqual(r.status_code, 200)
+            self.assertFalse(
+                [q for q in queries if "OFFSET" in q["sql"].upper()]
+                )
+            results += r.data["results"]
+            url = r.data["next"]
+
+        return results
+
+    def test_projects_pages(self):
+        results = self.get_all("project-list")
+        expected = list(
+            Project.objects.filter(author_id=self.user.id).
+            order_by("-starred", "-created", "id").
+            values_list("id", flat=True)
+            )
+
+        self.assertEqual([project["id"] for project in results], expected)
+
+    def test_issues_pages(self):
+        results = self.get_all("issue-list")
+        expected = list(
+            Issue.objects.filter(author_id=self.user.id).
+            order_by("project_id", "id").
+            values_list("id", flat=True)
+            )
+
+        self.assertEqual([issue["id"] for issue in results], expected)
+
+    def test_invalid_cursor(self):
+        r = self.client.get(reverse("issue-list"), {"cursor": "nope"})
+        self.assertEqual(r.status_code, 404)
+
+
+class BulkIssuesTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            first_name="Test", last_name="Test", username="testing",
+            email="testemail@gmail.com", password="Password123#"
+            )
+        self.project = Project.objects.create(
+            name="Testing1", key="TEST1",
+            type="Fullstack", author_id=self.user.id
+            )
+        self.other_project = Project.objects.create(
+            name="Testing2", key="TEST2",
+            type="Fullstack", author_id=self.user.id
+            )
+        self.issues = Issue.objects.bulk_create([
+            Issue(project_id=self.project.id, title=f"Issue {i}",
+                  type="Bug", priority="Low", status="To do",
+                  author_id=self.user.id)
+            for i in range(3)
+            ])
+        self.project_url = f"http://testserver/api/projects/{self.project.id}/"
+        self.url = reverse("issue-bulk")
+        token = Token.objects.get(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + token.key)
+
+    def issue_data(self, title):
+        return {
+            "project": self.project_url,
+            "title": title,
+            "type": "Feature",
+            "priority": "Medium",
+            "status": "To do"
+            }
+
+    def test_create(self):
+        data = [
+            self.issue_data("New 1"),
+            {"title": "No project"},
+            self.issue_data("New 2"),
+            self.issue_data("New 1"),
+            ]
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            r = self.client.post(self.url, data=data, format="json")
+
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual([issue["key"] for issue in r.data["results"]], [4, 5])
+        self.assertEqual(
+            [error["index"] for error in r.data["errors"]], [1, 3]
+            )
+        self.assertEqual(len(callbacks), 1)
+
+    def test_create_existing_title(self):
+        data = [self.issue_data("issue 0"), self.issue_data("new")]
+        r = self.client.post(self.url, data=data, format="json")
+
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual(r.data["errors"][0]["index"], 0)
+        self.assertEqual(len(r.data["results"]), 1)
+
+    def test_create_all_invalid(self):
+        r = self.client.post(self.url, data=[{}], format="json")
+        self.assertEqual(r.status_code, 400)
+
+    def test_not_a_list(self):
+        r = self.client.post(
+            self.url, data=self.issue_data("New"), format="json"
+            )
+        self.assertEqual(r.status_code, 400)
+
+    def test_update(self):
+        other_url = f"http://testserver/api/projects/{self.other_project.id}/"
+        data = [
+            {"id": self.issues[0].id, "status": "Done"},
+            {"id": self.issues[1].id, "project": other_url},
+            {"id": 0, "status": "Done"},
+            {"id": self.issues[2].id, "priority": "Wrong"},
+            ]
+
+        r = self.client.patch(self.url, data=data, format="json")
+
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(
+            [error["index"] for error in r.data["errors"]], [2, 3]
+            )
+        self.assertEqual(
+            Issue.objects.get(id=self.issues[0].id).status, "Done"
+            )
+        moved = Issue.objects.get(id=self.issues[1].id)
+        self.assertEqual(moved.project_id, self.other_project.id)
+        self.assertEqual(moved.key, 1)
+
+    def test_delete(self):
+        data = [self.issues[0].id, self.issues[1].id, 0]
+        r = self.client.delete(self.url, data=data, format="json")
+
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(len(r.data["results"]), 2)
+        self.assertEqual(r.data["errors"][0]["index"], 2)
+        self.assertEqual(
+            list(Issue.objects.values_list("id", flat=True)),
+            [self.issues[2].id]
+            )
+
+
+class ConditionalGetTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            first_name="Test", last_name="Test", username="testing",
+            email="testemail@gmail.com", password="Password123#"
+            )
+        self.project = Project.objects.create(
+            name="Testing1", key="TEST1",
+            type="Fullstack", author_id=self.user.id
+            )
+        token = Token.objects.get(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + token.key)
+
+    def test_not_modified(self):
+        url = reverse("project-list")
+        etag = self.client.get(url).headers["ETag"]
+
+        with CaptureQueriesContext(connection) as queries:
+            r = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(r.status_code, 304)
+        self.assertEqual(r.headers["ETag"], etag)
+        self.assertFalse(
+            [q for q in queries if "bugtracker_project" in q["sql"]]
+            )
+
+    def test_modified(self):
+        url = reverse("project-detail", args=[self.project.id])
+        etag = self.client.get(url).headers["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Project.objects.filter(id=self.project.id).update(starred=True)
+
+        r = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, 200)
+        self.assertNotEqual(r.headers["ETag"], etag)
+
+    def test_other_page(self):
+        r = self.client.get(reverse("project-list"))
+        other = self.client.get(
+            reverse("issue-list"), HTTP_IF_NONE_MATCH=r.headers["ETag"]
+            )
+        self.assertEqual(other.status_code, 200)
+
+    def test_last_modified(self):
+        r = self.client.get(reverse("issue-list"))
+        r = self.client.get(
+            reverse("issue-list"),
+            HTTP_IF_MODIFIED_SINCE=r.headers["Last-Modified"]
+            )
+        self.assertEqual(r.status_code, 304)
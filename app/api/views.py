@@ -1,39 +1,280 @@
-from django.core.cache import cache
+import hashlib
 
-from rest_framework import viewsets
+from django.db import transaction
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from rest_framework import serializers, status, viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.authtoken.models import Token
+from rest_framework.response import Response
 
-from .serializers import ProjectSerializer, IssueSerializer
+from bugtracker.generations import (
+    PROJECT, USER, generation_timestamp, get_generation, invalidate,
+    versioned_key
+    )
+from bugtracker.snapshots import API_ISSUES, API_PROJECTS
+from .serializers import ProjectSerializer, IssueSerializer, TITLE_EXISTS
 from .models import Project, Issue
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class SnapshotPageMixin:
+    """
+    Caches the pages of the list as compact snapshots,
+    see KeysetPagination.
+    """
+
+    snapshot = None
+    cache_prefix = None
+
+    def cache_page(self, queryset, cursor):
+        key = versioned_key(self.cache_prefix, USER, self.request.user.id)
+        if cursor:
+            key += "_" + hashlib.md5(cursor.encode()).hexdigest()[:16]
+
+        return self.snapshot.get_or_set(key, queryset)
+
+
+class ConditionalGetMixin:
+    """
+    ETag and Last-Modified on the list and detail responses.
+
+    Both are derived from the generation of the user (see
+    bugtracker.generations) before anything is queried or serialized:
+    if the client has the current version it gets 304 for one Redis GET.
+    """
+
+    def get_change_stamp(self) -> str:
+        return get_generation(USER, self.request.user.id)
+
+    def get_conditional_response(self, handler, request, *args, **kwargs):
+        stamp = self.get_change_stamp()
+        # Same stamp, other page/format/user - other representation
+        etag = quote_etag(hashlib.sha256("|".join((
+            stamp, str(request.user.id), request.get_full_path(),
+            request.accepted_media_type
+            )).encode()).hexdigest()[:32])
+        last_modified = generation_timestamp(stamp)
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+            )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+
+        if response.status_code in (200, 304):
+            response.headers["ETag"] = etag
+            response.headers["Last-Modified"] = http_date(last_modified)
+
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().list, request, *args, **kwargs
+            )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().retrieve, request, *args, **kwargs
+            )
+
+
+class ProjectViewSet(
+        ConditionalGetMixin, SnapshotPageMixin, viewsets.ModelViewSet
+        ):
     """ API endpoint that shows user projects. """
 
     serializer_class = ProjectSerializer
     permission_classes = [IsAuthenticated]
+    ordering = ("-starred", "-created", "id")
+    snapshot = API_PROJECTS
+    cache_prefix = "project_query"
 
     def get_queryset(self):
-        user_id = Token.objects.get(key=self.request.auth.key).user_id
-        queryset = cache.get_or_set(
-            f"project_query_{user_id}",
-            Project.objects.filter(author_id=user_id)
-            .order_by('-starred', '-created'))
+        return Project.objects.filter(author_id=self.request.user.id)
+
+    def perform_destroy(self, instance):
+        # Purged later, see bugtracker/deletion.py
+        Project.objects.filter(id=instance.id).soft_delete()
 
-        return queryset
+    def get_change_stamp(self) -> str:
+        # A project doesn't change with the other projects of the user
+        pk = self.kwargs.get("pk", "")
+        if self.action == "retrieve" and pk.isdigit():
+            return get_generation(PROJECT, int(pk))
 
+        return super().get_change_stamp()
 
-class IssueViewSet(viewsets.ModelViewSet):
+
+class IssueViewSet(
+        ConditionalGetMixin, SnapshotPageMixin, viewsets.ModelViewSet
+        ):
     """ API endpoint that shows user created issues. """
 
     serializer_class = IssueSerializer
     permission_classes = [IsAuthenticated]
+    ordering = ("project_id", "id")
+    snapshot = API_ISSUES
+    cache_prefix = "issue_query"
 
     def get_queryset(self):
-        user_id = Token.objects.get(key=self.request.auth.key).user_id
-        queryset = cache.get_or_set(
-            f"issue_query_{user_id}",
-            Issue.objects.filter(author_id=user_id).order_by('project'))
+        return (
+            Issue.objects.of_live_projects().
+            filter(author_id=self.request.user.id)
+            )
+
+    def perform_destroy(self, instance):
+        # Purged later, see bugtracker/deletion.py
+        Issue.objects.filter(id=instance.id).soft_delete()
+
+    # Bulk endpoints: /api/issues/bulk/
+    #   POST   [{issue}, ...]              - create
+    #   PATCH  [{"id": 1, ...fields}, ...] - partial update
+    #   DELETE [1, 2, ...]                 - delete
+    # Valid items are written in one transaction, invalid ones are
+    # reported in "errors" with their index in the payload.
+
+    bulk_max_items = 500
+
+    def get_bulk_items(self, request) -> list:
+        items = request.data
+        if not isinstance(items, list):
+            raise serializers.ValidationError("Expected a list of items.")
+        if len(items) > self.bulk_max_items:
+            raise serializers.ValidationError(
+                f"Ensure there are no more than {self.bulk_max_items} items."
+                )
+        return items
+
+    def validate_bulk_items(self, items, instances=None):
+        """  Returns the (index, instance, validated_data) and the errors  """
+
+        valid = []
+        errors = []
+        titles = set()
+        seen = set()
+
+        for index, item in enumerate(items):
+            instance = None
+            if instances is not None:
+                item_id = item.get("id") if isinstance(item, dict) else None
+                if isinstance(item_id, int):
+                    instance = instances.get(item_id)
+                if instance is None or instance.id in seen:
+                    errors.append({"index": index, "errors": {
+                        "id": ["Not found." if instance is None
+                               else "Duplicate item."]
+                        }})
+                    continue
+                seen.add(instance.id)
+
+            serializer = self.get_serializer(
+                instance, data=item, partial=instance is not None
+                )
+            if not serializer.is_valid():
+                errors.append({"index": index, "errors": serializer.errors})
+                continue
+
+            # The serializer checks the titles only against the database
+            title = serializer.title_key(serializer.validated_data)
+            if title in titles:
+                errors.append({"index": index, "errors": {
+                    "title": [TITLE_EXISTS]
+                    }})
+                continue
+            if title is not None:
+                titles.add(title)
+
+            valid.append((index, instance, serializer.validated_data))
+
+        return valid, errors
+
+    def bulk_response(self, results, errors, success_status):
+        return Response(
+            {"results": results, "errors": errors},
+            status=success_status if results or not errors
+            else status.HTTP_400_BAD_REQUEST
+            )
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        valid, errors = self.validate_bulk_items(self.get_bulk_items(request))
+        issues = [Issue(**data) for _, _, data in valid]
+
+        # Keys are allocated once per project, the cache is
+        # invalidated once per project, see IssueQuerySet.bulk_create()
+        with transaction.atomic():
+            Issue.objects.bulk_create(issues)
+
+        return self.bulk_response(
+            self.get_serializer(issues, many=True).data,
+            errors, status.HTTP_201_CREATED
+            )
+
+    @bulk.mapping.patch
+    def bulk_update(self, request):
+        items = self.get_bulk_items(request)
+        ids = [
+            item["id"] for item in items
+            if isinstance(item, dict) and isinstance(item.get("id"), int)
+            ]
+
+        with transaction.atomic():
+            instances = self.get_queryset().select_for_update().in_bulk(ids)
+            valid, errors = self.validate_bulk_items(items, instances)
+
+            issues = []
+            fields = {"updated"}
+            old_projects = set()
+            now = timezone.now()
+
+            for _, issue, data in valid:
+                project = data.get("project")
+                if project is not None and project.id != issue.project_id:
+                    # A moved issue gets the next key of its new project
+                    old_projects.add(issue.project_id)
+                    issue.key = None
+                    fields.add("key")
+
+                for field, value in data.items():
+                    setattr(issue, field, value)
+                    fields.add(field)
+                issue.updated = now
+                issues.append(issue)
+
+            Issue.objects.allocate_keys(issues)
+            Issue.objects.bulk_update(issues, sorted(fields))
+            # bulk_update() knows only the new projects of the issues
+            invalidate(projects=old_projects)
+
+        return self.bulk_response(
+            self.get_serializer(issues, many=True).data,
+            errors, status.HTTP_200_OK
+            )
+
+    @bulk.mapping.delete
+    def bulk_destroy(self, request):
+        items = self.get_bulk_items(request)
+
+        with transaction.atomic():
+            found = set(
+                self.get_queryset().filter(
+                    id__in=[item for item in items if isinstance(item, int)]
+                    ).values_list("id", flat=True)
+                )
+            # One UPDATE, the issues are purged later,
+            # see bugtracker/deletion.py
+            Issue.objects.filter(id__in=found).soft_delete()
+
+        results = []
+        errors = []
+        for index, item in enumerate(items):
+            if isinstance(item, int) and item in found:
+                results.append({"id": item})
+            else:
+                errors.append({"index": index, "errors": {
+                    "id": ["Not found."]
+                    }})
 
-        return queryset
+        return self.bulk_response(results, errors, status.HTTP_200_OK)
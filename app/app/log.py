@@ -1,12 +1,111 @@
+import hashlib
+import json
+import os
+import threading
+import traceback
 from typing import Any
 
+import redis
+
 from django.conf import settings
 from django.utils.log import AdminEmailHandler
 
-from bugtracker.tasks import send_email
+from bugtracker.mail import get_redis, queue_email
+
+
+# The same error logged many times in a window is sent to the admins
+# once, with the count. The first one in a window keeps its subject and
+# message in Redis and schedules send_error_digest, the others only
+# increment the counter of the fingerprint.
+
+DIGEST_WINDOW = getattr(settings, "ADMIN_ERROR_DIGEST_WINDOW", 60)
+
+
+def project_frame(frames: traceback.StackSummary):
+    """
+    The deepest frame in the code of the project, not in Django or in
+    the other libraries the error went through. The deepest one if none.
+    """
+
+    base = os.path.join(settings.BASE_DIR, "")
+    for frame in reversed(frames):
+        if (frame.filename.startswith(base)
+                and "site-packages" not in frame.filename):
+            return frame
+
+    return frames[-1]
+
+
+def error_fingerprint(record) -> str:
+    """  The exception type and where it was raised, or the log call  """
+
+    if record.exc_info and record.exc_info[0] is not None:
+        exc_type, _exc, tb = record.exc_info
+        frames = traceback.extract_tb(tb)
+        if frames:
+            frame = project_frame(frames)
+            where = f"{frame.filename}:{frame.lineno}"
+        else:
+            where = ""
+        key = f"{exc_type.__module__}.{exc_type.__qualname__}|{where}"
+    else:
+        key = f"{record.pathname}:{record.lineno}|{record.msg}"
+
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def count_key(fingerprint: str) -> str:
+    return f"error_count_{fingerprint}"
+
+
+def sample_key(fingerprint: str) -> str:
+    return f"error_sample_{fingerprint}"
+
+
+def count_error(fingerprint: str) -> bool:
+    """  Returns True for the first error of the window  """
+
+    r = get_redis()
+    first = r.incr(count_key(fingerprint)) == 1
+    if first:
+        # Don't keep the counter forever if the digest task is lost
+        r.expire(count_key(fingerprint), DIGEST_WINDOW * 10)
+
+    return first
+
+
+def pop_error_digest(fingerprint: str) -> tuple[str, str, int] | None:
+    """  (subject, message, count) of the window, which is closed  """
+
+    pipe = get_redis().pipeline()
+    pipe.getdel(count_key(fingerprint))
+    pipe.getdel(sample_key(fingerprint))
+    count, sample = pipe.execute()
+    if sample is None:
+        return None
+
+    sample = json.loads(sample)
+    return sample["subject"], sample["message"], int(count or 1)
 
 
 class CustomAdminEmail(AdminEmailHandler):
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.local = threading.local()
+
+    def emit(self, record) -> None:
+        fingerprint = error_fingerprint(record)
+        try:
+            if not count_error(fingerprint):
+                return
+        except redis.RedisError:
+            # Not counted, sent right away
+            fingerprint = None
+
+        self.local.fingerprint = fingerprint
+        super().emit(record)
+
     def send_mail(
             self,
             subject: str,
@@ -15,8 +114,26 @@ class CustomAdminEmail(AdminEmailHandler):
             **kwargs: Any
             ) -> None:
 
-        send_email.delay_on_commit(
+        from bugtracker.tasks import send_error_digest
+
+        body = message[:34] + message[438:490]
+        fingerprint = getattr(self.local, "fingerprint", None)
+        if fingerprint is not None:
+            try:
+                get_redis().set(
+                    sample_key(fingerprint),
+                    json.dumps({"subject": subject, "message": body}),
+                    ex=DIGEST_WINDOW * 10
+                    )
+                send_error_digest.apply_async(
+                    (fingerprint,), countdown=DIGEST_WINDOW
+                    )
+                return
+            except redis.RedisError:
+                pass
+
+        queue_email(
             subject=subject,
-            body=message[:34] + message[438:490],
+            body=body,
             to_email=[a[1] for a in settings.ADMINS]
             )
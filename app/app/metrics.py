@@ -0,0 +1,284 @@
+import logging
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+
+import redis
+
+from django.conf import settings
+from django.core.cache.backends.redis import RedisCache
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+
+
+# Metrics in the Prometheus text format.
+#
+# Every process accumulates its samples in memory and a thread of the
+# process adds them to a Redis hash every METRICS_FLUSH_INTERVAL seconds
+# with HINCRBYFLOAT, so the samples of all the gunicorn workers are
+# summed up by Redis and any worker can serve /metrics. The requests
+# never wait for Redis, while it's down the samples stay in memory.
+
+REDIS_URL = getattr(settings, "METRICS_REDIS_URL", None)
+FLUSH_INTERVAL = getattr(settings, "METRICS_FLUSH_INTERVAL", 1.0)
+REDIS_KEY = "metrics"
+# Seconds, a stuck Redis mustn't stall the flushes for long
+REDIS_TIMEOUT = 1.0
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576)
+
+logger = logging.getLogger(__name__)
+
+METRICS = {
+    "http_requests_total": (
+        "counter", "Requests by URL name, method and status."
+        ),
+    "http_request_duration_seconds": (
+        "histogram", "Request latency by URL name."
+        ),
+    "http_response_size_bytes": (
+        "histogram", "Response body size by URL name."
+        ),
+    "db_queries_total": ("counter", "SQL queries by URL name."),
+    "db_query_duration_seconds_total": (
+        "counter", "Time spent in SQL queries by URL name."
+        ),
+    "cache_operations_total": (
+        "counter", "Cache operations by key prefix, operation and result."
+        ),
+    }
+
+
+def series(name: str, **labels) -> str:
+    """  series("x", view="boards") -> 'x{view="boards"}'  """
+
+    if not labels:
+        return name
+
+    pairs = ",".join(
+        f'{label}="{str(value).replace(chr(34), "")}"'
+        for label, value in sorted(labels.items())
+        )
+    return f"{name}{{{pairs}}}"
+
+
+class Registry:
+    """  Samples of this process that aren't in Redis yet  """
+
+    def __init__(self):
+        self._samples = defaultdict(float)
+        self._lock = threading.Lock()
+        self._redis = None
+        # The process with the flushing thread, a forked worker has none
+        self._flusher_pid = None
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = series(name, **labels)
+        with self._lock:
+            self._samples[key] += value
+
+    def observe(self, name: str, value: float, buckets, **labels) -> None:
+        with self._lock:
+            # Every bucket is set, Prometheus expects all of them
+            for bound in buckets:
+                self._samples[
+                    series(f"{name}_bucket", le=bound, **labels)
+                    ] += value <= bound
+            self._samples[series(f"{name}_bucket", le="+Inf", **labels)] += 1
+            self._samples[series(f"{name}_sum", **labels)] += value
+            self._samples[series(f"{name}_count", **labels)] += 1
+
+    def get_redis(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(
+                REDIS_URL, socket_timeout=REDIS_TIMEOUT,
+                socket_connect_timeout=REDIS_TIMEOUT
+                )
+        return self._redis
+
+    def start_flushing(self) -> None:
+        """  Starts the flushing thread of this process if there's none  """
+
+        pid = os.getpid()
+        with self._lock:
+            if self._flusher_pid == pid:
+                return
+            self._flusher_pid = pid
+
+        threading.Thread(
+            target=self.flush_forever, name="metrics-flush", daemon=True
+            ).start()
+
+    def flush_forever(self) -> None:
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush the metrics")
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._samples:
+                return
+            samples, self._samples = self._samples, defaultdict(float)
+
+        try:
+            pipe = self.get_redis().pipeline(transaction=False)
+            for key, value in samples.items():
+                pipe.hincrbyfloat(REDIS_KEY, key, value)
+            pipe.execute()
+        except redis.RedisError:
+            # Keep the samples for the next flush
+            with self._lock:
+                for key, value in samples.items():
+                    self._samples[key] += value
+
+    def collect(self) -> dict[str, float]:
+        self.flush()
+        return {
+            key.decode(): float(value)
+            for key, value in self.get_redis().hgetall(REDIS_KEY).items()
+            }
+
+
+registry = Registry()
+
+
+def metric_name(key: str) -> str:
+    """  The name of the metric of a series or of a histogram sample  """
+
+    name = key.split("{", 1)[0]
+    for suffix in ("_bucket", "_sum", "_count"):
+        base = name.removesuffix(suffix)
+        if base != name and METRICS.get(base, ("",))[0] == "histogram":
+            return base
+    return name
+
+
+LE_RE = re.compile(r'le="([^"]+)"')
+
+
+def sort_key(sample: tuple[str, float]):
+    """  Histogram buckets in the order of their bounds  """
+
+    key = sample[0]
+    match = LE_RE.search(key)
+    if match is None:
+        return (key, 0.0)
+
+    return (LE_RE.sub("", key), float(match.group(1)))
+
+
+def render(samples: dict[str, float]) -> str:
+    grouped = defaultdict(list)
+    for key, value in samples.items():
+        grouped[metric_name(key)].append((key, value))
+
+    lines = []
+    for name in sorted(grouped):
+        kind, help_text = METRICS.get(name, ("untyped", ""))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for key, value in sorted(grouped[name], key=sort_key):
+            lines.append(f"{key} {value:g}")
+
+    return "\n".join(lines) + "\n"
+
+
+def metrics(request):
+    """
+    Access: a staff user or "Authorization: Bearer <METRICS_TOKEN>".
+    """
+
+    token = getattr(settings, "METRICS_TOKEN", None)
+    header = request.headers.get("Authorization", "")
+    allowed = (
+        token and constant_time_compare(header, f"Bearer {token}")
+        ) or (request.user.is_authenticated and request.user.is_staff)
+    if not allowed:
+        raise PermissionDenied
+
+    try:
+        samples = registry.collect()
+    except redis.RedisError:
+        logger.exception("Metrics unavailable")
+        return HttpResponse("Metrics unavailable", status=503)
+
+    return HttpResponse(
+        render(samples),
+        content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+
+
+def key_prefix(key) -> str:
+    """
+    "projects_list_1_18a9c0e7" -> "projects_list",
+    the ids and the generations would make too many series.
+    """
+
+    key = str(key)
+    if key.startswith("django.contrib.sessions"):
+        return "session"
+
+    words = []
+    for word in key.split("_"):
+        if not word.isalpha():
+            break
+        words.append(word)
+
+    return "_".join(words) or "other"
+
+
+class InstrumentedRedisCache(RedisCache):
+    """  RedisCache that counts its operations in the metrics  """
+
+    def count(self, operation: str, key, result: str = "") -> None:
+        registry.inc(
+            "cache_operations_total",
+            prefix=key_prefix(key), operation=operation, result=result
+            )
+
+    def get(self, key, default=None, version=None):
+        missing = object()
+        value = super().get(key, missing, version)
+        self.count("get", key, "miss" if value is missing else "hit")
+
+        return default if value is missing else value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version)
+        for key in keys:
+            self.count("get", key, "hit" if key in found else "miss")
+
+        return found
+
+    def set(self, key, *args, **kwargs):
+        self.count("set", key)
+        return super().set(key, *args, **kwargs)
+
+    def add(self, key, *args, **kwargs):
+        added = super().add(key, *args, **kwargs)
+        self.count("add", key, "added" if added else "exists")
+
+        return added
+
+    def set_many(self, data, *args, **kwargs):
+        for key in data:
+            self.count("set", key)
+        return super().set_many(data, *args, **kwargs)
+
+    def delete(self, key, version=None):
+        self.count("delete", key)
+        return super().delete(key, version)
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        for key in keys:
+            self.count("delete", key)
+        return super().delete_many(keys, version)
@@ -0,0 +1,65 @@
+import time
+
+from django.db import connection
+
+from app.metrics import LATENCY_BUCKETS, SIZE_BUCKETS, registry
+
+
+class QueryStats:
+    """  connection.execute_wrapper() counting the queries of a request  """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+class MetricsMiddleware:
+    """
+    Records the latency, the status, the response size and the SQL
+    queries of every request by URL name, see app/metrics.py.
+    Should be the first middleware to see the whole request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryStats()
+        start = time.perf_counter()
+
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+
+        duration = time.perf_counter() - start
+        match = request.resolver_match
+        view = match.view_name if match else "unmatched"
+
+        registry.inc(
+            "http_requests_total", view=view,
+            method=request.method, status=response.status_code
+            )
+        registry.observe(
+            "http_request_duration_seconds", duration, LATENCY_BUCKETS,
+            view=view
+            )
+        if not response.streaming:
+            registry.observe(
+                "http_response_size_bytes", len(response.content),
+                SIZE_BUCKETS, view=view
+                )
+        registry.inc("db_queries_total", queries.count, view=view)
+        registry.inc(
+            "db_query_duration_seconds_total", queries.duration, view=view
+            )
+        # Sent to Redis by the flushing thread, not by the request
+        registry.start_flushing()
+
+        return response
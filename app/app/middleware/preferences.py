@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.utils import timezone, translation
+from django.utils.functional import SimpleLazyObject, empty
+
+from bugtracker.preferences import (
+    COOKIE_NAME, COOKIE_SALT, DEFAULT, get_preferences, get_timezone
+    )
+
+
+def loaded_user(request):
+    """  request.user if the request has loaded it already, or None  """
+
+    user = request.__dict__.get("user")
+    if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+        return None
+    return user
+
+
+class PreferencesMiddleware:
+    """
+    Activates the time zone and the language of the user.
+
+    The user id is taken from a signed cookie, not from the session,
+    and the preferences come from bugtracker.preferences, so the
+    session is loaded only by the views that need it. The cookie is
+    updated when a view has loaded the user anyway (a login, a logout).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        user_id = request.get_signed_cookie(
+            COOKIE_NAME, default="", salt=COOKIE_SALT
+            )
+        preferences = (
+            get_preferences(int(user_id)) if user_id.isdigit() else DEFAULT
+            )
+
+        tzinfo = get_timezone(preferences.timezone)
+        if tzinfo is not None:
+            timezone.activate(tzinfo)
+        else:
+            timezone.deactivate()
+        if preferences.language:
+            translation.activate(preferences.language)
+            request.LANGUAGE_CODE = preferences.language
+
+        response = self.get_response(request)
+
+        user = loaded_user(request)
+        if user is not None:
+            current = str(user.id) if user.is_authenticated else ""
+            if current != user_id:
+                self.set_cookie(response, current)
+
+        return response
+
+    @staticmethod
+    def set_cookie(response, user_id: str) -> None:
+        if not user_id:
+            response.delete_cookie(COOKIE_NAME)
+            return
+
+        response.set_signed_cookie(
+            COOKIE_NAME, user_id, salt=COOKIE_SALT,
+            max_age=settings.SESSION_COOKIE_AGE,
+            secure=settings.SESSION_COOKIE_SECURE,
+            httponly=True, samesite="Lax"
+            )
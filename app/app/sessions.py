@@ -0,0 +1,193 @@
+import logging
+
+import redis
+
+from django.conf import settings
+from django.contrib.sessions.backends import db
+from django.contrib.sessions.backends.base import (
+    VALID_KEY_CHARS, CreateError, SessionBase
+    )
+from django.utils.crypto import get_random_string
+
+
+# Session engine that keeps the sessions only in Redis.
+#
+# Redis expires the sessions itself (no django_session rows to clean
+# up) and a request writes its session at most once, in save(), when
+# the middleware calls it at the end of the request:
+#
+# - a new key (login, cycle_key) isn't written until then,
+#   the old key is deleted in the same round trip;
+# - the data is written only if it differs from what was loaded;
+# - the expiry of an unchanged session is refreshed with EXPIRE
+#   at most once per SESSION_REFRESH_INTERVAL seconds.
+#
+# With SESSION_REDIS_DB_FALLBACK the database is used while Redis is
+# unavailable, and the sessions created by the database backends
+# before the switch are moved to Redis when they're used.
+
+REDIS_URL = getattr(settings, "SESSION_REDIS_URL", None)
+REFRESH_INTERVAL = getattr(settings, "SESSION_REFRESH_INTERVAL", 300)
+DB_FALLBACK = getattr(settings, "SESSION_REDIS_DB_FALLBACK", False)
+# A hung Redis fails the request fast instead of blocking it
+TIMEOUT = getattr(settings, "SESSION_REDIS_TIMEOUT", 1.0)
+KEY_PREFIX = "session_"
+
+logger = logging.getLogger(__name__)
+
+_redis = None
+
+
+def get_redis() -> redis.Redis:
+    global _redis
+    if _redis is None:
+        _redis = redis.Redis.from_url(
+            REDIS_URL, socket_timeout=TIMEOUT, socket_connect_timeout=TIMEOUT
+            )
+    return _redis
+
+
+class SessionStore(SessionBase):
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        # The encoded data as it is in Redis, None for a new session
+        self._stored = None
+        self._refresh_expiry = False
+        self._stale_keys = []
+        self._use_db = False
+        # The key of create(), not in any store yet
+        self._new_key = False
+
+    @staticmethod
+    def redis_key(session_key: str) -> str:
+        return KEY_PREFIX + session_key
+
+    def db_store(self) -> db.SessionStore:
+        store = db.SessionStore(self.session_key)
+        store._session_cache = self._get_session(no_load=True)
+        return store
+
+    def load(self):
+        if not self.session_key:
+            return {}
+
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            pipe.get(self.redis_key(self.session_key))
+            pipe.ttl(self.redis_key(self.session_key))
+            data, ttl = pipe.execute()
+        except redis.RedisError:
+            logger.exception("Session store unavailable")
+            if not DB_FALLBACK:
+                self._session_key = None
+                return {}
+            self._use_db = True
+            return db.SessionStore(self.session_key).load()
+
+        if data is None:
+            return self.load_from_db()
+
+        self._stored = data.decode()
+        session = self.decode(self._stored)
+        age = self.get_expiry_age(expiry=session.get("_session_expiry"))
+        if 0 <= ttl < age - REFRESH_INTERVAL:
+            # save() only refreshes the expiry of unchanged data
+            self._refresh_expiry = True
+            self.modified = True
+
+        return session
+
+    def load_from_db(self) -> dict:
+        if DB_FALLBACK:
+            session = db.SessionStore(self.session_key).load()
+            if session:
+                # Written to Redis at the end of the request
+                self._stored = None
+                self.modified = True
+                return session
+
+        self._session_key = None
+        return {}
+
+    def create(self):
+        # Lazy, the session is written by save()
+        self._session_key = get_random_string(32, VALID_KEY_CHARS)
+        self._stored = None
+        self._new_key = True
+        self.modified = True
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            self.create()
+        if self._use_db:
+            return self.save_to_db(must_create)
+
+        data = self.encode(self._get_session(no_load=must_create))
+        age = self.get_expiry_age()
+        key = self.redis_key(self.session_key)
+
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            if self._stored is None:
+                pipe.set(key, data, ex=age, nx=True)
+            elif data != self._stored:
+                pipe.set(key, data, ex=age)
+            elif self._refresh_expiry:
+                pipe.expire(key, age)
+            for stale_key in self._stale_keys:
+                pipe.delete(self.redis_key(stale_key))
+            results = pipe.execute()
+        except redis.RedisError:
+            logger.exception("Session store unavailable")
+            if DB_FALLBACK:
+                # And for the rest of the request
+                self._use_db = True
+                self.save_to_db(must_create)
+            return
+
+        if self._stored is None and results and not results[0]:
+            # Taken by another session, try another key
+            if must_create:
+                raise CreateError
+            self.create()
+            return self.save()
+
+        self._stored = data
+        self._refresh_expiry = False
+        self._new_key = False
+        self._stale_keys = []
+
+    def save_to_db(self, must_create=False):
+        # A key of create() has no row to update yet
+        self.db_store().save(must_create or self._new_key)
+        # The old key of cycle_key() on login
+        for stale_key in self._stale_keys:
+            db.SessionStore().delete(stale_key)
+        self._new_key = False
+        self._stale_keys = []
+
+    def exists(self, session_key):
+        return bool(get_redis().exists(self.redis_key(session_key)))
+
+    def delete(self, session_key=None):
+        if session_key is not None and session_key != self.session_key:
+            # cycle_key(): deleted together with the write of the new key
+            self._stale_keys.append(session_key)
+            return
+
+        if self.session_key is None:
+            return
+        try:
+            get_redis().delete(self.redis_key(self.session_key))
+        except redis.RedisError:
+            logger.exception("Session store unavailable")
+        if DB_FALLBACK:
+            db.SessionStore().delete(self.session_key)
+        self._stored = None
+
+    @classmethod
+    def clear_expired(cls):
+        # Redis expires the keys itself
+        if DB_FALLBACK:
+            db.SessionStore.clear_expired()
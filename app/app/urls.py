@@ -1,10 +1,15 @@
 from django.contrib import admin
 from django.urls import include, path
 
+from bugtracker.views import set_language
+
+from .metrics import metrics
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics/', metrics, name='metrics'),
     path('', include('bugtracker.urls')),
-    path("settings/", include("django.conf.urls.i18n")),
+    path('settings/setlang/', set_language, name='set_language'),
     path('', include('api.urls')),
 ]
@@ -0,0 +1,196 @@
+from contextlib import contextmanager
+from typing import NamedTuple
+
+from django.core.cache import caches
+from django.db import connection
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext
+
+
+# Query and cache budgets of the views, by URL name
+# (bugtracker/urls.py and api/urls.py).
+#
+# A budget is the maximum for a single request with a cold cache,
+# it's checked by bugtracker/tests/test_budgets.py on a small and
+# on a large dataset. The cost of a view shouldn't grow with the data:
+# a budget that is higher for LARGE needs a good reason. After the
+# tests BudgetTestRunner compares the two sizes, see budget_failures().
+
+SMALL = "small"
+LARGE = "large"
+
+
+class Budget(NamedTuple):
+    queries: int
+    cache_ops: int
+
+
+def flat(queries: int, cache_ops: int) -> dict[str, Budget]:
+    """  The same budget for any size of the data  """
+
+    budget = Budget(queries, cache_ops)
+    return {SMALL: budget, LARGE: budget}
+
+
+BUDGETS = {
+    # bugtracker/urls.py
+    "projects": flat(5, 7),
+    "settings": flat(3, 3),
+    "boards": flat(7, 7),
+    "board-column": flat(5, 3),
+    "board-moves": flat(10, 4),
+    "board-events": flat(3, 3),
+    "project-settings": flat(4, 3),
+    "issue-details": flat(7, 3),
+    "accounts": flat(4, 3),
+    "login": flat(2, 3),
+    "logout": flat(4, 5),
+    "register": flat(2, 3),
+    "register_confirm": flat(3, 3),
+    "search": flat(2, 3),
+    "search-results": flat(5, 3),
+    "password-reset": flat(2, 3),
+    "password-reset-done": flat(2, 3),
+    "password_reset_confirm": flat(3, 3),
+    "delete-project": flat(5, 3),
+    "restore-project": flat(6, 3),
+    "delete-issue": flat(5, 3),
+    "restore-issue": flat(8, 3),
+    "delete-account": flat(22, 4),
+
+    # api/urls.py
+    "api-root": flat(2, 6),
+    "project-list": flat(4, 11),
+    "project-detail": flat(4, 8),
+    "issue-list": flat(4, 11),
+    "issue-detail": flat(4, 8),
+    "issue-bulk": flat(10, 8),
+    }
+
+
+CACHE_OPERATIONS = (
+    "add", "get", "set", "touch", "delete", "get_many", "set_many",
+    "delete_many", "has_key", "incr", "decr", "clear"
+    )
+
+
+class CacheOpsContext:
+    """  Records the calls of a cache, like CaptureQueriesContext  """
+
+    def __init__(self, alias: str = "default"):
+        self.alias = alias
+        self.operations = []
+        self._depth = 0
+
+    def __len__(self):
+        return len(self.operations)
+
+    def _wrap(self, name, method):
+        def wrapper(*args, **kwargs):
+            # get_many() of some backends is a loop of get(), count it once
+            if not self._depth:
+                key = args[0] if args else ""
+                self.operations.append(f"{name} {key!r}"[:200])
+
+            self._depth += 1
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self._depth -= 1
+
+        return wrapper
+
+    def __enter__(self):
+        self.backend = caches[self.alias]
+        self.operations = []
+        # Instance attributes shadow the methods of the backend
+        for name in CACHE_OPERATIONS:
+            setattr(self.backend, name, self._wrap(
+                name, getattr(self.backend, name)
+                ))
+        return self
+
+    def __exit__(self, *exc_info):
+        for name in CACHE_OPERATIONS:
+            delattr(self.backend, name)
+
+
+def budget_report(url_name, size, budget, queries, cache_ops) -> str:
+    lines = [
+        f"{url_name} ({size} data): {len(queries)} queries "
+        f"(budget {budget.queries}), {len(cache_ops)} cache operations "
+        f"(budget {budget.cache_ops})"
+        ]
+    lines += [f"  {i}. {query['sql']}" for i, query in enumerate(queries, 1)]
+    lines += [f"  cache: {operation}" for operation in cache_ops.operations]
+
+    return "\n".join(lines)
+
+
+# (url name, size) -> (queries, cache operations) of the checked requests
+checked: dict[tuple[str, str], tuple[int, int]] = {}
+
+
+def budget_failures(checked: dict) -> list[str]:
+    """
+    The views checked at one of the sizes only, and the views with the
+    same budget for both sizes that cost more with the LARGE data.
+    Nothing is required of a run that checked none of a size.
+    """
+
+    sizes = {size for _, size in checked}
+    failures = []
+
+    for url_name, budgets in BUDGETS.items():
+        small = checked.get((url_name, SMALL))
+        large = checked.get((url_name, LARGE))
+        if small is None and large is None:
+            continue
+        if small is None or large is None:
+            if sizes == {SMALL, LARGE}:
+                size = SMALL if small is None else LARGE
+                failures.append(f"{url_name}: not checked with {size} data")
+            continue
+
+        grows = large[0] > small[0] or large[1] > small[1]
+        if budgets[SMALL] == budgets[LARGE] and grows:
+            failures.append(
+                f"{url_name}: {small[0]} queries and {small[1]} cache "
+                f"operations with {SMALL} data, {large[0]} and {large[1]} "
+                f"with {LARGE} data"
+                )
+
+    return failures
+
+
+class BudgetTestRunner(DiscoverRunner):
+    """
+    Fails the run if the checked budgets tell the sizes apart, see
+    budget_failures(). The parallel processes keep their checks,
+    --parallel runs compare nothing.
+    """
+
+    def suite_result(self, suite, result, **kwargs):
+        failures = budget_failures(checked)
+        for failure in failures:
+            self.log(f"Budget: {failure}")
+
+        return super().suite_result(suite, result, **kwargs) + len(failures)
+
+
+class BudgetTestMixin:
+    """  assertWithinBudget() for the TestCase classes  """
+
+    @contextmanager
+    def assertWithinBudget(self, url_name: str, size: str):
+        budget = BUDGETS[url_name][size]
+
+        with CaptureQueriesContext(connection) as queries, \
+                CacheOpsContext() as cache_ops:
+            yield
+
+        checked[url_name, size] = (len(queries), len(cache_ops))
+        if len(queries) > budget.queries or len(cache_ops) > budget.cache_ops:
+            self.fail(budget_report(
+                url_name, size, budget, queries.captured_queries, cache_ops
+                ))
@@ -0,0 +1,98 @@
+import logging
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models
+from django.utils import timezone
+
+from .models import Issue, Project
+
+
+# Deletion of projects, issues and accounts.
+#
+# A deleted project or issue only gets "deleted_at" (soft_delete() in
+# models.py) and can be restored for UNDO_WINDOW. Then the nightly
+# purge_deleted task deletes it, at most PURGE_LIMIT issues a run.
+#
+# The rows are deleted by the database (see delete_cascading() in
+# models.py), not loaded by Django's collector. Accounts with more than
+# LARGE_DELETION issues are deleted by a Celery task. Both delete the
+# issues CHUNK_SIZE at a time, each chunk in its own short transaction.
+
+UNDO_WINDOW = timedelta(
+    seconds=getattr(settings, "DELETION_UNDO_WINDOW", 60 * 60 * 24 * 7)
+    )
+PURGE_LIMIT = getattr(settings, "DELETION_PURGE_LIMIT", 200000)
+LARGE_DELETION = 10000
+CHUNK_SIZE = 2000
+PROGRESS_TIMEOUT = 60 * 60
+
+logger = logging.getLogger(__name__)
+
+
+def undo_deadline() -> datetime:
+    """  Objects deleted after it can still be restored  """
+
+    return timezone.now() - UNDO_WINDOW
+
+
+def is_large(issues: models.QuerySet) -> bool:
+    """  More than LARGE_DELETION issues, counted up to it only  """
+
+    return issues.order_by()[LARGE_DELETION:].exists()
+
+
+def progress_key(kind: str, object_id: int) -> str:
+    return f"deletion_{kind}_{object_id}"
+
+
+def get_progress(kind: str, object_id: int) -> dict | None:
+    """  {"deleted": 2000, "total": 50000} while it's being deleted  """
+
+    return cache.get(progress_key(kind, object_id))
+
+
+def delete_in_chunks(issues: models.QuerySet, kind: str, object_id: int):
+    key = progress_key(kind, object_id)
+    progress = {"deleted": 0, "total": issues.count()}
+    cache.set(key, progress, PROGRESS_TIMEOUT)
+
+    while deleted := issues.delete_chunk(CHUNK_SIZE):
+        progress["deleted"] += deleted
+        cache.set(key, progress, PROGRESS_TIMEOUT)
+        logger.info(
+            "Deleting %s %s: %d of %d issues", kind, object_id,
+            progress["deleted"], progress["total"]
+            )
+
+    cache.delete(key)
+
+
+def purge(limit: int = PURGE_LIMIT) -> int:
+    """
+    Deletes the projects and issues deleted before the undo window.
+    Stops after "limit" issues, the rest waits for the next run.
+    Returns the number of deleted issues.
+    """
+
+    deadline = undo_deadline()
+    purged = 0
+
+    for issues in (
+            Issue.all_objects.filter(project__deleted_at__lt=deadline),
+            Issue.all_objects.filter(deleted_at__lt=deadline)
+            ):
+        while purged < limit:
+            deleted = issues.delete_chunk(min(CHUNK_SIZE, limit - purged))
+            if not deleted:
+                break
+            purged += deleted
+            logger.info("Purged %d deleted issues", purged)
+
+    if purged < limit:
+        # No issues left, one DELETE for the projects
+        projects = Project.all_objects.filter(deleted_at__lt=deadline)
+        logger.info("Purged %d deleted projects", projects.delete_cascading())
+
+    return purged
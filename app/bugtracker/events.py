@@ -0,0 +1,125 @@
+import asyncio
+import json
+from collections import defaultdict
+
+import redis
+import redis.asyncio
+
+from django.conf import settings
+from django.db import transaction
+
+
+# Board updates for the open browsers.
+#
+# The issue signals publish the changes to the "board_{project_id}"
+# Redis channel after the commit. Every ASGI process has one Redis
+# subscription shared by all its Server-Sent Events streams, see
+# BoardListeners and the board_events view.
+
+REDIS_URL = getattr(settings, "EVENTS_REDIS_URL", None)
+KEEPALIVE = 15
+
+_publisher = None
+
+
+def board_channel(project_id: int) -> str:
+    return f"board_{project_id}"
+
+
+def _publish(channel: str, message: str) -> None:
+    global _publisher
+    if _publisher is None:
+        _publisher = redis.Redis.from_url(REDIS_URL)
+
+    try:
+        _publisher.publish(channel, message)
+    except redis.RedisError:
+        # The browsers will see the change after a reload
+        pass
+
+
+def publish_issue_event(event: str, issue) -> None:
+    """  Sends "save" or "delete" of the issue to its board on commit  """
+
+    data = {"event": event, "id": issue.id, "status": issue.status}
+    # Don't query the deferred fields just for the event
+    deferred = issue.get_deferred_fields()
+    for field in ("title", "rank"):
+        if field not in deferred:
+            data[field] = getattr(issue, field)
+
+    message = json.dumps(data)
+    transaction.on_commit(
+        lambda: _publish(board_channel(issue.project_id), message)
+        )
+
+
+class BoardListeners:
+    """
+    Fans out the messages of one Redis subscription
+    to the queues of the streams of this process.
+    """
+
+    def __init__(self):
+        self.queues = defaultdict(set)
+        self.pubsub = None
+        self.reader = None
+
+    async def start(self):
+        if self.pubsub is None:
+            client = redis.asyncio.Redis.from_url(REDIS_URL)
+            self.pubsub = client.pubsub(ignore_subscribe_messages=True)
+            # A pubsub without channels can't be read, keep one
+            await self.pubsub.subscribe("board_keepalive")
+        if self.reader is None or self.reader.done():
+            self.reader = asyncio.create_task(self.read())
+
+    async def read(self):
+        async for message in self.pubsub.listen():
+            if message["type"] != "message":
+                continue
+            channel = message["channel"].decode()
+            for queue in self.queues.get(channel, ()):
+                try:
+                    queue.put_nowait(message["data"].decode())
+                except asyncio.QueueFull:
+                    # A stuck stream mustn't hold back the others
+                    pass
+
+    async def add(self, channel: str) -> asyncio.Queue:
+        await self.start()
+        queue = asyncio.Queue(maxsize=100)
+        if not self.queues[channel]:
+            await self.pubsub.subscribe(channel)
+        self.queues[channel].add(queue)
+
+        return queue
+
+    async def remove(self, channel: str, queue: asyncio.Queue) -> None:
+        self.queues[channel].discard(queue)
+        if not self.queues[channel]:
+            del self.queues[channel]
+            await self.pubsub.unsubscribe(channel)
+
+
+listeners = BoardListeners()
+
+
+async def board_stream(project_id: int):
+    """  Server-Sent Events of the board  """
+
+    channel = board_channel(project_id)
+    queue = await listeners.add(channel)
+
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), KEEPALIVE)
+            except asyncio.TimeoutError:
+                # Comments keep the proxies from closing the connection
+                yield ": keepalive\n\n"
+                continue
+            yield f"data: {message}\n\n"
+    finally:
+        await listeners.remove(channel, queue)
@@ -1,10 +1,11 @@
 import re
-from typing import Any
+from typing import Any, Callable
 
 from django import forms
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import PasswordResetForm
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
 from django.forms import (
     CheckboxInput,
     EmailInput,
@@ -14,11 +15,10 @@ from django.forms import (
     Textarea,
     TextInput
     )
-from django.template import loader
-from django.utils.translation import gettext_lazy as _
+from django.utils.translation import get_language, gettext_lazy as _
 
 from bugtracker.models import Project, Issue
-from .tasks import send_email
+from .tasks import send_user_email
 
 
 def validate_string(string: str) -> bool:
@@ -46,7 +46,97 @@ def validate_password(password: str) -> bool:
         return True
 
 
-class RegisterForm(forms.Form):
+def violated_constraint(error: IntegrityError) -> str | None:
+    """  Name of the constraint or unique index the error is about  """
+
+    diag = getattr(error.__cause__, "diag", None)
+    return getattr(diag, "constraint_name", None)
+
+
+def unique_errors(model, fields: dict[str, str]) -> dict:
+    """
+    {constraint: (field, error)} with the errors Django gives
+    for the unique fields: "Project with this Name already exists."
+    """
+
+    return {
+        constraint: (field, model().unique_error_message(model, [field]))
+        for constraint, field in fields.items()
+        }
+
+
+def user_violations(username: str, email: str, user_id=None) -> list[str]:
+    """  The unique indexes of auth_user the values are taken in  """
+
+    users = User.objects.exclude(id=user_id)
+    violations = []
+    if users.filter(username__iexact=username).exists():
+        violations.append("user_username_ci_uniq")
+    if email and users.filter(email__iexact=email).exists():
+        violations.append("user_email_ci_uniq")
+
+    return violations
+
+
+class ConstraintErrorsMixin:
+    """
+    The unique constraints of the database are the only check, the form
+    doesn't look for the duplicates. save_or_error() saves and turns the
+    violation of a constraint from "constraint_errors" into the error
+    of its field.
+    """
+
+    # {constraint or unique index: (field, message)}
+    constraint_errors: dict[str, tuple[str, Any]] = {}
+
+    def validate_unique(self):
+        # Only called by ModelForm, it would query every unique field
+        pass
+
+    def violations(self) -> list[str]:
+        """
+        The constraints of "constraint_errors" the data breaks. Queried
+        only after a failed save, the database reports one violation
+        and the form shows them all. The model constraints by default.
+        """
+
+        instance = getattr(self, "instance", None)
+        if instance is None:
+            return []
+
+        violations = []
+        for constraint in instance._meta.constraints:
+            if constraint.name not in self.constraint_errors:
+                continue
+            try:
+                constraint.validate(type(instance), instance)
+            except ValidationError:
+                violations.append(constraint.name)
+
+        return violations
+
+    def save_or_error(self, save: Callable, *args, **kwargs) -> Any | None:
+        """  Returns what save() returns, None if it broke a constraint  """
+
+        try:
+            with transaction.atomic():
+                return save(*args, **kwargs)
+        except IntegrityError as error:
+            constraint = violated_constraint(error)
+            if constraint not in self.constraint_errors:
+                raise
+
+        # One error a field, in the order of "constraint_errors"
+        violated = {constraint, *self.violations()}
+        errors = {}
+        for name, (field, message) in self.constraint_errors.items():
+            if name in violated:
+                errors.setdefault(field, message)
+        for field, message in errors.items():
+            self.add_error(field, message)
+
+
+class RegisterForm(ConstraintErrorsMixin, forms.Form):
 
     first_name = forms.CharField(
         label=_("First name"),
@@ -125,6 +215,20 @@ class RegisterForm(forms.Form):
             )
         )
 
+    constraint_errors = {
+        "auth_user_username_key": (
+            "username", _("That username already exists")
+            ),
+        "user_username_ci_uniq": (
+            "username", _("That username already exists")
+            ),
+        "user_email_ci_uniq": ("email", _("That email already exists")),
+        }
+
+    def violations(self) -> list[str]:
+        cd = self.cleaned_data
+        return user_violations(cd.get("username"), cd.get("email"))
+
     def clean_first_name(self):
         first_name = self.cleaned_data["first_name"].capitalize()
 
@@ -146,19 +250,9 @@ class RegisterForm(forms.Form):
 
         if not validate_string(username):
             raise ValidationError(_("Username must have only letters"))
-        elif User.objects.filter(username=username):
-            raise ValidationError(_("That username already exists"))
 
         return username
 
-    def clean_email(self):
-        email = self.cleaned_data["email"]
-
-        if User.objects.filter(email=email):
-            raise ValidationError(_("That email already exists"))
-
-        return email
-
     def clean_password1(self):
         password1 = self.cleaned_data["password1"]
 
@@ -237,7 +331,7 @@ class LoginForm(forms.Form):
         )
 
 
-class UserForm(ModelForm):
+class UserForm(ConstraintErrorsMixin, ModelForm):
 
     class Meta:
         model = User
@@ -270,6 +364,16 @@ class UserForm(ModelForm):
                 ),
             }
 
+    constraint_errors = unique_errors(User, {
+        "auth_user_username_key": "username",
+        "user_username_ci_uniq": "username",
+        "user_email_ci_uniq": "email",
+        })
+
+    def violations(self) -> list[str]:
+        user = self.instance
+        return user_violations(user.username, user.email, user.id)
+
     def clean_first_name(self):
         first_name = self.cleaned_data["first_name"]
 
@@ -345,7 +449,13 @@ class UserPasswordChangeForm(forms.Form):
         return self.user
 
 
-class ProjectDetailsForm(ModelForm):
+PROJECT_CONSTRAINT_ERRORS = {
+    "unique_project_name": ("name", _("That project already exists")),
+    "unique_project_key": ("key", _("Project with that key already exists")),
+    }
+
+
+class ProjectDetailsForm(ConstraintErrorsMixin, ModelForm):
 
     class Meta:
         model = Project
@@ -378,6 +488,11 @@ class ProjectDetailsForm(ModelForm):
                 ),
             }
 
+    constraint_errors = unique_errors(Project, {
+        "unique_project_name": "name",
+        "unique_project_key": "key",
+        })
+
     def clean_name(self):
         name = self.cleaned_data["name"]
 
@@ -395,7 +510,7 @@ class ProjectDetailsForm(ModelForm):
         return key
 
 
-class ProjectModalForm(ModelForm):
+class ProjectModalForm(ConstraintErrorsMixin, ModelForm):
 
     class Meta:
         model = Project
@@ -423,26 +538,16 @@ class ProjectModalForm(ModelForm):
                 ),
             }
 
-    def clean_name(self):
-        cd = self.cleaned_data
-        name = cd["name"].capitalize()
-
-        if Project.objects.filter(name=name):
-            raise ValidationError(_("That project already exists"))
+    constraint_errors = PROJECT_CONSTRAINT_ERRORS
 
-        return name
+    def clean_name(self):
+        return self.cleaned_data["name"].capitalize()
 
     def clean_key(self):
-        cd = self.cleaned_data
-        key = cd["key"].upper()
+        return self.cleaned_data["key"].upper()
 
-        if Project.objects.filter(key=key):
-            raise ValidationError(_("Project with that key already exists"))
 
-        return key
-
-
-class IssueModalForm(ModelForm):
+class IssueModalForm(ConstraintErrorsMixin, ModelForm):
 
     class Meta:
         model = Issue
@@ -472,16 +577,17 @@ class IssueModalForm(ModelForm):
             "author": TextInput(),
             }
 
-    def clean_title(self):
-        title = self.cleaned_data["title"].capitalize()
-
-        if Issue.objects.filter(title=title):
-            raise ValidationError(_("Issue with that title already exists"))
+    constraint_errors = {
+        "unique_issue_title": (
+            "title", _("Issue with that title already exists")
+            ),
+        }
 
-        return title
+    def clean_title(self):
+        return self.cleaned_data["title"].capitalize()
 
 
-class IssueDetailsForm(ModelForm):
+class IssueDetailsForm(ConstraintErrorsMixin, ModelForm):
 
     class Meta:
         model = Issue
@@ -516,6 +622,8 @@ class IssueDetailsForm(ModelForm):
             "author": TextInput(),
             }
 
+    constraint_errors = unique_errors(Issue, {"unique_issue_title": "title"})
+
 
 class UserForgotPasswordForm(PasswordResetForm):
     """  Request to reset password  """
@@ -535,7 +643,7 @@ class UserForgotPasswordForm(PasswordResetForm):
             )
         )
 
-    # A rewritten method for sending mail through a Celery task
+    # A rewritten method for rendering and sending mail in a Celery task
     def send_mail(
             self,
             subject_template_name: str,
@@ -546,19 +654,14 @@ class UserForgotPasswordForm(PasswordResetForm):
             html_email_template_name: str | None
             ) -> None:
 
-        user = (context["user"].id)
-        context["user"] = user
-
-        subject = loader.render_to_string(subject_template_name, context)
-        subject = "".join(subject.splitlines())
-
-        body = loader.render_to_string(email_template_name, context)
-
-        send_email.delay_on_commit(
-            subject=subject,
-            body=body,
-            context=context,
-            to_email=[user_email],
+        send_user_email.delay_on_commit(
+            user_id=context["user"].id,
+            token=context["token"],
+            language=get_language(),
+            subject_template_name=subject_template_name,
+            email_template_name=email_template_name,
+            domain=context["domain"],
+            protocol=context["protocol"]
             )
 
 
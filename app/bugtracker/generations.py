@@ -0,0 +1,106 @@
+import time
+from typing import Iterable
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+# Generation counters for cache invalidation.
+#
+# Every cached value that depends on the user's or the project's data
+# has the current generation of that user/project in its key:
+# "projects_list_{user_id}_{generation}". To invalidate everything
+# under a user or a project it's enough to set a new generation,
+# the old entries become unreachable and expire by their timeout.
+#
+# A generation is a unique token, not an incrementing number: if the
+# counter is evicted by Redis, a fresh token never matches old keys.
+
+USER = "user"
+PROJECT = "project"
+
+
+def _counter_key(scope: str, obj_id: int) -> str:
+    return f"generation_{scope}_{obj_id}"
+
+
+def _new_generation() -> str:
+    return f"{time.time_ns():x}"
+
+
+def get_generation(scope: str, obj_id: int) -> str:
+    key = _counter_key(scope, obj_id)
+    generation = cache.get(key)
+
+    if generation is None:
+        generation = _new_generation()
+        # Keep the value if a concurrent request has already set it
+        if not cache.add(key, generation, timeout=None):
+            generation = cache.get(key, generation)
+
+    return generation
+
+
+def generation_timestamp(generation: str) -> int:
+    """
+    When the generation was set, in seconds since the epoch.
+
+    It's the time of the last change of the user/project, or a later
+    time if the counter was evicted - never an earlier one.
+    """
+
+    return int(generation, 16) // 10**9
+
+
+def versioned_key(prefix: str, scope: str, obj_id: int) -> str:
+    """  "projects_list", USER, 1 -> "projects_list_1_18a9c0e7d3b1f2a4"  """
+
+    return f"{prefix}_{obj_id}_{get_generation(scope, obj_id)}"
+
+
+def _bump(keys: set[str]) -> None:
+    generation = _new_generation()
+    cache.set_many({key: generation for key in keys}, timeout=None)
+
+
+def invalidate(
+        users: Iterable[int] = (),
+        projects: Iterable[int] = ()
+        ) -> None:
+    """
+    Bumps the generations of the given users and projects.
+
+    Inside a transaction the bump is postponed until the commit
+    (so a concurrent request can't cache the old data under the new
+    generation) and all the bumps of the transaction are sent to Redis
+    with one call. Use it after QuerySet.update(), bulk_create(),
+    raw SQL and anything else that doesn't send model signals.
+    """
+
+    keys = {_counter_key(USER, user_id) for user_id in users if user_id}
+    keys.update(
+        _counter_key(PROJECT, project_id)
+        for project_id in projects if project_id
+        )
+
+    if not keys:
+        return
+
+    connection = transaction.get_connection()
+
+    if not connection.in_atomic_block:
+        _bump(keys)
+        return
+
+    # Merge into the callback already scheduled by this transaction
+    for _, func, _ in connection.run_on_commit:
+        pending = getattr(func, "generation_keys", None)
+        if pending is not None:
+            pending.update(keys)
+            return
+
+    def bump_generations():
+        _bump(bump_generations.generation_keys)
+
+    bump_generations.generation_keys = keys
+    transaction.on_commit(bump_generations, robust=True)
@@ -0,0 +1,201 @@
+import json
+import logging
+import time
+from typing import NamedTuple
+
+import redis
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.template import loader
+from django.utils import translation
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+
+# Batched email delivery.
+#
+# queue_email() adds the message to a Redis list after the commit and
+# makes sure one send_pending_emails task is scheduled. The task takes
+# the messages EMAIL_BATCH_SIZE at a time and sends every batch over
+# one backend connection, so an SMTP connection and its TLS handshake
+# serve many messages instead of one.
+
+REDIS_URL = getattr(settings, "EMAIL_QUEUE_REDIS_URL", None)
+BATCH_SIZE = getattr(settings, "EMAIL_BATCH_SIZE", 50)
+# Messages queued within this many seconds go in the same batches
+BATCH_DELAY = getattr(settings, "EMAIL_BATCH_DELAY", 2)
+MAX_ATTEMPTS = getattr(settings, "EMAIL_MAX_ATTEMPTS", 3)
+RETRY_DELAY = 60
+
+PENDING_KEY = "mail_pending"
+SCHEDULED_KEY = "mail_scheduled"
+
+logger = logging.getLogger(__name__)
+
+_redis = None
+
+
+def get_redis() -> redis.Redis:
+    global _redis
+    if _redis is None:
+        _redis = redis.Redis.from_url(REDIS_URL)
+    return _redis
+
+
+def message_data(
+        subject: str,
+        body: str,
+        to_email: list[str],
+        html_message: str | None = None
+        ) -> dict:
+    """  What is queued of a message, a JSON object  """
+
+    return {
+        "subject": subject,
+        "body": body,
+        "to": list(to_email),
+        "html": html_message,
+        "attempts": 0
+        }
+
+
+def build_message(data: dict, connection=None) -> EmailMultiAlternatives:
+    message = EmailMultiAlternatives(
+        data["subject"], data["body"], to=data["to"], connection=connection
+        )
+    if data.get("html"):
+        message.attach_alternative(data["html"], "text/html")
+
+    return message
+
+
+class BatchResult(NamedTuple):
+    sent: int
+    failed: list[dict]
+    seconds: float
+
+    @property
+    def rate(self) -> float:
+        """  Messages per second  """
+
+        return self.sent / self.seconds if self.seconds else 0.0
+
+
+def send_batch(messages: list[dict], connection=None) -> BatchResult:
+    """
+    Sends the messages over one connection of the email backend.
+
+    The connection is opened here: send_messages() of the SMTP backend
+    closes the connections it opens itself. A failed message doesn't
+    stop the others, it's returned in "failed" with its attempts
+    counted. The connection is reopened after a failure, the server
+    may have closed it.
+    """
+
+    connection = connection or get_connection(fail_silently=False)
+    sent = 0
+    failed = []
+    start = time.perf_counter()
+
+    try:
+        for data in messages:
+            try:
+                # Already open unless the previous message failed
+                connection.open()
+                sent += connection.send_messages([
+                    build_message(data, connection)
+                    ])
+            except Exception:
+                logger.exception("Failed to send email to %s", data["to"])
+                failed.append({**data, "attempts": data["attempts"] + 1})
+                connection.close()
+    finally:
+        connection.close()
+
+    return BatchResult(sent, failed, time.perf_counter() - start)
+
+
+def render_user_email(
+        user,
+        token: str,
+        language: str,
+        subject_template_name: str,
+        email_template_name: str,
+        domain: str,
+        protocol: str = "https"
+        ) -> tuple[str, str]:
+    """  The subject and the body of an email with a link for the user  """
+
+    context = {
+        "user": user,
+        "email": user.email,
+        "domain": domain,
+        "site_name": domain,
+        "protocol": protocol,
+        "uid": urlsafe_base64_encode(force_bytes(user.pk)),
+        "token": token
+        }
+    with translation.override(language):
+        subject = loader.render_to_string(subject_template_name, context)
+        body = loader.render_to_string(email_template_name, context)
+
+    # The subject mustn't contain newlines
+    return "".join(subject.splitlines()), body
+
+
+def schedule_sending(countdown: float = BATCH_DELAY) -> None:
+    """  Schedules send_pending_emails unless it's scheduled already  """
+
+    from .tasks import send_pending_emails
+
+    if get_redis().set(SCHEDULED_KEY, 1, nx=True, ex=RETRY_DELAY * 5):
+        send_pending_emails.apply_async(countdown=countdown)
+
+
+def _queue(data: dict) -> None:
+    try:
+        get_redis().rpush(PENDING_KEY, json.dumps(data))
+        schedule_sending()
+    except redis.RedisError:
+        # Without the queue the message goes alone
+        from .tasks import send_email
+
+        logger.exception("Email queue unavailable")
+        send_email.delay(
+            data["subject"], data["body"], data["to"],
+            html_message=data["html"]
+            )
+
+
+def queue_email(
+        subject: str,
+        body: str,
+        to_email: list[str],
+        html_message: str | None = None
+        ) -> None:
+    """  Sends the email with the next batch after the commit  """
+
+    data = message_data(subject, body, to_email, html_message)
+    transaction.on_commit(lambda: _queue(data))
+
+
+def pop_pending(count: int = BATCH_SIZE) -> list[dict]:
+    return [
+        json.loads(item)
+        for item in get_redis().lpop(PENDING_KEY, count) or []
+        ]
+
+
+def retry_later(failed: list[dict]) -> None:
+    retries = []
+    for data in failed:
+        if data["attempts"] < MAX_ATTEMPTS:
+            retries.append(json.dumps(data))
+        else:
+            logger.error("Gave up sending email to %s", data["to"])
+
+    if retries:
+        get_redis().rpush(PENDING_KEY, *retries)
+        schedule_sending(countdown=RETRY_DELAY)
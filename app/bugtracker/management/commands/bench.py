@@ -0,0 +1,290 @@
+import json
+import math
+import os
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.throttling import UserRateThrottle
+
+from bugtracker.budgets import CacheOpsContext
+from bugtracker.models import Issue, Project
+
+
+# The results of a run on the reference machine, --update-baseline
+BASELINE = settings.BASE_DIR / "bench-baseline.json"
+
+
+def percentile(sorted_values: list[float], percent: float) -> float:
+    """  Nearest-rank percentile  """
+
+    index = math.ceil(percent / 100 * len(sorted_values)) - 1
+    return sorted_values[max(index, 0)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs the hot endpoints through the test client against the "
+        "current database (see seed_load) and reports the latency "
+        "percentiles, queries, cache operations and allocations "
+        "per request. Compares them with a baseline if given."
+        )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--username",
+            help="The user to benchmark with, by default the one "
+                 "with the most issues."
+            )
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--warmup", type=int, default=20)
+        parser.add_argument(
+            "--only", nargs="+", metavar="SCENARIO",
+            help="Run only these scenarios."
+            )
+        parser.add_argument("--output", help="Write the results as JSON.")
+        parser.add_argument(
+            "--baseline", default=BASELINE,
+            help="JSON of a previous run, by default the stored baseline."
+            )
+        parser.add_argument(
+            "--update-baseline", action="store_true",
+            help="Store the results as the baseline."
+            )
+        parser.add_argument(
+            "--max-regression", type=float, default=20.0,
+            help="Fail if p95 is this many percent slower than the baseline."
+            )
+
+    def handle(self, *args, **options):
+        self.user = self.get_user(options["username"])
+        self.project = (
+            Project.objects.filter(author_id=self.user.id).
+            annotate(issues_count=Count("issue")).
+            order_by("-issues_count").first()
+            )
+        self.issue = Issue.objects.filter(project_id=self.project.id).first()
+        if self.issue is None:
+            raise CommandError("The user has no issues, run seed_load first")
+
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.api_client = Client(
+            HTTP_AUTHORIZATION="Token " + Token.objects.get_or_create(
+                user=self.user
+                )[0].key
+            )
+
+        scenarios = self.scenarios()
+        for name in options["only"] or []:
+            if name not in scenarios:
+                raise CommandError(
+                    f"Unknown scenario {name}, choose from "
+                    f"{', '.join(scenarios)}"
+                    )
+        if options["only"]:
+            scenarios = {
+                name: scenarios[name] for name in options["only"]
+                }
+
+        results = {}
+        allowed_hosts = [*settings.ALLOWED_HOSTS, "testserver"]
+        with override_settings(ALLOWED_HOSTS=allowed_hosts):
+            for name, request in scenarios.items():
+                results[name] = self.run(
+                    request, options["requests"], options["warmup"]
+                    )
+                self.write_result(name, results[name])
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+
+        if options["update_baseline"]:
+            with open(BASELINE, "w") as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+            self.stdout.write(f"Stored the baseline in {BASELINE}")
+        elif os.path.exists(options["baseline"]):
+            with open(options["baseline"]) as f:
+                baseline = json.load(f)
+            self.compare(results, baseline, options["max_regression"])
+
+    def get_user(self, username) -> User:
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f"No user {username}")
+
+        user = (
+            User.objects.annotate(issues_count=Count("issue")).
+            order_by("-issues_count").first()
+            )
+        if user is None:
+            raise CommandError("No users, run seed_load first")
+
+        return user
+
+    def scenarios(self) -> dict:
+        """  Name -> function making one request  """
+
+        project_id = self.project.id
+        issue_id = self.issue.id
+        statuses = [status for status, _ in Issue.ISSUE_STATUS]
+        # The PUTs alternate between two states on every request
+        toggle = {"move": 0, "star": 0}
+
+        def move_issue():
+            toggle["move"] += 1
+            return self.client.put(
+                reverse("boards", args=[project_id]),
+                data=json.dumps({
+                    "issue_id": issue_id,
+                    "target": statuses[toggle["move"] % 2]
+                    }),
+                content_type="application/json"
+                )
+
+        def star_project():
+            toggle["star"] += 1
+            return self.client.put(
+                reverse("projects"),
+                data=json.dumps({
+                    "icon_id": f"star{project_id}",
+                    "icon_color": ("grey", "yellow")[toggle["star"] % 2]
+                    }),
+                content_type="application/json"
+                )
+
+        return {
+            "projects": lambda: self.client.get(reverse("projects")),
+            "projects_star": star_project,
+            "boards": lambda: self.client.get(
+                reverse("boards", args=[project_id])
+                ),
+            "boards_move": move_issue,
+            "issue_details": lambda: self.client.get(
+                reverse("issue-details", args=[project_id, issue_id])
+                ),
+            "search_results": lambda: self.client.get(
+                reverse("search-results", args=["error"])
+                ),
+            "api_projects": lambda: self.api_client.get(
+                reverse("project-list")
+                ),
+            "api_project": lambda: self.api_client.get(
+                reverse("project-detail", args=[project_id])
+                ),
+            "api_issues": lambda: self.api_client.get(reverse("issue-list")),
+            "api_issue": lambda: self.api_client.get(
+                reverse("issue-detail", args=[issue_id])
+                ),
+            }
+
+    def reset_throttle(self):
+        # The API throttle keeps the requests of the day in the cache,
+        # a run has more of them than its rate allows. The throttle
+        # still runs and its cache operations are counted
+        UserRateThrottle.cache.delete(
+            UserRateThrottle.cache_format % {
+                "scope": UserRateThrottle.scope, "ident": self.user.pk
+                }
+            )
+
+    def run(self, request, requests: int, warmup: int) -> dict:
+        for _ in range(warmup):
+            self.reset_throttle()
+            self.check_response(request())
+
+        timings = []
+        queries = []
+        cache_ops = []
+        for _ in range(requests):
+            self.reset_throttle()
+            with CaptureQueriesContext(connection) as captured, \
+                    CacheOpsContext() as cache_calls:
+                start = time.perf_counter()
+                response = request()
+                timings.append(time.perf_counter() - start)
+            self.check_response(response)
+            queries.append(len(captured))
+            cache_ops.append(len(cache_calls))
+
+        # A separate pass, tracemalloc slows everything down
+        allocations = []
+        tracemalloc.start()
+        try:
+            for _ in range(min(requests, 20)):
+                self.reset_throttle()
+                tracemalloc.reset_peak()
+                start_size, _ = tracemalloc.get_traced_memory()
+                request()
+                _, peak = tracemalloc.get_traced_memory()
+                allocations.append(peak - start_size)
+        finally:
+            tracemalloc.stop()
+
+        timings.sort()
+        return {
+            "requests": requests,
+            "p50_ms": percentile(timings, 50) * 1000,
+            "p95_ms": percentile(timings, 95) * 1000,
+            "p99_ms": percentile(timings, 99) * 1000,
+            "queries": max(queries),
+            "cache_ops": max(cache_ops),
+            "peak_kib": sorted(allocations)[len(allocations) // 2] / 1024,
+            }
+
+    @staticmethod
+    def check_response(response):
+        if response.status_code >= 400:
+            raise CommandError(
+                f"{response.request['PATH_INFO']} "
+                f"returned {response.status_code}"
+                )
+
+    def write_result(self, name, result):
+        self.stdout.write(
+            f"{name:<16}"
+            f"p50 {result['p50_ms']:>8.2f} ms  "
+            f"p95 {result['p95_ms']:>8.2f} ms  "
+            f"p99 {result['p99_ms']:>8.2f} ms  "
+            f"{result['queries']:>3} queries  "
+            f"{result['cache_ops']:>3} cache ops  "
+            f"{result['peak_kib']:>8.1f} KiB"
+            )
+
+    def compare(self, results, baseline, max_regression: float):
+        regressions = []
+
+        self.stdout.write("\nCompared with the baseline:")
+        for name, result in results.items():
+            if name not in baseline:
+                continue
+            base = baseline[name]
+            change = (result["p95_ms"] / base["p95_ms"] - 1) * 100
+            self.stdout.write(
+                f"{name:<16}p95 {change:>+7.1f}%  "
+                f"queries {base['queries']} -> {result['queries']}  "
+                f"cache ops {base['cache_ops']} -> {result['cache_ops']}"
+                )
+
+            if change > max_regression:
+                regressions.append(f"{name}: p95 {change:+.1f}%")
+            if result["queries"] > base["queries"]:
+                regressions.append(
+                    f"{name}: {result['queries']} queries, "
+                    f"was {base['queries']}"
+                    )
+
+        if regressions:
+            raise CommandError("Regressions:\n" + "\n".join(regressions))
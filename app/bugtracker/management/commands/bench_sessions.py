@@ -0,0 +1,89 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+
+ENGINES = ("app.sessions", "django.contrib.sessions.backends.cached_db")
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the session engines: logs in and opens the projects "
+        "page through the test client with every engine and reports "
+        "the logins and page views per second and their queries. "
+        "Needs a user with a known password, see seed_load."
+        )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", default="load0")
+        parser.add_argument("--password", default="Password123#")
+        parser.add_argument("--logins", type=int, default=50)
+        parser.add_argument(
+            "--views", type=int, default=10,
+            help="Page views after every login."
+            )
+        parser.add_argument("--engines", nargs="+", default=ENGINES)
+
+    def handle(self, *args, **options):
+        allowed_hosts = [*settings.ALLOWED_HOSTS, "testserver"]
+
+        for engine in options["engines"]:
+            with override_settings(
+                    SESSION_ENGINE=engine, ALLOWED_HOSTS=allowed_hosts):
+                result = self.run(options)
+
+            self.stdout.write(
+                f"{engine:<45}"
+                f"{result['logins_per_sec']:>8.1f} logins/sec "
+                f"{result['login_queries']:>3} queries  "
+                f"{result['views_per_sec']:>8.1f} views/sec "
+                f"{result['view_queries']:>3} queries"
+                )
+
+    def run(self, options) -> dict:
+        login_time = 0.0
+        view_time = 0.0
+        login_queries = 0
+        view_queries = 0
+        credentials = {
+            "username": options["username"],
+            "password": options["password"],
+            "remember": "on"
+            }
+
+        for _ in range(options["logins"]):
+            # A new browser, the session starts empty
+            client = Client()
+
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = client.post(reverse("login"), credentials)
+                login_time += time.perf_counter() - start
+            if response.status_code != 302:
+                raise CommandError(
+                    f"Can't log in as {options['username']}, "
+                    "check --username and --password"
+                    )
+            login_queries = max(login_queries, len(captured))
+
+            for _ in range(options["views"]):
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    client.get(reverse("projects"))
+                    view_time += time.perf_counter() - start
+                view_queries = max(view_queries, len(captured))
+
+            client.get(reverse("logout"))
+
+        views = options["logins"] * options["views"]
+        return {
+            "logins_per_sec": options["logins"] / login_time,
+            "login_queries": login_queries,
+            "views_per_sec": views / view_time if view_time else 0.0,
+            "view_queries": view_queries,
+            }
@@ -0,0 +1,107 @@
+import pickle
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from bugtracker.models import Issue
+from bugtracker.snapshots import BOARD_ISSUES
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the size and the decode time of a pickled board "
+        "queryset with the compact board snapshot. Doesn't need a database."
+        )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--description-length", type=int, default=300)
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rows = self.make_rows(
+            options["rows"], options["description_length"], options["seed"]
+            )
+
+        # The old path: a pickled QuerySet of deferred model instances,
+        # that's what cache.get_or_set(key, queryset) used to store.
+        queryset = Issue.objects.filter(project_id=1, author_id=1).only(
+            *BOARD_ISSUES.fields
+            )
+        queryset._result_cache = [
+            Issue.from_db("default", BOARD_ISSUES.fields, row) for row in rows
+            ]
+        queryset._prefetch_done = True
+        pickled = pickle.dumps(queryset, pickle.HIGHEST_PROTOCOL)
+
+        snapshot = BOARD_ISSUES.encode(rows)
+
+        results = {
+            "pickled queryset": (
+                len(pickled),
+                self.timeit(lambda: list(pickle.loads(pickled)),
+                            options["repeat"])
+                ),
+            "snapshot": (
+                len(snapshot),
+                self.timeit(lambda: BOARD_ISSUES.decode(snapshot),
+                            options["repeat"])
+                ),
+            }
+
+        self.stdout.write(f"{len(rows)} issues, {options['repeat']} runs")
+        self.stdout.write(f"{'':<18}{'bytes':>12}{'decode, ms':>14}")
+        for name, (size, seconds) in results.items():
+            self.stdout.write(f"{name:<18}{size:>12}{seconds * 1000:>14.3f}")
+
+        old_size, old_time = results["pickled queryset"]
+        new_size, new_time = results["snapshot"]
+        self.stdout.write(
+            f"size x{old_size / new_size:.1f} smaller, "
+            f"decode x{old_time / new_time:.1f} faster"
+            )
+
+    @staticmethod
+    def timeit(func, repeat: int) -> float:
+        """  Returns the median time of a single call in seconds  """
+
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+
+        return timings[len(timings) // 2]
+
+    @staticmethod
+    def make_rows(count: int, description_length: int, seed: int) -> list:
+        rnd = random.Random(seed)
+        words = ["socks", "login", "page", "error", "button", "fails", "slow",
+                 "user", "report", "export", "cache", "board", "token"]
+        now = timezone.now()
+        rows = []
+
+        for i in range(1, count + 1):
+            description = " ".join(
+                rnd.choice(words)
+                for _ in range(description_length // 6)
+                )[:description_length]
+            created = now - timedelta(minutes=rnd.randint(0, 10**6))
+            rows.append((
+                i,
+                i,
+                f"Issue {i} {rnd.choice(words)}",
+                description,
+                rnd.choice(Issue.ISSUE_TYPE)[0],
+                rnd.choice(Issue.ISSUE_PRIORITY)[0],
+                rnd.choice(Issue.ISSUE_STATUS)[0],
+                created,
+                created + timedelta(minutes=rnd.randint(0, 10**4)),
+                ))
+
+        return rows
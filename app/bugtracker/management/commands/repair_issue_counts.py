@@ -0,0 +1,52 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Max, Min
+
+from bugtracker.models import Project
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the issue counters of the projects (todo_count, "
+        "in_progress_count, done_count) from their issues. The projects "
+        "are split into chunks of ids, every chunk is one UPDATE "
+        "and the chunks run in parallel, each on its own connection."
+        )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--workers", type=int, default=4)
+
+    def handle(self, *args, **options):
+        bounds = Project.all_objects.aggregate(low=Min("id"), high=Max("id"))
+        if bounds["low"] is None:
+            self.stdout.write("No projects")
+            return
+
+        size = options["chunk_size"]
+        chunks = [
+            (low, low + size)
+            for low in range(bounds["low"], bounds["high"] + 1, size)
+            ]
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            projects = sum(executor.map(self.repair, chunks))
+
+        self.stdout.write(
+            f"Recounted the issues of {projects} projects in {len(chunks)} "
+            f"chunks, {time.perf_counter() - start:.1f} s"
+            )
+
+    def repair(self, chunk: tuple[int, int]) -> int:
+        low, high = chunk
+        try:
+            return Project.all_objects.filter(
+                id__gte=low, id__lt=high
+                ).recount_issues()
+        finally:
+            # The connection of this thread
+            connection.close()
@@ -0,0 +1,247 @@
+import random
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework.authtoken.models import Token
+
+from bugtracker.models import RANK_STEP, Issue, Project
+
+
+WORDS_EN = (
+    "board issue fix crash login page button slow query cache deploy "
+    "server error timeout user project search form modal token email "
+    "release test migration index column status drag drop render"
+    ).split()
+
+WORDS_RU = (
+    "доска задача ошибка падение вход страница кнопка медленный запрос "
+    "кэш сервер таймаут пользователь проект поиск форма токен письмо "
+    "релиз тест миграция индекс колонка статус перетаскивание"
+    ).split()
+
+ISSUE_STATUSES = (
+    ("To do", 4),
+    ("In progress", 2),
+    ("Done", 4),
+    )
+
+# Descriptions are picked from a pool, generating text for every
+# issue would take longer than inserting it
+DESCRIPTIONS_POOL = 1000
+
+
+def chunks(iterable, size: int):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def zipf_sizes(total: int, count: int, s: float, rng) -> list[int]:
+    """
+    Splits "total" into "count" sizes, the k-th largest is
+    proportional to 1 / k**s. The order of the sizes is shuffled.
+    """
+
+    weights = [1 / (k ** s) for k in range(1, count + 1)]
+    weight_sum = sum(weights)
+    sizes = [int(total * weight / weight_sum) for weight in weights]
+
+    # The rounding remainder goes to the largest ones
+    for i in range(total - sum(sizes)):
+        sizes[i % count] += 1
+
+    rng.shuffle(sizes)
+    return sizes
+
+
+@contextmanager
+def explicit_timestamps(model):
+    """  Lets bulk_create() keep the given auto_now/auto_now_add values  """
+
+    fields = [
+        (field, field.auto_now, field.auto_now_add)
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False)
+        or getattr(field, "auto_now_add", False)
+        ]
+    for field, _, _ in fields:
+        field.auto_now = field.auto_now_add = False
+
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in fields:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        "Fills the database with a deterministic load-testing dataset: "
+        "users with tokens, projects with Zipf-distributed sizes and "
+        "issues with English and Russian text."
+        )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--projects", type=int, default=1000)
+        parser.add_argument("--issues", type=int, default=100_000)
+        parser.add_argument(
+            "--zipf", type=float, default=1.1,
+            help="Exponent of the project sizes distribution."
+            )
+        parser.add_argument("--description-length", type=int, default=400)
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--prefix", default="load",
+            help="Prefix of the usernames, project names and keys."
+            )
+        parser.add_argument("--password", default="Password123#")
+
+    def handle(self, *args, **options):
+        if options["users"] < 1 or options["projects"] < 1:
+            raise CommandError("Need at least one user and one project")
+        # Keys are "{prefix}{number}", at most 10 characters
+        if len(options["prefix"][:4]) + len(str(options["projects"])) > 10:
+            raise CommandError("Too many projects for a project key")
+        if User.objects.filter(
+                username__startswith=options["prefix"]).exists():
+            raise CommandError(
+                f"Users with the prefix \"{options['prefix']}\" exist, "
+                "use another --prefix"
+                )
+
+        self.rng = random.Random(options["seed"])
+        self.chunk_size = options["chunk_size"]
+        self.start = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+        users = self.timed("users", self.create_users, options)
+        self.timed("tokens", self.create_tokens, users)
+        projects = self.timed(
+            "projects", self.create_projects, users, options
+            )
+        self.timed("issues", self.create_issues, projects, options)
+
+    def timed(self, name, func, *args):
+        started = time.perf_counter()
+        result = func(*args)
+        seconds = time.perf_counter() - started
+
+        self.stdout.write(
+            f"{name:<10}{self.created:>12} rows{seconds:>10.1f} s"
+            )
+        return result
+
+    def bulk_create(self, manager, objs, keep: bool = True) -> list:
+        """
+        Inserts the objects chunk by chunk. Returns the created ones
+        unless "keep" is False, then every chunk is dropped after
+        its insert, millions of issues don't fit in the memory.
+        """
+
+        created = []
+        self.created = 0
+        with explicit_timestamps(manager.model):
+            for chunk in chunks(objs, self.chunk_size):
+                chunk = manager.bulk_create(chunk)
+                self.created += len(chunk)
+                if keep:
+                    created += chunk
+
+        return created
+
+    def create_users(self, options) -> list[User]:
+        # Hashing is slow on purpose, all the users share one hash
+        password = make_password(options["password"])
+        prefix = options["prefix"]
+
+        return self.bulk_create(User.objects, (
+            User(username=f"{prefix}{i}", email=f"{prefix}{i}@example.com",
+                 first_name="Load", last_name=f"User{i}", password=password,
+                 date_joined=self.start)
+            for i in range(options["users"])
+            ))
+
+    def create_tokens(self, users) -> list[Token]:
+        # bulk_create() doesn't send post_save, so the users got no tokens
+        return self.bulk_create(Token.objects, (
+            Token(key=f"{self.rng.getrandbits(160):040x}", user_id=user.id,
+                  created=self.start)
+            for user in users
+            ))
+
+    def create_projects(self, users, options) -> list[Project]:
+        sizes = zipf_sizes(
+            options["issues"], options["projects"], options["zipf"], self.rng
+            )
+        prefix = options["prefix"]
+        types = [project_type for project_type, _ in Project.PROJECT_TYPE]
+
+        projects = []
+        for i, size in enumerate(sizes):
+            projects.append(Project(
+                name=f"{prefix.capitalize()} project {i}",
+                key=f"{prefix[:4]}{i}".upper(),
+                description=self.text(WORDS_EN, 8),
+                type=self.rng.choice(types),
+                author_id=self.rng.choice(users).id,
+                starred=self.rng.random() < 0.1,
+                created=self.start + timedelta(
+                    minutes=self.rng.randrange(60 * 24 * 365)
+                    ),
+                # The issues get the keys 1..size
+                last_issue_key=size
+                ))
+
+        return self.bulk_create(Project.objects, projects)
+
+    def create_issues(self, projects, options) -> None:
+        length = options["description_length"]
+        descriptions = [
+            self.text(WORDS_RU if i % 3 == 0 else WORDS_EN, length // 7)
+            for i in range(DESCRIPTIONS_POOL)
+            ]
+        statuses, status_weights = zip(*ISSUE_STATUSES)
+        types = [issue_type for issue_type, _ in Issue.ISSUE_TYPE]
+        priorities = [priority for priority, _ in Issue.ISSUE_PRIORITY]
+        rng = self.rng
+
+        def issues():
+            for project in projects:
+                # Every column is ordered like after rebalance_ranks()
+                positions = Counter()
+                for key in range(1, project.last_issue_key + 1):
+                    created = project.created + timedelta(
+                        minutes=rng.randrange(60 * 24 * 180)
+                        )
+                    words = WORDS_RU if key % 3 == 0 else WORDS_EN
+                    issue = Issue(
+                        project_id=project.id,
+                        key=key,
+                        # Titles are unique
+                        title=f"{project.key}-{key} {self.text(words, 4)}",
+                        description=rng.choice(descriptions),
+                        type=rng.choice(types),
+                        priority=rng.choice(priorities),
+                        status=rng.choices(statuses, status_weights)[0],
+                        author_id=project.author_id,
+                        created=created,
+                        updated=created + timedelta(
+                            minutes=rng.randrange(60 * 24 * 30)
+                            )
+                        )
+                    positions[issue.status] += 1
+                    issue.rank = positions[issue.status] * RANK_STEP
+                    yield issue
+
+        self.bulk_create(Issue.objects, issues(), keep=False)
+
+    def text(self, words, count: int) -> str:
+        return " ".join(self.rng.choices(words, k=count)).capitalize()
@@ -0,0 +1,72 @@
+# Generated by Django 5.1.1 on 2026-10-18 00:40
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def renumber_duplicate_keys(apps, schema_editor):
+    """
+    Issues created through the API all got key=1. Keep the oldest issue
+    with a key, move the rest after the last key of the project
+    and remember the last key in the project.
+    """
+
+    Project = apps.get_model("bugtracker", "Project")
+    Issue = apps.get_model("bugtracker", "Issue")
+
+    last_keys = dict(
+        Issue.objects.values("project_id").
+        annotate(last_key=Max("key")).
+        values_list("project_id", "last_key")
+        )
+    seen = set()
+    changed = []
+
+    issues = (
+        Issue.objects.order_by("project_id", "key", "id").
+        only("id", "project_id", "key")
+        )
+    for issue in issues.iterator(chunk_size=2000):
+        if (issue.project_id, issue.key) in seen:
+            last_keys[issue.project_id] += 1
+            issue.key = last_keys[issue.project_id]
+            changed.append(issue)
+        seen.add((issue.project_id, issue.key))
+
+    Issue.objects.bulk_update(changed, ["key"], batch_size=2000)
+
+    Project.objects.bulk_update(
+        [Project(id=project_id, last_issue_key=last_key)
+         for project_id, last_key in last_keys.items()],
+        ["last_issue_key"],
+        batch_size=2000
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bugtracker', '0020_issue_project_idx_project_author_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='last_issue_key',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(
+            renumber_duplicate_keys, migrations.RunPython.noop
+            ),
+        migrations.AlterField(
+            model_name='issue',
+            name='key',
+            field=models.PositiveIntegerField(editable=False),
+        ),
+        migrations.AddConstraint(
+            model_name='issue',
+            constraint=models.UniqueConstraint(fields=('project', 'key'), name='unique_project_issue_key'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.1 on 2026-10-18 00:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bugtracker', '0022_stored_search_vectors'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project', 'status', '-updated', '-id'], name='issue_board_column_idx'),
+        ),
+    ]
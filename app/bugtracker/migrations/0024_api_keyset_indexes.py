@@ -0,0 +1,23 @@
+# Generated by Django 5.1.1 on 2026-10-18 00:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bugtracker', '0023_issue_board_column_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['author', 'project', 'id'], name='issue_author_project_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['author', '-starred', '-created', 'id'], name='project_author_order_idx'),
+        ),
+    ]
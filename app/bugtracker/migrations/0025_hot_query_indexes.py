@@ -0,0 +1,35 @@
+# Generated by Django 5.1.1 on 2026-10-18 00:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bugtracker', '0024_api_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='issue',
+            name='issue_board_column_idx',
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project', 'author', 'status', '-updated', '-id'], name='issue_board_column_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project', '-updated'], name='issue_project_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['author', '-starred', 'created'], name='project_author_starred_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['author', '-created'], name='project_author_created_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.1 on 2026-10-18 00:59
+
+import bugtracker.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bugtracker', '0025_hot_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='issue',
+            name='issue_board_column_idx',
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='rank',
+            field=models.FloatField(default=bugtracker.models.top_rank),
+        ),
+        # Keep the current order of the columns: recently updated first
+        migrations.RunSQL(
+            'UPDATE bugtracker_issue '
+            'SET rank = -EXTRACT(EPOCH FROM updated)',
+            migrations.RunSQL.noop
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project', 'author', 'status', 'rank', 'id'], name='issue_board_column_idx'),
+        ),
+    ]
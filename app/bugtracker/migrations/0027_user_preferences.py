@@ -0,0 +1,24 @@
+# Generated by Django 5.1.1 on 2026-10-18 01:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('bugtracker', '0026_issue_rank'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserPreferences',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='preferences', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('timezone', models.CharField(blank=True, default='', max_length=64)),
+                ('language', models.CharField(blank=True, choices=[('en', 'English'), ('ru', 'Russian')], default='', max_length=8)),
+            ],
+        ),
+    ]
@@ -0,0 +1,54 @@
+from django.db import migrations
+
+
+# Django emulates CASCADE by loading the rows, the database foreign keys
+# are created without ON DELETE. These make Postgres delete the issues
+# of a deleted project or user, see ProjectQuerySet.delete_cascading().
+# Django recreates a foreign key without ON DELETE if its field changes,
+# such a migration has to run these statements again.
+
+FOREIGN_KEYS = [
+    ("bugtracker_issue", "project_id", "bugtracker_project"),
+    ("bugtracker_issue", "author_id", "auth_user"),
+    ("bugtracker_project", "author_id", "auth_user"),
+    ("bugtracker_userpreferences", "user_id", "auth_user"),
+]
+
+
+def on_delete_sql(table: str, column: str, target: str, action: str) -> str:
+    return f"""
+        DO $$
+        DECLARE fk_name text;
+        BEGIN
+            SELECT con.conname INTO fk_name
+            FROM pg_constraint con
+            JOIN pg_attribute att
+                ON att.attrelid = con.conrelid
+                AND att.attnum = ANY(con.conkey)
+            WHERE con.conrelid = '{table}'::regclass
+                AND con.contype = 'f' AND att.attname = '{column}';
+
+            EXECUTE format(
+                'ALTER TABLE {table} DROP CONSTRAINT %I, '
+                'ADD CONSTRAINT %I FOREIGN KEY ({column}) '
+                'REFERENCES {target} (id) ON DELETE {action} '
+                'DEFERRABLE INITIALLY DEFERRED',
+                fk_name, fk_name
+            );
+        END $$;
+        """
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bugtracker', '0027_user_preferences'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            on_delete_sql(table, column, target, 'CASCADE'),
+            on_delete_sql(table, column, target, 'NO ACTION')
+        )
+        for table, column, target in FOREIGN_KEYS
+    ]
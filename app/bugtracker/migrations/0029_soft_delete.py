@@ -0,0 +1,142 @@
+# Generated by Django 5.1.1 on 2026-10-18 01:15
+
+import django.contrib.postgres.indexes
+import django.core.validators
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bugtracker', '0028_database_cascades'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='issue',
+            name='issue_search_en_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='issue',
+            name='issue_search_ru_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='issue',
+            name='issue_author_project_id_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='issue',
+            name='issue_project_updated_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='issue',
+            name='issue_board_column_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='project',
+            name='project_search_en_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='project',
+            name='project_search_ru_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='project',
+            name='project_author_order_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='project',
+            name='project_author_starred_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='project',
+            name='project_author_created_idx',
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='issue',
+            name='title',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='project',
+            name='key',
+            field=models.CharField(max_length=10, validators=[django.core.validators.MinLengthValidator(3, 'Key field must contain at least 3 letters')]),
+        ),
+        migrations.AlterField(
+            model_name='project',
+            name='name',
+            field=models.CharField(max_length=255, validators=[django.core.validators.MinLengthValidator(3, 'Name field must contain at least 3 letters')]),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['author', 'project', 'id'], name='issue_author_project_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['project', 'author', 'status', 'rank', 'id'], name='issue_board_column_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['project', '-updated'], name='issue_project_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=django.contrib.postgres.indexes.GinIndex(condition=models.Q(('deleted_at__isnull', True)), fields=['search_en'], name='issue_search_en_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=django.contrib.postgres.indexes.GinIndex(condition=models.Q(('deleted_at__isnull', True)), fields=['search_ru'], name='issue_search_ru_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True), _negated=True), fields=['deleted_at'], name='issue_deleted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['author', '-starred', 'created'], name='project_author_starred_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['author', '-created'], name='project_author_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['author', '-starred', '-created', 'id'], name='project_author_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=django.contrib.postgres.indexes.GinIndex(condition=models.Q(('deleted_at__isnull', True)), fields=['search_en'], name='project_search_en_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=django.contrib.postgres.indexes.GinIndex(condition=models.Q(('deleted_at__isnull', True)), fields=['search_ru'], name='project_search_ru_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True), _negated=True), fields=['deleted_at'], name='project_deleted_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='issue',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted_at__isnull', True)), fields=('title',), name='unique_issue_title', violation_error_message='Issue with that title already exists'),
+        ),
+        migrations.AddConstraint(
+            model_name='project',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted_at__isnull', True)), fields=('name',), name='unique_project_name', violation_error_message='That project already exists'),
+        ),
+        migrations.AddConstraint(
+            model_name='project',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted_at__isnull', True)), fields=('key',), name='unique_project_key', violation_error_message='Project with that key already exists'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.1 on 2026-10-18 01:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bugtracker', '0029_soft_delete'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='done_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='in_progress_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='todo_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        # The issues that exist so far, then they're counted by the writes
+        migrations.RunSQL(
+            'UPDATE bugtracker_project SET '
+            'todo_count = counts.todo, '
+            'in_progress_count = counts.in_progress, '
+            'done_count = counts.done '
+            'FROM (SELECT project_id, '
+            "COUNT(*) FILTER (WHERE status = 'To do') AS todo, "
+            "COUNT(*) FILTER (WHERE status = 'In progress') AS in_progress, "
+            "COUNT(*) FILTER (WHERE status = 'Done') AS done "
+            'FROM bugtracker_issue WHERE deleted_at IS NULL '
+            'GROUP BY project_id) AS counts '
+            'WHERE bugtracker_project.id = counts.project_id',
+            migrations.RunSQL.noop
+        ),
+    ]
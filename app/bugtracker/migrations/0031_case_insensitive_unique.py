@@ -0,0 +1,55 @@
+# Generated by Django 5.1.1 on 2026-10-18 01:24
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+# The unique constraints ignore the case. auth.User isn't ours, its
+# usernames and emails get the unique indexes here, blank emails (users
+# created without one) aren't unique. A database with names that differ
+# only in case has to rename them before this migration.
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bugtracker', '0030_project_issue_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='issue',
+            name='unique_issue_title',
+        ),
+        migrations.RemoveConstraint(
+            model_name='project',
+            name='unique_project_name',
+        ),
+        migrations.RemoveConstraint(
+            model_name='project',
+            name='unique_project_key',
+        ),
+        migrations.AddConstraint(
+            model_name='issue',
+            constraint=models.UniqueConstraint(models.F('project'), django.db.models.functions.text.Lower('title'), condition=models.Q(('deleted_at__isnull', True)), name='unique_issue_title', violation_error_message='Issue with that title already exists'),
+        ),
+        migrations.AddConstraint(
+            model_name='project',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), condition=models.Q(('deleted_at__isnull', True)), name='unique_project_name', violation_error_message='That project already exists'),
+        ),
+        migrations.AddConstraint(
+            model_name='project',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('key'), condition=models.Q(('deleted_at__isnull', True)), name='unique_project_key', violation_error_message='Project with that key already exists'),
+        ),
+        migrations.RunSQL(
+            'CREATE UNIQUE INDEX user_username_ci_uniq '
+            'ON auth_user (LOWER(username))',
+            'DROP INDEX user_username_ci_uniq'
+        ),
+        migrations.RunSQL(
+            'CREATE UNIQUE INDEX user_email_ci_uniq '
+            "ON auth_user (LOWER(email)) WHERE email <> ''",
+            'DROP INDEX user_email_ci_uniq'
+        ),
+    ]
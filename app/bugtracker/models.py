@@ -1,14 +1,278 @@
-from django.db import models
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connections, models, transaction
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.core.validators import MinLengthValidator
+from django.db.models.functions import Coalesce, Greatest, Lower
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from .events import publish_issue_event
+from .generations import invalidate
+
 
 # Make email field in User modal unique (for UserForm)
 User._meta.get_field("email")._unique = True
 
 
+# Text search configuration for each of the settings.LANGUAGES,
+# every language has its own stored vector: "search_en", "search_ru".
+SEARCH_CONFIGS = {
+    "en": "english",
+    "ru": "russian",
+}
+
+
+# Issues of a board column are ordered by rank. A moved card gets a rank
+# between its new neighbours, so a move updates one row. When the
+# fractions run out the column is renumbered with RANK_STEP gaps.
+RANK_STEP = 1024.0
+
+
+def top_rank() -> float:
+    """  New issues go to the top of their column  """
+
+    return -time.time()
+
+
+# Deleted projects and issues stay in the table with "deleted_at" until
+# the purge_deleted task, see bugtracker/deletion.py. "objects" doesn't
+# see them and the indexes of the hot queries are partial, without them.
+ALIVE = models.Q(deleted_at__isnull=True)
+
+
+# Issues of every status of a project, kept on the project so that the
+# projects page and the board don't count the issues. The writes of the
+# issues move them with F() in the same transaction, see count_issues().
+# "manage.py repair_issue_counts" recomputes them.
+ISSUE_COUNTERS = {
+    "To do": "todo_count",
+    "In progress": "in_progress_count",
+    "Done": "done_count",
+}
+# Issue fields that move an issue between the counters
+COUNTED_FIELDS = ("project_id", "status", "deleted_at")
+
+
+def counted_issues(rows) -> Counter:
+    """
+    (project_id, status, deleted_at) rows of issues ->
+    {(project_id, status): number of the issues that aren't deleted}
+    """
+
+    return Counter(
+        (project_id, status)
+        for project_id, status, deleted_at in rows if deleted_at is None
+        )
+
+
+def is_written(name: str, fields) -> bool:
+    """  "project_id" is written by update_fields=["project"], None is all  """
+
+    return fields is None or name in fields or (
+        name.removesuffix("_id") in fields
+        )
+
+
+def counted_fields(fields) -> bool:
+    """  Writes of the fields can move issues between the counters  """
+
+    return any(is_written(name, fields) for name in COUNTED_FIELDS)
+
+
+class AliveManager(models.Manager):
+    """  The default manager, hides the deleted rows  """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(ALIVE)
+
+
+def search_vector_field(*fields: str, config: str) -> models.GeneratedField:
+    """  tsvector column that Postgres keeps up to date on every write  """
+
+    return models.GeneratedField(
+        expression=SearchVector(*fields, config=config),
+        output_field=SearchVectorField(),
+        db_persist=True
+        )
+
+
+class ProjectQuerySet(models.QuerySet):
+    """  Bulk operations don't send signals, so they invalidate the cache  """
+
+    def update(self, **kwargs):
+        scopes = list(
+            self.order_by().values_list("id", "author_id").distinct()
+            )
+        rows = super().update(**kwargs)
+
+        invalidate(
+            users=[author_id for _, author_id in scopes],
+            projects=[project_id for project_id, _ in scopes]
+            )
+        return rows
+
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        invalidate(users={obj.author_id for obj in objs})
+        return objs
+
+    bulk_create.alters_data = True
+
+    def bulk_update(self, objs, *args, **kwargs):
+        objs = list(objs)
+        rows = super().bulk_update(objs, *args, **kwargs)
+        invalidate(
+            users={obj.author_id for obj in objs},
+            projects={obj.id for obj in objs}
+            )
+        return rows
+
+    bulk_update.alters_data = True
+
+    def delete_cascading(self) -> int:
+        """
+        Deletes the projects with one DELETE, Postgres deletes their
+        issues by ON DELETE CASCADE (migration 0028). Nothing is loaded
+        and no signals are sent, the cache is invalidated once
+        per author and project. Returns the number of projects.
+        """
+
+        scopes = list(self.order_by().values_list("id", "author_id"))
+        if not scopes:
+            return 0
+
+        table = self.model._meta.db_table
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM "{table}" WHERE "id" = ANY(%s)',
+                [[project_id for project_id, _ in scopes]]
+                )
+            rows = cursor.rowcount
+
+        invalidate(
+            users={author_id for _, author_id in scopes},
+            projects={project_id for project_id, _ in scopes}
+            )
+        return rows
+
+    delete_cascading.alters_data = True
+
+    def count_issues(self, changes: Counter) -> None:
+        """
+        Adds the {(project_id, status): delta} changes to the issue
+        counters, one UPDATE with F() per project. Doesn't invalidate
+        the cache, the writes of the issues do.
+        """
+
+        deltas = defaultdict(Counter)
+        for (project_id, status), delta in changes.items():
+            if delta and status in ISSUE_COUNTERS:
+                deltas[project_id][ISSUE_COUNTERS[status]] += delta
+
+        # In the order of the ids, concurrent transactions lock the
+        # projects in the same order
+        for project_id in sorted(deltas):
+            values = {
+                # A drift can't make it negative, see repair_issue_counts
+                field: Greatest(models.F(field) + delta, 0)
+                for field, delta in deltas[project_id].items() if delta
+                }
+            if values:
+                # The plain manager: no invalidation, deleted projects too
+                self.model._base_manager.db_manager(self.db).filter(
+                    id=project_id
+                    ).update(**values)
+
+    count_issues.alters_data = True
+
+    def recount_issues(self) -> int:
+        """
+        Recomputes the issue counters of the projects from their issues,
+        see repair_issue_counts. Returns the number of projects.
+        """
+
+        counts = {
+            field: Coalesce(
+                models.Subquery(
+                    Issue.objects.
+                    filter(project_id=models.OuterRef("id"), status=status).
+                    order_by().values("project_id").
+                    annotate(count=models.Count("id")).values("count")
+                    ),
+                0
+                )
+            for status, field in ISSUE_COUNTERS.items()
+            }
+        return self.update(**counts)
+
+    recount_issues.alters_data = True
+
+    def soft_delete(self) -> int:
+        """
+        Marks the projects deleted with one UPDATE, their issues are
+        hidden with them, see IssueQuerySet.of_live_projects().
+        Returns the number of projects.
+        """
+
+        scopes = list(
+            self.filter(ALIVE).order_by().values_list("id", "author_id")
+            )
+        if not scopes:
+            return 0
+
+        table = self.model._meta.db_table
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f'UPDATE "{table}" SET "deleted_at" = %s '
+                'WHERE "id" = ANY(%s) AND "deleted_at" IS NULL',
+                [timezone.now(), [project_id for project_id, _ in scopes]]
+                )
+            rows = cursor.rowcount
+
+        invalidate(
+            users={author_id for _, author_id in scopes},
+            projects={project_id for project_id, _ in scopes}
+            )
+        return rows
+
+    soft_delete.alters_data = True
+
+    def allocate_issue_keys(self, project_id: int, count: int = 1) -> int:
+        """
+        Reserves "count" consecutive issue keys of the project
+        and returns the first one.
+
+        It's a single UPDATE ... RETURNING: the row of the project
+        stays locked until the end of the transaction, so concurrent
+        inserts into the same project can't get the same key.
+        """
+
+        table = self.model._meta.db_table
+
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f'UPDATE "{table}" '
+                'SET "last_issue_key" = "last_issue_key" + %s '
+                'WHERE "id" = %s RETURNING "last_issue_key"',
+                [count, project_id]
+                )
+            row = cursor.fetchone()
+
+        if row is None:
+            raise self.model.DoesNotExist(f"Project {project_id} not found")
+
+        return row[0] - count + 1
+
+    allocate_issue_keys.alters_data = True
+
+
 class Project(models.Model):
 
     PROJECT_TYPE = [
@@ -18,14 +282,14 @@ class Project(models.Model):
     ]
 
     name = models.CharField(
-        max_length=255, unique=True,
+        max_length=255,
         validators=[MinLengthValidator(
             3, _("Name field must contain at least 3 letters")
             )]
         )
     description = models.CharField(max_length=255, default="")
     key = models.CharField(
-        max_length=10, unique=True,
+        max_length=10,
         validators=[MinLengthValidator(
             3, _("Key field must contain at least 3 letters")
             )]
@@ -37,13 +301,310 @@ class Project(models.Model):
         default=False
         )
     created = models.DateTimeField(default=timezone.now)
+    # The key of the last created issue, see allocate_issue_keys()
+    last_issue_key = models.PositiveIntegerField(default=0, editable=False)
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # See ISSUE_COUNTERS
+    todo_count = models.PositiveIntegerField(default=0, editable=False)
+    in_progress_count = models.PositiveIntegerField(default=0, editable=False)
+    done_count = models.PositiveIntegerField(default=0, editable=False)
+
+    search_en = search_vector_field(
+        "name", "key", "type", config=SEARCH_CONFIGS["en"]
+        )
+    search_ru = search_vector_field(
+        "name", "key", "type", config=SEARCH_CONFIGS["ru"]
+        )
+
+    objects = AliveManager.from_queryset(ProjectQuerySet)()
+    all_objects = ProjectQuerySet.as_manager()
 
     def __str__(self):
         return self.name
 
+    def issue_counts(self) -> dict[str, int]:
+        """  {"To do": 3, "In progress": 1, "Done": 5}, see ISSUE_COUNTERS  """
+
+        return {
+            status: getattr(self, field)
+            for status, field in ISSUE_COUNTERS.items()
+            }
+
     class Meta:
         ordering = ["-starred", "created"]
-        indexes = [models.Index(fields=["author"], name="author_idx")]
+        indexes = [
+            models.Index(fields=["author"], name="author_idx"),
+            # The projects page and its Last-Modified
+            models.Index(
+                fields=["author", "-starred", "created"],
+                name="project_author_starred_idx", condition=ALIVE
+                ),
+            models.Index(
+                fields=["author", "-created"],
+                name="project_author_created_idx", condition=ALIVE
+                ),
+            # Keyset pagination of the API, see api.pagination
+            models.Index(
+                fields=["author", "-starred", "-created", "id"],
+                name="project_author_order_idx", condition=ALIVE
+                ),
+            GinIndex(
+                fields=["search_en"], name="project_search_en_idx",
+                condition=ALIVE
+                ),
+            GinIndex(
+                fields=["search_ru"], name="project_search_ru_idx",
+                condition=ALIVE
+                ),
+            # The purge_deleted task
+            models.Index(
+                fields=["deleted_at"], name="project_deleted_idx",
+                condition=~ALIVE
+                ),
+            ]
+        constraints = [
+            # A deleted project doesn't hold its name and key. The forms
+            # don't check them, they turn the IntegrityError into the
+            # field error (see ConstraintErrorsMixin)
+            models.UniqueConstraint(
+                Lower("name"), condition=ALIVE,
+                name="unique_project_name",
+                violation_error_message=_("That project already exists")
+                ),
+            models.UniqueConstraint(
+                Lower("key"), condition=ALIVE,
+                name="unique_project_key",
+                violation_error_message=_(
+                    "Project with that key already exists"
+                    )
+                ),
+            ]
+
+
+class IssueQuerySet(models.QuerySet):
+    """  Bulk operations don't send signals, so they invalidate the cache  """
+
+    def update(self, **kwargs):
+        # The new values can be expressions,
+        # so the counters are moved by the rows as they're written
+        counted = counted_fields(kwargs)
+
+        with transaction.atomic(using=self.db, savepoint=False):
+            if counted:
+                old = list(
+                    self.order_by().select_for_update().
+                    values_list("id", *COUNTED_FIELDS)
+                    )
+            scopes = list(
+                self.order_by().
+                values_list("project_id", "author_id").distinct()
+                )
+            rows = super().update(**kwargs)
+
+            if counted and old:
+                new = self.model._base_manager.using(self.db).filter(
+                    id__in=[row[0] for row in old]
+                    ).values_list(*COUNTED_FIELDS)
+                changes = counted_issues(new)
+                changes.subtract(counted_issues(row[1:] for row in old))
+                Project.objects.db_manager(self.db).count_issues(changes)
+
+        users = {author_id for _, author_id in scopes}
+        projects = {project_id for project_id, _ in scopes}
+
+        # Issues can be moved to another project/author
+        for field, changed in (("project", projects), ("author", users)):
+            for name in (field, f"{field}_id"):
+                value = getattr(kwargs.get(name), "pk", kwargs.get(name))
+                if isinstance(value, int):
+                    changed.add(value)
+
+        invalidate(users=users, projects=projects)
+        return rows
+
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+
+        with transaction.atomic(using=self.db, savepoint=False):
+            self.allocate_keys(objs)
+            objs = super().bulk_create(objs, *args, **kwargs)
+            Project.objects.db_manager(self.db).count_issues(counted_issues(
+                (obj.project_id, obj.status, obj.deleted_at) for obj in objs
+                ))
+
+        invalidate(
+            users={obj.author_id for obj in objs},
+            projects={obj.project_id for obj in objs}
+            )
+        return objs
+
+    bulk_create.alters_data = True
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+
+        with transaction.atomic(using=self.db, savepoint=False):
+            if counted_fields(fields):
+                changes = self.counter_changes(objs, fields)
+            rows = super().bulk_update(objs, fields, *args, **kwargs)
+            if counted_fields(fields):
+                Project.objects.db_manager(self.db).count_issues(changes)
+
+        invalidate(
+            users={obj.author_id for obj in objs},
+            projects={obj.project_id for obj in objs}
+            )
+        return rows
+
+    bulk_update.alters_data = True
+
+    def counter_changes(self, objs, fields=None) -> Counter:
+        """
+        Moves between the issue counters made by the writes of the
+        "fields" of the issues, None for all of them. Locks the rows,
+        call it in the transaction of the writes, before them.
+        """
+
+        old = {
+            row[0]: row[1:] for row in
+            self.model._base_manager.using(self.db).select_for_update().
+            filter(id__in=[obj.pk for obj in objs if obj.pk is not None]).
+            values_list("id", *COUNTED_FIELDS)
+            }
+
+        new = []
+        for obj in objs:
+            # The fields that aren't written keep the values of the table,
+            # they can be deferred in the objects
+            values = old.get(obj.pk, (None, None, None))
+            new.append(tuple(
+                getattr(obj, name) if is_written(name, fields) else value
+                for name, value in zip(COUNTED_FIELDS, values)
+                ))
+
+        changes = counted_issues(new)
+        changes.subtract(counted_issues(old.values()))
+        return changes
+
+    def rebalance_ranks(self, project_id: int, ranks) -> list[str]:
+        """
+        Renumbers the columns of the project where some of the given
+        ranks are taken by more than one issue, keeping the order.
+        Returns the statuses of the renumbered columns.
+        """
+
+        statuses = list(
+            self.filter(project_id=project_id, rank__in=list(ranks)).
+            values("status", "rank").
+            annotate(count=models.Count("id")).
+            filter(count__gt=1).
+            values_list("status", flat=True).distinct()
+            )
+        if not statuses:
+            return []
+
+        table = self.model._meta.db_table
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f'UPDATE "{table}" SET "rank" = "ranked"."number" * %s '
+                f'FROM (SELECT "id", ROW_NUMBER() OVER ('
+                f'PARTITION BY "status" ORDER BY "rank", "id") AS "number" '
+                f'FROM "{table}" WHERE "project_id" = %s '
+                f'AND "status" = ANY(%s)) AS "ranked" '
+                f'WHERE "{table}"."id" = "ranked"."id"',
+                [RANK_STEP, project_id, statuses]
+                )
+
+        invalidate(projects=[project_id])
+        return statuses
+
+    rebalance_ranks.alters_data = True
+
+    def delete_chunk(self, size: int) -> int:
+        """
+        Deletes at most "size" issues of the queryset without loading
+        them or sending signals, see bugtracker/deletion.py.
+        The caller invalidates the cache.
+        """
+
+        ids = list(self.order_by().values_list("id", flat=True)[:size])
+        if not ids:
+            return 0
+
+        table = self.model._meta.db_table
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM "{table}" WHERE "id" = ANY(%s)', [ids]
+                )
+            return cursor.rowcount
+
+    delete_chunk.alters_data = True
+
+    def soft_delete(self) -> int:
+        """
+        Marks the issues deleted with one UPDATE and sends the "delete"
+        events to their boards. Returns the number of issues.
+        """
+
+        issues = list(
+            self.filter(ALIVE).order_by().
+            only("project_id", "author_id", "status")
+            )
+        if not issues:
+            return 0
+
+        table = self.model._meta.db_table
+        with transaction.atomic(using=self.db, savepoint=False):
+            with connections[self.db].cursor() as cursor:
+                cursor.execute(
+                    f'UPDATE "{table}" SET "deleted_at" = %s '
+                    'WHERE "id" = ANY(%s) AND "deleted_at" IS NULL '
+                    'RETURNING "project_id", "status"',
+                    [timezone.now(), [issue.id for issue in issues]]
+                    )
+                deleted = cursor.fetchall()
+
+            changes = Counter()
+            changes.subtract(counted_issues(
+                (project_id, status, None) for project_id, status in deleted
+                ))
+            Project.objects.db_manager(self.db).count_issues(changes)
+
+        invalidate(
+            users={issue.author_id for issue in issues},
+            projects={issue.project_id for issue in issues}
+            )
+        for issue in issues:
+            publish_issue_event("delete", issue)
+        return len(deleted)
+
+    soft_delete.alters_data = True
+
+    def of_live_projects(self):
+        """
+        Hides the issues of the deleted projects, for the queries
+        that aren't limited to one project of the user
+        """
+
+        return self.filter(project__deleted_at__isnull=True)
+
+    def allocate_keys(self, objs) -> None:
+        """  Sets the keys of the issues without them, in the given order  """
+
+        counts = Counter(obj.project_id for obj in objs if obj.key is None)
+        next_keys = {
+            project_id: Project.objects.using(self.db).allocate_issue_keys(
+                project_id, count
+                )
+            for project_id, count in counts.items()
+            }
+
+        for obj in objs:
+            if obj.key is None:
+                obj.key = next_keys[obj.project_id]
+                next_keys[obj.project_id] += 1
 
 
 class Issue(models.Model):
@@ -68,18 +629,108 @@ class Issue(models.Model):
     ]
 
     project = models.ForeignKey(Project, on_delete=models.CASCADE)
-    key = models.PositiveIntegerField(default=1)
-    title = models.CharField(max_length=255, unique=True)
+    # Unique within the project, allocated on the first save
+    key = models.PositiveIntegerField(editable=False)
+    title = models.CharField(max_length=255)
     description = models.TextField(blank=True, default="")
     type = models.CharField(max_length=8, choices=ISSUE_TYPE)
     priority = models.CharField(max_length=8, choices=ISSUE_PRIORITY)
     status = models.CharField(max_length=11, choices=ISSUE_STATUS)
+    # Position in the board column, see RANK_STEP
+    rank = models.FloatField(default=top_rank)
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    search_en = search_vector_field(
+        "title", "description", "type", "priority", "status",
+        config=SEARCH_CONFIGS["en"]
+        )
+    search_ru = search_vector_field(
+        "title", "description", "type", "priority", "status",
+        config=SEARCH_CONFIGS["ru"]
+        )
+
+    objects = AliveManager.from_queryset(IssueQuerySet)()
+    all_objects = IssueQuerySet.as_manager()
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        using = kwargs.get("using")
+        update_fields = kwargs.get("update_fields")
+        if self.key is not None and not counted_fields(update_fields):
+            return super().save(*args, **kwargs)
+
+        # The key is released if the insert fails
+        with transaction.atomic(using=using, savepoint=self.key is None):
+            issues = Issue.objects.db_manager(using)
+            if self.key is None:
+                issues.allocate_keys([self])
+            changes = issues.counter_changes([self], update_fields)
+            super().save(*args, **kwargs)
+            Project.objects.db_manager(using).count_issues(changes)
+
     class Meta:
-        indexes = [models.Index(fields=["project"], name="project_idx")]
+        indexes = [
+            models.Index(fields=["project"], name="project_idx"),
+            models.Index(
+                fields=["author", "project", "id"],
+                name="issue_author_project_id_idx", condition=ALIVE
+                ),
+            # Board columns: issues of a status in the order of the ranks
+            models.Index(
+                fields=["project", "author", "status", "rank", "id"],
+                name="issue_board_column_idx", condition=ALIVE
+                ),
+            # Last-Modified of the board
+            models.Index(
+                fields=["project", "-updated"],
+                name="issue_project_updated_idx", condition=ALIVE
+                ),
+            GinIndex(
+                fields=["search_en"], name="issue_search_en_idx",
+                condition=ALIVE
+                ),
+            GinIndex(
+                fields=["search_ru"], name="issue_search_ru_idx",
+                condition=ALIVE
+                ),
+            # The purge_deleted task
+            models.Index(
+                fields=["deleted_at"], name="issue_deleted_idx",
+                condition=~ALIVE
+                ),
+            ]
+        constraints = [
+            # Keys aren't reused, deleted issues keep theirs
+            models.UniqueConstraint(
+                fields=["project", "key"], name="unique_project_issue_key"
+                ),
+            models.UniqueConstraint(
+                models.F("project"), Lower("title"), condition=ALIVE,
+                name="unique_issue_title",
+                violation_error_message=_(
+                    "Issue with that title already exists"
+                    )
+                ),
+            ]
+
+
+class UserPreferences(models.Model):
+    """  Kept across the sessions, see bugtracker/preferences.py  """
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True,
+        related_name="preferences"
+        )
+    # An IANA time zone name, empty for the default one
+    timezone = models.CharField(max_length=64, blank=True, default="")
+    language = models.CharField(
+        max_length=8, choices=settings.LANGUAGES, blank=True, default=""
+        )
+
+    def __str__(self):
+        return f"{self.user_id}: {self.timezone} {self.language}"
@@ -0,0 +1,80 @@
+import functools
+import time
+import zoneinfo
+from typing import NamedTuple
+
+from django.core.cache import cache
+
+from .models import UserPreferences
+
+
+# Preferences of the users for every request.
+#
+# Every process keeps the preferences it has read for LOCAL_TIMEOUT
+# seconds, then reads them from the cache and the database. A change
+# drops the cached copy (see signals.py), the other processes see it
+# once their copy expires.
+
+LOCAL_TIMEOUT = 30
+LOCAL_MAX_USERS = 10000
+
+# The signed cookie with the user id, see PreferencesMiddleware
+COOKIE_NAME = "preferences"
+COOKIE_SALT = "bugtracker.preferences"
+
+
+class Preferences(NamedTuple):
+    timezone: str = ""
+    language: str = ""
+
+
+DEFAULT = Preferences()
+
+_local = {}
+
+
+def cache_key(user_id: int) -> str:
+    return f"preferences_{user_id}"
+
+
+def get_preferences(user_id: int) -> Preferences:
+    now = time.monotonic()
+    local = _local.get(user_id)
+    if local is not None and local[0] > now:
+        return local[1]
+
+    values = cache.get(cache_key(user_id))
+    if values is None:
+        values = UserPreferences.objects.filter(user_id=user_id).values_list(
+            "timezone", "language"
+            ).first() or DEFAULT
+        cache.set(cache_key(user_id), tuple(values))
+
+    if len(_local) >= LOCAL_MAX_USERS:
+        _local.clear()
+    preferences = Preferences(*values)
+    _local[user_id] = (now + LOCAL_TIMEOUT, preferences)
+
+    return preferences
+
+
+def forget_preferences(user_id: int) -> None:
+    _local.pop(user_id, None)
+    cache.delete(cache_key(user_id))
+
+
+def set_preferences(user_id: int, **values: str) -> None:
+    UserPreferences.objects.update_or_create(user_id=user_id, defaults=values)
+
+
+# More than the zones there are, the names come from the users
+@functools.lru_cache(maxsize=1024)
+def get_timezone(name: str) -> zoneinfo.ZoneInfo | None:
+    """  The time zone of the name, None if it's empty or unknown  """
+
+    if not name:
+        return None
+    try:
+        return zoneinfo.ZoneInfo(name)
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+        return None
@@ -1,50 +1,45 @@
-from django.conf import settings
-from django.core.cache import cache
-from django.core.cache.utils import make_template_fragment_key
+from django.db import transaction
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from .models import Project, Issue
+from .events import publish_issue_event
+from .generations import invalidate
+from .models import Project, Issue, UserPreferences
+from .preferences import forget_preferences
 
 
-# Signals for cache invalidation
+# Signals for cache invalidation.
+# Bulk operations don't send them, see the querysets in models.py
 
 
 @receiver(post_delete, sender=Project, dispatch_uid="project_deleted")
 def object_project_delete_handler(sender, instance, **kwargs):
-    cache.delete_many(
-        keys=[
-            f"projects_list_{instance.author_id}",
-            f"project_query_{instance.author_id}"
-            ]
-        )
+    invalidate(users=[instance.author_id], projects=[instance.id])
 
 
 @receiver(post_save, sender=Project, dispatch_uid="project_updated")
 def object_project_save_handler(sender, instance, **kwargs):
-    cache.delete_many(
-        keys=[
-            f"projects_list_{instance.author_id}",
-            f"project_query_{instance.author_id}"
-            ]
-        )
+    invalidate(users=[instance.author_id], projects=[instance.id])
 
 
 @receiver(post_delete, sender=Issue, dispatch_uid="issue_deleted")
 def object_issue_delete_handler(sender, instance, **kwargs):
-    cache.delete_many(
-        keys=[
-            f"all_issues_{instance.project_id}",
-            f"issue_query_{instance.author_id}"
-            ]
-        )
+    invalidate(users=[instance.author_id], projects=[instance.project_id])
+    publish_issue_event("delete", instance)
 
 
 @receiver(post_save, sender=Issue, dispatch_uid="issue_updated")
 def object_issue_save_handler(sender, instance, **kwargs):
-    cache.delete_many(
-        keys=[
-            f"all_issues_{instance.project_id}",
-            f"issue_query_{instance.author_id}"
-            ]
-        )
+    invalidate(users=[instance.author_id], projects=[instance.project_id])
+    publish_issue_event("save", instance)
+
+
+@receiver(post_save, sender=UserPreferences,
+          dispatch_uid="preferences_updated"
+          )
+@receiver(post_delete, sender=UserPreferences,
+          dispatch_uid="preferences_deleted"
+          )
+def object_preferences_handler(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: forget_preferences(user_id))
@@ -0,0 +1,197 @@
+import pickle
+import zlib
+from collections import namedtuple
+from datetime import datetime, timezone as dt_timezone
+from typing import Any
+
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import models
+
+from .models import Project, Issue
+
+
+# Bump it whenever the encoding of the rows changes
+# (new codec, changed choices, etc.), so that old entries are rebuilt.
+SCHEMA_VERSION = 1
+
+_utc = dt_timezone.utc
+_fromtimestamp = datetime.fromtimestamp
+
+
+def _encode_datetime(value: datetime | None) -> int | None:
+    """  Aware datetime -> integer microseconds since the epoch  """
+
+    if value is None:
+        return None
+    return round(value.timestamp() * 10**6)
+
+
+def _decode_datetime(value: int | None) -> datetime | None:
+    # Exact to the microsecond: for any date before the year 2200
+    # a float of seconds keeps a sub-microsecond precision.
+    if value is None:
+        return None
+    return _fromtimestamp(value / 10**6, _utc)
+
+
+PLAIN, DATETIME, CHOICE = range(3)
+
+
+class SnapshotRow:
+    """  Mixin that makes a namedtuple row look like a model instance  """
+
+    __slots__ = ()
+
+    @property
+    def pk(self):
+        return self.id
+
+    def serializable_value(self, field_name: str) -> Any:
+        # Used by DRF related fields, "project" -> "project_id"
+        try:
+            return getattr(self, field_name)
+        except AttributeError:
+            return getattr(self, f"{field_name}_id")
+
+    def __str__(self):
+        return str(getattr(self, self.str_field))
+
+
+class Snapshot:
+    """
+    Compact, versioned snapshot of the columns a view renders.
+
+    The rows are stored column by column: datetimes become integer
+    microseconds and choice fields are stored as indexes into a table
+    of the distinct values of the column. The payload is pickled
+    (only builtin types, no model classes) and compressed with zlib.
+    On read the rows are rebuilt as lightweight, read-only objects
+    with the same attribute names as the model.
+    """
+
+    def __init__(
+            self,
+            model: type[models.Model],
+            fields: tuple[str, ...],
+            str_field: str
+            ):
+
+        self.model = model
+        self.fields = fields
+        self.kinds = []
+
+        for name in fields:
+            field = model._meta.get_field(name)
+
+            if isinstance(field, models.DateTimeField):
+                self.kinds.append(DATETIME)
+            elif field.choices:
+                self.kinds.append(CHOICE)
+            else:
+                self.kinds.append(PLAIN)
+
+        self.row_class = type(
+            f"{model.__name__}Row",
+            (SnapshotRow, namedtuple(f"{model.__name__}Row", fields)),
+            {"__slots__": (), "str_field": str_field}
+            )
+
+    def encode(self, rows: list[tuple]) -> bytes:
+        columns = list(zip(*rows)) if rows else [()] * len(self.fields)
+        packed = []
+
+        for kind, column in zip(self.kinds, columns):
+            if kind == DATETIME:
+                packed.append(tuple(map(_encode_datetime, column)))
+            elif kind == CHOICE:
+                table = tuple(dict.fromkeys(column))
+                indexes = {value: i for i, value in enumerate(table)}
+                packed.append((table, bytes(map(indexes.__getitem__, column))))
+            else:
+                packed.append(column)
+
+        payload = (SCHEMA_VERSION, self.fields, len(rows), packed)
+
+        return zlib.compress(pickle.dumps(payload, pickle.HIGHEST_PROTOCOL))
+
+    def decode(self, data: bytes) -> list | None:
+        """  Returns None if the data was written by another schema  """
+
+        try:
+            version, fields, count, packed = pickle.loads(
+                zlib.decompress(data)
+                )
+        except (zlib.error, pickle.UnpicklingError, TypeError, ValueError):
+            return None
+
+        if version != SCHEMA_VERSION or fields != self.fields:
+            return None
+
+        if not count:
+            return []
+
+        columns = []
+        for kind, column in zip(self.kinds, packed):
+            if kind == DATETIME:
+                columns.append(map(_decode_datetime, column))
+            elif kind == CHOICE:
+                table, indexes = column
+                columns.append(map(table.__getitem__, indexes))
+            else:
+                columns.append(column)
+
+        return list(map(self.row_class._make, zip(*columns)))
+
+    def get_or_set(
+            self,
+            key: str,
+            queryset: models.QuerySet,
+            timeout: int | None = DEFAULT_TIMEOUT
+            ) -> list:
+
+        data = cache.get(key)
+
+        if data is not None:
+            rows = self.decode(data)
+            if rows is not None:
+                return rows
+
+        values = list(queryset.values_list(*self.fields))
+        cache.set(key, self.encode(values), timeout)
+
+        return [self.row_class._make(row) for row in values]
+
+
+# Columns rendered by the "projects" page
+PROJECTS_LIST = Snapshot(
+    Project,
+    ("id", "name", "key", "type", "starred", "created",
+     "todo_count", "in_progress_count", "done_count"
+     ),
+    str_field="name"
+    )
+
+# Columns rendered by the "boards" page
+BOARD_ISSUES = Snapshot(
+    Issue,
+    ("id", "key", "title", "description", "type",
+     "priority", "status", "rank", "created", "updated"
+     ),
+    str_field="title"
+    )
+
+# Columns rendered by the API list endpoints
+API_PROJECTS = Snapshot(
+    Project,
+    ("id", "name", "description", "key", "type", "starred", "created"),
+    str_field="name"
+    )
+
+API_ISSUES = Snapshot(
+    Issue,
+    ("id", "project_id", "title", "description", "key", "type",
+     "priority", "status", "created", "updated"
+     ),
+    str_field="title"
+    )
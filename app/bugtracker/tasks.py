@@ -3,9 +3,14 @@ import logging
 from typing import Any
 from celery import shared_task
 
-from django.core.mail import EmailMessage
+from django.conf import settings
+from django.contrib.auth.models import User
 from django.template import loader
 
+from . import deletion, mail
+from .generations import invalidate
+from .models import Issue, Project
+
 
 logger = logging.getLogger(__name__)
 
@@ -21,23 +26,136 @@ def send_email(
         html_message=None
         ):
 
-    """ The task to send an email
+    """ The task to send one email right away
 
-    To the user when registering or resetting the password.
-    Or to the admin when a server error occurs.
+    The emails go in batches through mail.queue_email(),
+    this task is for the times when the queue is unavailable.
     """
 
     if html_email_template_name is not None:
-        html_email = loader.render_to_string(
+        html_message = loader.render_to_string(
             html_email_template_name,
             context
             )
-        email_message = EmailMessage(subject, body, to=to_email)
-        email_message.attach_alternative(html_email, "text/html")
-    else:
-        email_message = EmailMessage(subject, body, to=to_email)
-
-    try:
-        email_message.send(fail_silently=fail_silently)
-    except Exception:
-        logger.exception(msg="Failed to send email to the: {to_email[0]}!")
+
+    result = mail.send_batch([
+        mail.message_data(subject, body, to_email, html_message)
+        ])
+    if result.failed and not fail_silently:
+        raise RuntimeError(f"Failed to send email to the: {to_email[0]}!")
+
+
+@shared_task
+def send_user_email(
+        user_id: int,
+        token: str,
+        language: str,
+        subject_template_name: str,
+        email_template_name: str,
+        domain: str,
+        protocol: str = "https"
+        ) -> None:
+
+    """ The task to render and send an email to a user
+
+    The registration and password reset requests only enqueue
+    the names of the templates and the token. The templates are
+    compiled once per worker by the cached template loader.
+    """
+
+    user = User.objects.filter(id=user_id).only(
+        "id", "username", "first_name", "email"
+        ).first()
+    if user is None:
+        return
+
+    subject, body = mail.render_user_email(
+        user, token, language, subject_template_name, email_template_name,
+        domain, protocol
+        )
+    mail.queue_email(subject, body, [user.email])
+
+
+@shared_task
+def send_pending_emails() -> dict:
+    """ The task to send the queued emails
+
+    Takes them mail.BATCH_SIZE at a time, every batch
+    goes over one connection of the email backend.
+    """
+
+    # The emails queued from now on need another run
+    mail.get_redis().delete(mail.SCHEDULED_KEY)
+
+    sent = 0
+    failed = []
+    seconds = 0.0
+    while batch := mail.pop_pending():
+        result = mail.send_batch(batch)
+        sent += result.sent
+        failed += result.failed
+        seconds += result.seconds
+
+    mail.retry_later(failed)
+
+    rate = sent / seconds if seconds else 0.0
+    if sent or failed:
+        logger.info(
+            "Sent %d emails in %.2f s (%.1f msgs/sec), %d failed",
+            sent, seconds, rate, len(failed)
+            )
+
+    return {"sent": sent, "failed": len(failed), "msgs_per_sec": rate}
+
+
+@shared_task
+def send_error_digest(fingerprint: str) -> int:
+    """ The task to send the errors of a window to the admins
+
+    One email per fingerprint and window with the number of times
+    the error was logged, see app/log.py.
+    """
+
+    from app.log import DIGEST_WINDOW, pop_error_digest
+
+    digest = pop_error_digest(fingerprint)
+    if digest is None:
+        return 0
+
+    subject, message, count = digest
+    if count > 1:
+        subject = f"{subject} [{count} times in {DIGEST_WINDOW} s]"
+    mail.queue_email(subject, message, [a[1] for a in settings.ADMINS])
+
+    return count
+
+
+@shared_task
+def purge_deleted() -> int:
+    """ The task to purge the deleted projects and issues
+
+    Runs at night (CELERY_BEAT_SCHEDULE), after the undo window,
+    see bugtracker/deletion.py.
+    """
+
+    return deletion.purge()
+
+
+@shared_task
+def delete_account(user_id: int) -> None:
+    """ The task to delete an account with many issues
+
+    The user is deactivated by the view. The issues go in chunks,
+    then the projects and the user, see bugtracker/deletion.py.
+    """
+
+    deletion.delete_in_chunks(
+        Issue.all_objects.filter(author_id=user_id), "account", user_id
+        )
+    Project.all_objects.filter(author_id=user_id).delete_cascading()
+
+    # Only the small rows are left for the collector: token, preferences
+    user = User.objects.filter(id=user_id).first()
+    if user is not None:
+        user.delete()
+    invalidate(users=[user_id])
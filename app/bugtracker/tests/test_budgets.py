@@ -0,0 +1,258 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import URLResolver, reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from rest_framework.authtoken.models import Token
+
+import api.urls
+import bugtracker.urls
+from api.authentication import local_tokens
+from bugtracker.budgets import (
+    BUDGETS, LARGE, SMALL, BudgetTestMixin, budget_failures
+    )
+from bugtracker.models import Project, Issue
+from bugtracker.views import board_cursor
+
+
+LOCMEM_CACHE = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+
+
+def url_names(patterns) -> set[str]:
+    names = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            names |= url_names(pattern.url_patterns)
+        elif pattern.name:
+            names.add(pattern.name)
+
+    return names
+
+
+class BudgetRegistryTestCase(SimpleTestCase):
+
+    def test_every_view_has_a_budget(self):
+        names = url_names(bugtracker.urls.urlpatterns)
+        names |= url_names(api.urls.urlpatterns)
+
+        self.assertEqual(names - set(BUDGETS), set())
+
+    def test_every_budget_has_both_sizes(self):
+        for name, budgets in BUDGETS.items():
+            self.assertEqual(set(budgets), {SMALL, LARGE}, name)
+
+    def test_budget_failures(self):
+        checked = {
+            ("projects", SMALL): (5, 7),
+            ("projects", LARGE): (5, 7),
+            ("boards", SMALL): (6, 7),
+            ("boards", LARGE): (7, 7),
+            ("settings", SMALL): (3, 3),
+            }
+
+        self.assertEqual(budget_failures(checked), [
+            "settings: not checked with large data",
+            "boards: 6 queries and 7 cache operations with small data, "
+            "7 and 7 with large data"
+            ])
+
+    def test_budget_failures_of_one_size(self):
+        # A run of the small data tests only
+        self.assertEqual(budget_failures({("boards", SMALL): (7, 7)}), [])
+
+
+class ViewBudgets(BudgetTestMixin):
+    """
+    Requests every URL name once with a cold cache.
+    The subclasses set the size of the data.
+    """
+
+    size = None
+    projects_count = None
+    issues_per_project = None
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            first_name="Test", last_name="Test", username="testing",
+            email="testemail@gmail.com", password="Password123#"
+            )
+        cls.projects = Project.objects.bulk_create([
+            Project(name=f"Testing{i}", key=f"TEST{i}", type="Fullstack",
+                    author_id=cls.user.id)
+            for i in range(cls.projects_count)
+            ])
+        statuses = [status for status, _ in Issue.ISSUE_STATUS]
+        cls.issues = Issue.objects.bulk_create([
+            Issue(project_id=project.id, title=f"Issue {project.key} {i}",
+                  description="Big Socks Just Big Socks",
+                  type="Bug", priority="Low", status=statuses[i % 3],
+                  author_id=cls.user.id)
+            for project in cls.projects
+            for i in range(cls.issues_per_project)
+            ])
+        cls.project = cls.projects[0]
+        cls.issue = cls.issues[0]
+        cls.token = Token.objects.get(user=cls.user)
+        cls.uid = urlsafe_base64_encode(force_bytes(cls.user.pk))
+
+    def setUp(self):
+        cache.clear()
+        local_tokens.clear()
+
+    def assertRequestWithinBudget(self, url_name, args=(), method="get",
+                                  api=False, **kwargs):
+        if api:
+            kwargs["HTTP_AUTHORIZATION"] = "Token " + self.token.key
+        else:
+            self.client.force_login(self.user)
+
+        request = getattr(self.client, method)
+        with self.assertWithinBudget(url_name, self.size):
+            r = request(reverse(url_name, args=args), **kwargs)
+
+        self.assertLess(r.status_code, 400, url_name)
+
+    def test_projects(self):
+        self.assertRequestWithinBudget("projects")
+
+    def test_settings(self):
+        self.assertRequestWithinBudget("settings")
+
+    def test_boards(self):
+        self.assertRequestWithinBudget("boards", [self.project.id])
+
+    def test_board_column(self):
+        self.assertRequestWithinBudget(
+            "board-column", [self.project.id],
+            data={"status": "To do", "cursor": board_cursor(self.issue)}
+            )
+
+    def test_board_moves(self):
+        moves = [
+            {"issue_id": issue.id, "status": "Done", "rank": float(i)}
+            for i, issue in enumerate(self.issues[:3])
+            ]
+        self.assertRequestWithinBudget(
+            "board-moves", [self.project.id], method="post",
+            data=json.dumps({"moves": moves}),
+            content_type="application/json"
+            )
+
+    def test_board_events(self):
+        # The stream isn't read, only the checks before it count
+        self.assertRequestWithinBudget("board-events", [self.project.id])
+
+    def test_project_settings(self):
+        self.assertRequestWithinBudget("project-settings", [self.project.id])
+
+    def test_issue_details(self):
+        self.assertRequestWithinBudget(
+            "issue-details", [self.project.id, self.issue.id]
+            )
+
+    def test_accounts(self):
+        self.assertRequestWithinBudget("accounts", [self.user.id])
+
+    def test_login(self):
+        self.assertRequestWithinBudget("login")
+
+    def test_logout(self):
+        self.assertRequestWithinBudget("logout")
+
+    def test_register(self):
+        self.assertRequestWithinBudget("register")
+
+    def test_register_confirm(self):
+        self.assertRequestWithinBudget(
+            "register_confirm", [self.uid, "wrong-token"]
+            )
+
+    def test_search(self):
+        self.assertRequestWithinBudget("search", data={"q": "socks"})
+
+    def test_search_results(self):
+        self.assertRequestWithinBudget("search-results", ["socks"])
+
+    def test_password_reset(self):
+        self.assertRequestWithinBudget("password-reset")
+
+    def test_password_reset_done(self):
+        self.assertRequestWithinBudget("password-reset-done")
+
+    def test_password_reset_confirm(self):
+        self.assertRequestWithinBudget(
+            "password_reset_confirm", [self.uid, "wrong-token"]
+            )
+
+    def test_delete_project(self):
+        self.assertRequestWithinBudget("delete-project", [self.project.id])
+
+    def test_delete_issue(self):
+        self.assertRequestWithinBudget(
+            "delete-issue", [self.project.id, self.issue.id]
+            )
+
+    def test_restore_project(self):
+        Project.objects.filter(id=self.project.id).soft_delete()
+        self.assertRequestWithinBudget("restore-project", [self.project.id])
+
+    def test_restore_issue(self):
+        Issue.objects.filter(id=self.issue.id).soft_delete()
+        self.assertRequestWithinBudget(
+            "restore-issue", [self.project.id, self.issue.id]
+            )
+
+    def test_delete_account(self):
+        self.assertRequestWithinBudget("delete-account", [self.user.id])
+
+    def test_api_root(self):
+        self.assertRequestWithinBudget("api-root", api=True)
+
+    def test_api_project_list(self):
+        self.assertRequestWithinBudget("project-list", api=True)
+
+    def test_api_project_detail(self):
+        self.assertRequestWithinBudget(
+            "project-detail", [self.project.id], api=True
+            )
+
+    def test_api_issue_list(self):
+        self.assertRequestWithinBudget("issue-list", api=True)
+
+    def test_api_issue_detail(self):
+        self.assertRequestWithinBudget(
+            "issue-detail", [self.issue.id], api=True
+            )
+
+    def test_api_issue_bulk(self):
+        self.assertRequestWithinBudget(
+            "issue-bulk", method="delete", api=True,
+            data=json.dumps([
+                issue.id for issue in self.issues
+                if issue.project_id == self.project.id
+                ]),
+            content_type="application/json"
+            )
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class SmallDataBudgetTestCase(ViewBudgets, TestCase):
+
+    size = SMALL
+    projects_count = 1
+    issues_per_project = 3
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class LargeDataBudgetTestCase(ViewBudgets, TestCase):
+
+    size = LARGE
+    projects_count = 10
+    issues_per_project = 60
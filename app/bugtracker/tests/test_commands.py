@@ -0,0 +1,55 @@
+from collections import Counter
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+from rest_framework.authtoken.models import Token
+
+from bugtracker.models import ISSUE_COUNTERS, RANK_STEP, Issue, Project
+
+
+class SeedLoadTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            "seed_load", users=2, projects=3, issues=40, chunk_size=7,
+            prefix="seed", stdout=StringIO()
+            )
+        cls.projects = Project.objects.filter(key__startswith="SEED")
+
+    def test_rows(self):
+        users = User.objects.filter(username__startswith="seed")
+
+        self.assertEqual(users.count(), 2)
+        self.assertEqual(Token.objects.filter(user__in=users).count(), 2)
+        self.assertEqual(self.projects.count(), 3)
+        self.assertEqual(
+            Issue.objects.filter(project__in=self.projects).count(), 40
+            )
+
+    def test_counters(self):
+        counts = Counter(
+            Issue.objects.filter(project__in=self.projects).
+            values_list("project_id", "status")
+            )
+
+        for project in self.projects:
+            for status, counter in ISSUE_COUNTERS.items():
+                self.assertEqual(
+                    getattr(project, counter), counts[project.id, status]
+                    )
+
+    def test_ranks(self):
+        for project in self.projects:
+            for status in ISSUE_COUNTERS:
+                ranks = list(
+                    Issue.objects.filter(
+                        project_id=project.id, status=status
+                        ).order_by("key").values_list("rank", flat=True)
+                    )
+                self.assertEqual(ranks, [
+                    n * RANK_STEP for n in range(1, len(ranks) + 1)
+                    ])
@@ -0,0 +1,173 @@
+import asyncio
+import json
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from bugtracker import events
+from bugtracker.events import BoardListeners, publish_issue_event
+from bugtracker.models import Project, Issue
+
+
+class FakePubSub:
+    """  The channels it's subscribed to and a queue for listen()  """
+
+    def __init__(self):
+        self.channels = []
+        self.messages = asyncio.Queue()
+
+    async def subscribe(self, channel):
+        self.channels.append(channel)
+
+    async def unsubscribe(self, channel):
+        self.channels.remove(channel)
+
+    async def listen(self):
+        while True:
+            yield await self.messages.get()
+
+    def publish(self, channel, data):
+        self.messages.put_nowait({
+            "type": "message",
+            "channel": channel.encode(),
+            "data": data.encode()
+            })
+
+
+def run_now(func):
+    func()
+
+
+class PublishIssueEventTestCase(SimpleTestCase):
+
+    @mock.patch.object(events.transaction, "on_commit", run_now)
+    @mock.patch("bugtracker.events._publish")
+    def test_message(self, publish):
+        issue = Issue(
+            id=5, project_id=3, status="Done", title="Issue", rank=1.5
+            )
+        publish_issue_event("save", issue)
+
+        channel, message = publish.call_args.args
+        self.assertEqual(channel, "board_3")
+        self.assertEqual(json.loads(message), {
+            "event": "save", "id": 5, "status": "Done",
+            "title": "Issue", "rank": 1.5
+            })
+
+
+class BoardListenersTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.listeners = BoardListeners()
+        self.pubsub = FakePubSub()
+        self.listeners.pubsub = self.pubsub
+
+    def test_fan_out(self):
+        async def run():
+            first = await self.listeners.add("board_1")
+            second = await self.listeners.add("board_1")
+            other = await self.listeners.add("board_2")
+
+            self.pubsub.publish("board_1", "moved")
+            received = [
+                await asyncio.wait_for(queue.get(), 1)
+                for queue in (first, second)
+                ]
+            self.listeners.reader.cancel()
+
+            return received, other.empty()
+
+        received, other_empty = asyncio.run(run())
+
+        self.assertEqual(received, ["moved", "moved"])
+        self.assertTrue(other_empty)
+        # One subscription for the streams of a channel
+        self.assertEqual(self.pubsub.channels, ["board_1", "board_2"])
+
+    def test_unsubscribe_after_the_last_stream(self):
+        async def run():
+            first = await self.listeners.add("board_1")
+            second = await self.listeners.add("board_1")
+            self.listeners.reader.cancel()
+
+            await self.listeners.remove("board_1", first)
+            subscribed = list(self.pubsub.channels)
+            await self.listeners.remove("board_1", second)
+
+            return subscribed
+
+        self.assertEqual(asyncio.run(run()), ["board_1"])
+        self.assertEqual(self.pubsub.channels, [])
+        self.assertNotIn("board_1", self.listeners.queues)
+
+
+class IssueEventsTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            first_name="Test", last_name="Test", username="testing",
+            email="testemail@gmail.com", password="Password123#"
+            )
+        cls.project = Project.objects.create(
+            name="Testing", key="TEST",
+            type="Fullstack", author_id=cls.user.id
+            )
+
+    @mock.patch("bugtracker.events._publish")
+    def test_published_on_commit(self, publish):
+        with self.captureOnCommitCallbacks(execute=True):
+            issue = Issue.objects.create(
+                project_id=self.project.id, title="Issue",
+                type="Bug", priority="Low", status="To do",
+                author_id=self.user.id
+                )
+            publish.assert_not_called()
+
+        channel, message = publish.call_args.args
+        self.assertEqual(channel, f"board_{self.project.id}")
+        self.assertEqual(json.loads(message)["id"], issue.id)
+
+
+class BoardEventsViewTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            first_name="Test", last_name="Test", username="testing",
+            email="testemail@gmail.com", password="Password123#"
+            )
+        cls.other_user = User.objects.create_user(
+            first_name="Test", last_name="Test", username="testingII",
+            email="testemail2@gmail.com", password="Password123#"
+            )
+        cls.project = Project.objects.create(
+            name="Testing", key="TEST",
+            type="Fullstack", author_id=cls.user.id
+            )
+        cls.url = reverse("board-events", args=[cls.project.id])
+
+    async def test_anonymous(self):
+        response = await self.async_client.get(self.url)
+
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response.url.startswith("/login/"))
+
+    async def test_other_users_board(self):
+        await self.async_client.aforce_login(self.other_user)
+
+        response = await self.async_client.get(self.url)
+
+        self.assertEqual(response.status_code, 404)
+
+    async def test_own_board(self):
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(response["Cache-Control"], "no-cache")
@@ -118,6 +118,9 @@ class RegisterFormTestCase(TestCase):
         self.assertEqual(form_invalid1.errors["username"],
                          ["Username must have only letters"]
                          )
+        # Checked by the unique constraint when it's saved
+        self.assertTrue(form_invalid2.is_valid())
+        self.assertIsNone(form_invalid2.save_or_error(form_invalid2.save))
         self.assertEqual(form_invalid2.errors["username"],
                          ["That username already exists"]
                          )
@@ -132,7 +135,7 @@ class RegisterFormTestCase(TestCase):
             "first_name": "First",
             "last_name": "Last",
             "username": "username1",
-            "email": "testemail@gmail.com",
+            "email": "TestEmail@gmail.com",
             "password1": "Test123#",
             "password2": "Test123#"
             }
@@ -149,6 +152,8 @@ class RegisterFormTestCase(TestCase):
         form_invalid = RegisterForm(data_invalid)
         form_valid = RegisterForm(data_valid)
 
+        self.assertTrue(form_invalid.is_valid())
+        self.assertIsNone(form_invalid.save_or_error(form_invalid.save))
         self.assertEqual(form_invalid.errors["email"],
                          ["That email already exists"]
                          )
@@ -404,6 +409,8 @@ class ProjectModalFormTestCase(TestCase):
         form_invalid = ProjectModalForm(data_invalid)
         form_valid = ProjectModalForm(data_valid)
 
+        self.assertTrue(form_invalid.is_valid())
+        self.assertIsNone(form_invalid.save_or_error(form_invalid.save))
         self.assertEqual(form_invalid.errors["name"],
                          ["That project already exists"]
                          )
@@ -411,7 +418,7 @@ class ProjectModalFormTestCase(TestCase):
 
     def test_key_field(self):
         data_invalid = {
-            "author": self.user.id, "name": "Test", "key": "TEST",
+            "author": self.user.id, "name": "Test", "key": "test",
             "type": "Fullstack", "starred": 1
             }
         data_valid = {
@@ -426,6 +433,8 @@ class ProjectModalFormTestCase(TestCase):
                                       initial={"author_id": self.user.id}
                                       )
 
+        self.assertTrue(form_invalid.is_valid())
+        self.assertIsNone(form_invalid.save_or_error(form_invalid.save))
         self.assertEqual(form_invalid.errors["key"],
                          ["Project with that key already exists"]
                          )
@@ -457,7 +466,7 @@ class IssueModalFormTestCase(TestCase):
         data_invalid = {
             "author": self.user.id,
             "project": self.project.id,
-            "title": "Issue",
+            "title": "issue",
             "description": "Test",
             "type": "Feature",
             "priority": "Medium",
@@ -476,11 +485,32 @@ class IssueModalFormTestCase(TestCase):
 
         form_invalid = IssueModalForm(data_invalid)
         form_valid = IssueModalForm(data_valid)
+        self.assertTrue(form_invalid.is_valid())
+        self.assertIsNone(form_invalid.save_or_error(form_invalid.save))
         self.assertEqual(form_invalid.errors["title"],
                          ["Issue with that title already exists"]
                          )
         self.assertEqual(form_valid.errors, {})
 
+    def test_title_in_other_project(self):
+        project = Project.objects.create(
+            name="Other", key="OTHER", type="Fullstack",
+            starred=1, author_id=self.user.id
+            )
+        data = {
+            "author": self.user.id,
+            "project": project.id,
+            "title": "Issue",
+            "description": "Test",
+            "type": "Feature",
+            "priority": "Medium",
+            "status": "To do"
+            }
+
+        form = IssueModalForm(data)
+        self.assertTrue(form.is_valid())
+        self.assertIsNotNone(form.save_or_error(form.save))
+
 
 class UserSetNewPasswordFormTestCase(UserPasswordChangeFormTestCase):
     # Tests for this form is ABSOLUTELY identical
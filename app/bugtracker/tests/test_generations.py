@@ -0,0 +1,108 @@
+import time
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from bugtracker.generations import (
+    PROJECT, USER, generation_timestamp, get_generation, invalidate,
+    versioned_key
+    )
+from bugtracker.models import Project, Issue
+
+
+LOCMEM_CACHE = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class GenerationTestCase(SimpleTestCase):
+
+    def test_generation_is_stable(self):
+        self.assertEqual(get_generation(USER, 1), get_generation(USER, 1))
+        self.assertEqual(
+            versioned_key("projects_list", USER, 1),
+            versioned_key("projects_list", USER, 1)
+            )
+
+    def test_generation_timestamp(self):
+        before = int(time.time())
+        invalidate(users=[4])
+        stamp = generation_timestamp(get_generation(USER, 4))
+
+        self.assertTrue(before <= stamp <= time.time())
+
+    def test_invalidate(self):
+        user_key = versioned_key("projects_list", USER, 2)
+        project_key = versioned_key("all_issues", PROJECT, 2)
+        other_key = versioned_key("all_issues", PROJECT, 3)
+
+        invalidate(users=[2], projects=[2])
+
+        self.assertNotEqual(versioned_key("projects_list", USER, 2), user_key)
+        self.assertNotEqual(
+            versioned_key("all_issues", PROJECT, 2), project_key
+            )
+        self.assertEqual(versioned_key("all_issues", PROJECT, 3), other_key)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class BulkInvalidationTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            first_name="Test", last_name="Test", username="testing",
+            email="testemail@gmail.com", password="Password123#"
+            )
+        cls.project = Project.objects.create(
+            name="Testing", key="TEST", type="Fullstack",
+            author_id=cls.user.id
+            )
+        cls.issue = Issue.objects.create(
+            project_id=cls.project.id,
+            title="Issue",
+            type="Feature",
+            priority="Medium",
+            status="To do",
+            author_id=cls.user.id
+            )
+
+    def test_update(self):
+        key = versioned_key("all_issues", PROJECT, self.project.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Issue.objects.filter(project_id=self.project.id).update(
+                status="Done"
+                )
+
+        self.assertNotEqual(
+            versioned_key("all_issues", PROJECT, self.project.id), key
+            )
+
+    def test_bulk_create(self):
+        key = versioned_key("projects_list", USER, self.user.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Project.objects.bulk_create([
+                Project(name="Bulk", key="BULK", type="Fullstack",
+                        author_id=self.user.id)
+                ])
+
+        self.assertNotEqual(
+            versioned_key("projects_list", USER, self.user.id), key
+            )
+
+    def test_one_bump_per_transaction(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            for i in range(5):
+                Issue.objects.create(
+                    project_id=self.project.id,
+                    title=f"Issue {i}",
+                    type="Bug",
+                    priority="Low",
+                    status="To do",
+                    author_id=self.user.id
+                    )
+
+        self.assertEqual(len(callbacks), 1)
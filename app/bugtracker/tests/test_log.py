@@ -0,0 +1,74 @@
+import json
+import logging
+import sys
+
+from django.test import SimpleTestCase
+
+from app.log import error_fingerprint
+
+
+def record_of(exc_info) -> logging.LogRecord:
+    return logging.LogRecord(
+        "django.request", logging.ERROR, __file__, 1, "Internal Server Error",
+        None, exc_info
+        )
+
+
+def raise_error(error_type):
+    try:
+        raise error_type("Boom")
+    except error_type:
+        return sys.exc_info()
+
+
+def load_settings():
+    try:
+        json.loads("{")
+    except ValueError:
+        return sys.exc_info()
+
+
+def load_filters():
+    try:
+        json.loads("{")
+    except ValueError:
+        return sys.exc_info()
+
+
+class ErrorFingerprintTestCase(SimpleTestCase):
+
+    def test_same_error(self):
+        first = error_fingerprint(record_of(raise_error(ValueError)))
+        second = error_fingerprint(record_of(raise_error(ValueError)))
+
+        self.assertEqual(first, second)
+
+    def test_other_type(self):
+        self.assertNotEqual(
+            error_fingerprint(record_of(raise_error(ValueError))),
+            error_fingerprint(record_of(raise_error(KeyError)))
+            )
+
+    def test_other_location(self):
+        try:
+            raise ValueError("Boom")
+        except ValueError:
+            exc_info = sys.exc_info()
+
+        self.assertNotEqual(
+            error_fingerprint(record_of(exc_info)),
+            error_fingerprint(record_of(raise_error(ValueError)))
+            )
+
+    def test_without_exception(self):
+        record = record_of(None)
+
+        self.assertEqual(error_fingerprint(record), error_fingerprint(record))
+        self.assertEqual(len(error_fingerprint(record)), 16)
+
+    def test_raised_in_library(self):
+        # Raised in the same place of json, called from other functions
+        self.assertNotEqual(
+            error_fingerprint(record_of(load_settings())),
+            error_fingerprint(record_of(load_filters()))
+            )
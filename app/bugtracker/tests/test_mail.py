@@ -0,0 +1,129 @@
+import smtplib
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.test import SimpleTestCase
+
+from bugtracker.mail import (
+    BatchResult, message_data, render_user_email, send_batch
+    )
+
+
+class CountingBackend(locmem.EmailBackend):
+    """
+    Keeps its connection like the SMTP backend: send_messages() opens
+    one if it isn't open and closes it again. Counts the opened
+    connections, fails for "fail@" recipients.
+    """
+
+    opened = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connection = None
+
+    def open(self):
+        if self.connection:
+            return False
+        CountingBackend.opened += 1
+        self.connection = True
+        return True
+
+    def close(self):
+        self.connection = None
+
+    def send_messages(self, messages):
+        new_connection = self.open()
+        try:
+            for message in messages:
+                if any(to.startswith("fail@") for to in message.to):
+                    raise smtplib.SMTPRecipientsRefused({})
+            return super().send_messages(messages)
+        finally:
+            if new_connection:
+                self.close()
+
+
+class SendBatchTestCase(SimpleTestCase):
+
+    def setUp(self):
+        CountingBackend.opened = 0
+
+    def test_one_connection(self):
+        messages = [
+            message_data("Subject", "Body", [f"user{i}@gmail.com"])
+            for i in range(5)
+            ]
+        result = send_batch(messages, CountingBackend())
+
+        self.assertEqual(result.sent, 5)
+        self.assertEqual(result.failed, [])
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(CountingBackend.opened, 1)
+
+    def test_failed_messages(self):
+        messages = [
+            message_data("Subject", "Body", ["user@gmail.com"]),
+            message_data("Subject", "Body", ["fail@gmail.com"]),
+            message_data("Subject", "Body", ["user2@gmail.com"], "<p>Hi</p>"),
+            ]
+        with self.assertLogs("bugtracker.mail", "ERROR"):
+            result = send_batch(messages, CountingBackend())
+
+        self.assertEqual(result.sent, 2)
+        self.assertEqual(len(result.failed), 1)
+        self.assertEqual(result.failed[0]["to"], ["fail@gmail.com"])
+        self.assertEqual(result.failed[0]["attempts"], 1)
+        self.assertEqual(mail.outbox[1].alternatives[0][1], "text/html")
+        # Reopened after the failure only
+        self.assertEqual(CountingBackend.opened, 2)
+
+    def test_rate(self):
+        self.assertEqual(BatchResult(10, [], 2.0).rate, 5.0)
+        self.assertEqual(BatchResult(0, [], 0.0).rate, 0.0)
+
+
+class RenderUserEmailTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.user = User(
+            id=1, username="testing", first_name="Test",
+            email="testemail@gmail.com"
+            )
+
+    def test_register(self):
+        subject, body = render_user_email(
+            self.user, "token", "en", "register-activate-subject.txt",
+            "register-activate-en.html", "bugtracker.com"
+            )
+
+        self.assertEqual(
+            subject, "Activation link has been sent to your email"
+            )
+        self.assertIn("Hi, Test", body)
+        self.assertIn(
+            "https://bugtracker.com/register-confirm/MQ/token/", body
+            )
+
+    def test_language(self):
+        subject, _body = render_user_email(
+            self.user, "token", "ru", "register-activate-subject.txt",
+            "register-activate-ru.html", "bugtracker.com"
+            )
+
+        self.assertEqual(
+            subject,
+            "Ссылка для активации была отправлена на ваш электронный адрес"
+            )
+
+    def test_password_reset(self):
+        subject, body = render_user_email(
+            self.user, "token", "en",
+            "registration/password_reset_subject.txt",
+            "registration/password_reset_email.html", "bugtracker.com"
+            )
+
+        self.assertNotIn("\n", subject)
+        self.assertIn("testing", body)
+        self.assertIn("/password-reset-confirm/MQ/token/", body)
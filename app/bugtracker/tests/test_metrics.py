@@ -0,0 +1,68 @@
+from unittest import mock
+
+import redis
+
+from django.test import SimpleTestCase
+
+from app.metrics import Registry, key_prefix, render
+
+
+class MetricsTestCase(SimpleTestCase):
+
+    def test_key_prefix(self):
+        self.assertEqual(
+            key_prefix("projects_list_1_18a9c0e7"), "projects_list"
+            )
+        self.assertEqual(key_prefix("all_issues_3_18a9c0e7"), "all_issues")
+        self.assertEqual(key_prefix("auth_token_1f2e3d"), "auth_token")
+        self.assertEqual(
+            key_prefix("django.contrib.sessions.cached_dbabc123"), "session"
+            )
+
+    def test_render(self):
+        registry = Registry()
+        registry.inc("http_requests_total", view="boards", status=200)
+        registry.inc("http_requests_total", view="boards", status=200)
+        registry.observe(
+            "http_request_duration_seconds", 0.03, (0.01, 0.05), view="boards"
+            )
+        text = render(dict(registry._samples))
+
+        self.assertIn("# TYPE http_requests_total counter", text)
+        self.assertIn(
+            'http_requests_total{status="200",view="boards"} 2', text
+            )
+        self.assertIn("# TYPE http_request_duration_seconds histogram", text)
+        self.assertIn(
+            'http_request_duration_seconds_bucket{le="0.01",view="boards"} 0',
+            text
+            )
+        self.assertLess(
+            text.index('le="0.05"'), text.index('le="+Inf"')
+            )
+
+    def test_restricted(self):
+        r = self.client.get("/metrics/")
+        self.assertEqual(r.status_code, 403)
+
+
+    def test_flush_keeps_samples_without_redis(self):
+        registry = Registry()
+        registry.inc("http_requests_total", view="boards", status=200)
+
+        with mock.patch.object(
+                registry, "get_redis", side_effect=redis.RedisError):
+            registry.flush()
+
+        self.assertEqual(dict(registry._samples), {
+            'http_requests_total{status="200",view="boards"}': 1
+            })
+
+    @mock.patch("app.metrics.threading.Thread")
+    def test_one_flushing_thread(self, thread):
+        registry = Registry()
+        registry.start_flushing()
+        registry.start_flushing()
+
+        thread.assert_called_once()
+        thread.return_value.start.assert_called_once()
@@ -1,6 +1,9 @@
-from django.test import TestCase
+import threading
+
+from django.test import TestCase, TransactionTestCase
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import User
+from django.db import IntegrityError, connection, transaction
 
 from bugtracker.models import Project, Issue
 
@@ -79,3 +82,195 @@ class IssueTestCase(TestCase):
 
     def test_str(self):
         self.assertEqual(str(self.issue), "Issue")
+
+
+class IssueKeyTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            first_name="Test", last_name="Test", username="testing",
+            email="testemail@gmail.com", password="Password123#"
+            )
+        self.project1 = Project.objects.create(
+            name="Testing1", key="TEST1",
+            type="Fullstack", author_id=self.user.id
+            )
+        self.project2 = Project.objects.create(
+            name="Testing2", key="TEST2",
+            type="Fullstack", author_id=self.user.id
+            )
+
+    def create_issue(self, project, title):
+        return Issue.objects.create(
+            project_id=project.id, title=title, type="Bug",
+            priority="Low", status="To do", author_id=self.user.id
+            )
+
+    def test_keys_per_project(self):
+        issue1 = self.create_issue(self.project1, "Issue1")
+        issue2 = self.create_issue(self.project1, "Issue2")
+        issue3 = self.create_issue(self.project2, "Issue3")
+
+        self.assertEqual((issue1.key, issue2.key, issue3.key), (1, 2, 1))
+
+    def test_key_kept_on_update(self):
+        issue = self.create_issue(self.project1, "Issue1")
+        issue.status = "Done"
+        issue.save()
+        issue.refresh_from_db()
+
+        self.assertEqual(issue.key, 1)
+
+    def test_bulk_create(self):
+        self.create_issue(self.project1, "Issue1")
+        issues = Issue.objects.bulk_create([
+            Issue(project_id=project.id, title=f"Bulk {i}", type="Bug",
+                  priority="Low", status="To do", author_id=self.user.id)
+            for i, project in enumerate(
+                [self.project1, self.project2, self.project1]
+                )
+            ])
+
+        self.assertEqual([issue.key for issue in issues], [2, 1, 3])
+        self.project1.refresh_from_db()
+        self.assertEqual(self.project1.last_issue_key, 3)
+
+    def test_unique_key(self):
+        issue = self.create_issue(self.project1, "Issue1")
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Issue.objects.create(
+                project_id=self.project1.id, key=issue.key, title="Issue2",
+                type="Bug", priority="Low", status="To do",
+                author_id=self.user.id
+                )
+
+
+class IssueCountersTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            first_name="Test", last_name="Test", username="testing",
+            email="testemail@gmail.com", password="Password123#"
+            )
+        self.project1 = Project.objects.create(
+            name="Testing1", key="TEST1",
+            type="Fullstack", author_id=self.user.id
+            )
+        self.project2 = Project.objects.create(
+            name="Testing2", key="TEST2",
+            type="Fullstack", author_id=self.user.id
+            )
+        self.issue = Issue.objects.create(
+            project_id=self.project1.id, title="Issue1", type="Bug",
+            priority="Low", status="To do", author_id=self.user.id
+            )
+
+    def assertCounts(self, project, todo, in_progress, done):
+        project.refresh_from_db()
+        self.assertEqual(
+            project.issue_counts(),
+            {"To do": todo, "In progress": in_progress, "Done": done}
+            )
+
+    def test_create(self):
+        Issue.objects.bulk_create([
+            Issue(project_id=self.project1.id, title=f"Bulk {i}",
+                  type="Bug", priority="Low", status=status,
+                  author_id=self.user.id)
+            for i, status in enumerate(["To do", "Done", "Done"])
+            ])
+
+        self.assertCounts(self.project1, 2, 0, 2)
+        self.assertCounts(self.project2, 0, 0, 0)
+
+    def test_status_change(self):
+        issue = Issue.objects.only(
+            "status", "project_id", "author_id"
+            ).get(id=self.issue.id)
+        issue.status = "In progress"
+        issue.save(update_fields=["status"])
+        self.assertCounts(self.project1, 0, 1, 0)
+
+        # Saving the same status again doesn't count it twice
+        issue.save(update_fields=["status"])
+        self.assertCounts(self.project1, 0, 1, 0)
+
+    def test_bulk_update(self):
+        self.issue.status = "Done"
+        self.issue.project_id = self.project2.id
+        Issue.objects.bulk_update([self.issue], ["status", "project"])
+
+        self.assertCounts(self.project1, 0, 0, 0)
+        self.assertCounts(self.project2, 0, 0, 1)
+
+    def test_update(self):
+        Issue.objects.filter(id=self.issue.id).update(status="Done")
+
+        self.assertCounts(self.project1, 0, 0, 1)
+
+    def test_soft_delete_and_restore(self):
+        Issue.objects.filter(id=self.issue.id).soft_delete()
+        self.assertCounts(self.project1, 0, 0, 0)
+
+        issue = Issue.all_objects.get(id=self.issue.id)
+        issue.deleted_at = None
+        issue.save(update_fields=["deleted_at"])
+        self.assertCounts(self.project1, 1, 0, 0)
+
+    def test_recount(self):
+        Project.objects.filter(id=self.project1.id).update(
+            todo_count=5, done_count=2
+            )
+
+        Project.all_objects.recount_issues()
+        self.assertCounts(self.project1, 1, 0, 0)
+
+
+class IssueKeyConcurrencyTestCase(TransactionTestCase):
+
+    THREADS = 8
+    ISSUES_PER_THREAD = 40
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            first_name="Test", last_name="Test", username="testing",
+            email="testemail@gmail.com", password="Password123#"
+            )
+        self.collisions = 0
+
+    def create_issues(self, project_id, n):
+        try:
+            for i in range(self.ISSUES_PER_THREAD):
+                try:
+                    Issue.objects.create(
+                        project_id=project_id, title=f"Allocator {n} {i}",
+                        type="Bug", priority="Low", status="To do",
+                        author_id=self.user.id
+                        )
+                except IntegrityError:
+                    self.collisions += 1
+        finally:
+            connection.close()
+
+    def test_parallel_creates(self):
+        project = Project.objects.create(
+            name="Concurrency", key="CONC",
+            type="Fullstack", author_id=self.user.id
+            )
+        threads = [
+            threading.Thread(target=self.create_issues, args=(project.id, n))
+            for n in range(self.THREADS)
+            ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        keys = list(
+            Issue.objects.filter(project_id=project.id).
+            values_list("key", flat=True)
+            )
+        total = self.THREADS * self.ISSUES_PER_THREAD
+        self.assertEqual(self.collisions, 0)
+        self.assertEqual(sorted(keys), list(range(1, total + 1)))
@@ -0,0 +1,36 @@
+from django.test import RequestFactory, SimpleTestCase
+from django.contrib.auth.models import AnonymousUser
+from django.utils.functional import SimpleLazyObject
+
+from app.middleware.preferences import loaded_user
+from bugtracker.preferences import get_timezone
+
+
+class PreferencesTestCase(SimpleTestCase):
+
+    def test_get_timezone(self):
+        self.assertIs(
+            get_timezone("Europe/Moscow"), get_timezone("Europe/Moscow")
+            )
+        self.assertEqual(str(get_timezone("Asia/Vladivostok")),
+                         "Asia/Vladivostok")
+        self.assertIsNone(get_timezone(""))
+        self.assertIsNone(get_timezone("Mars/Olympus"))
+        self.assertIsNone(get_timezone("../etc/passwd"))
+
+    def test_get_timezone_bounded(self):
+        for i in range(2000):
+            get_timezone(f"Nowhere/{i}")
+
+        info = get_timezone.cache_info()
+        self.assertLessEqual(info.currsize, info.maxsize)
+
+    def test_loaded_user(self):
+        request = RequestFactory().get("/")
+        self.assertIsNone(loaded_user(request))
+
+        request.user = SimpleLazyObject(AnonymousUser)
+        self.assertIsNone(loaded_user(request))
+
+        request.user.is_authenticated
+        self.assertIsInstance(loaded_user(request), SimpleLazyObject)
@@ -0,0 +1,168 @@
+import json
+
+from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchQuery
+from django.db import connection
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+from django.test import TestCase
+from django.utils import timezone
+
+from api.pagination import keyset_condition
+from bugtracker.deletion import CHUNK_SIZE
+from bugtracker.models import Project, Issue
+from bugtracker.snapshots import BOARD_ISSUES
+from bugtracker.views import BOARD_COLUMN_SIZE
+
+
+def seq_scans(plan: dict) -> list[str]:
+    """  Relations read by sequential scans anywhere in the plan  """
+
+    found = []
+    if plan["Node Type"] == "Seq Scan":
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found += seq_scans(child)
+
+    return found
+
+
+class QueryPlanTestCase(TestCase):
+    """
+    EXPLAIN of the hot queries of bugtracker/views.py and api/views.py.
+
+    On a small table Postgres prefers a sequential scan anyway,
+    so the plans are taken with enable_seqscan = off: the planner
+    still picks a sequential scan if no index matches the query.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        users = [
+            User.objects.create_user(
+                username=f"testing{i}", email=f"testemail{i}@gmail.com",
+                password="Password123#"
+                )
+            for i in range(3)
+            ]
+        projects = Project.objects.bulk_create([
+            Project(name=f"Testing{i}", key=f"TEST{i}", type="Fullstack",
+                    starred=i % 4 == 0, author_id=users[i % 3].id)
+            for i in range(15)
+            ])
+        statuses = [status for status, _ in Issue.ISSUE_STATUS]
+        Issue.objects.bulk_create([
+            Issue(project_id=project.id, title=f"Issue {project.key} {i}",
+                  description="Big Socks Just Big Socks",
+                  type="Bug", priority="Low", status=statuses[i % 3],
+                  author_id=project.author_id)
+            for project in projects for i in range(40)
+            ])
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"ANALYZE {Project._meta.db_table}, {Issue._meta.db_table}"
+                )
+
+        cls.user = users[0]
+        cls.project = projects[0]
+        cls.issue = Issue.objects.filter(project_id=cls.project.id).first()
+
+    def assertIndexed(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+        self.assertEqual(seq_scans(plan[0]["Plan"]), [], sql)
+
+    def test_board_last_modified(self):
+        self.assertIndexed(
+            Issue.objects.filter(project_id=self.project.id).
+            order_by("-updated")[:1]
+            )
+
+    def test_projects_last_modified(self):
+        self.assertIndexed(
+            Project.objects.filter(author_id=self.user.id).
+            order_by("-created")[:1]
+            )
+
+    def test_projects_list(self):
+        self.assertIndexed(Project.objects.filter(author_id=self.user.id))
+
+    def test_board_columns(self):
+        column_rank = Window(
+            RowNumber(),
+            partition_by=[F("status")],
+            order_by=[F("rank"), F("id")]
+            )
+        self.assertIndexed(
+            Issue.objects.
+            filter(project_id=self.project.id, author_id=self.user.id).
+            annotate(column_rank=column_rank).
+            filter(column_rank__lte=BOARD_COLUMN_SIZE + 1).
+            order_by("rank", "id").
+            values_list(*BOARD_ISSUES.fields)
+            )
+
+    def test_board_column(self):
+        rank = self.issue.rank
+        self.assertIndexed(
+            Issue.objects.
+            filter(project_id=self.project.id, author_id=self.user.id,
+                   status="To do").
+            filter(Q(rank__gt=rank) | Q(rank=rank, id__gt=self.issue.id)).
+            order_by("rank", "id").
+            only(*BOARD_ISSUES.fields)[:BOARD_COLUMN_SIZE + 1]
+            )
+
+    def test_issue_details(self):
+        self.assertIndexed(Issue.objects.filter(id=self.issue.id))
+
+    def test_search(self):
+        query = SearchQuery("socks", config="english")
+        self.assertIndexed(
+            Issue.objects.of_live_projects().
+            filter(author_id=self.user.id, search_en=query)
+            )
+        self.assertIndexed(
+            Project.objects.filter(author_id=self.user.id, search_en=query)
+            )
+
+    def test_api_projects_page(self):
+        ordering = [("starred", True), ("created", True), ("id", False)]
+        self.assertIndexed(
+            Project.objects.filter(author_id=self.user.id).
+            order_by("-starred", "-created", "id").
+            filter(keyset_condition(
+                ordering, [True, self.project.created, self.project.id]
+                ))[:11]
+            )
+
+    def test_api_issues_page(self):
+        ordering = [("project_id", False), ("id", False)]
+        self.assertIndexed(
+            Issue.objects.of_live_projects().
+            filter(author_id=self.user.id).
+            order_by("project_id", "id").
+            filter(keyset_condition(
+                ordering, [self.project.id, self.issue.id]
+                ))[:11]
+            )
+
+    def test_purge(self):
+        deadline = timezone.now()
+        self.assertIndexed(
+            Issue.all_objects.filter(deleted_at__lt=deadline).
+            values_list("id", flat=True)[:CHUNK_SIZE]
+            )
+        self.assertIndexed(
+            Issue.all_objects.filter(project__deleted_at__lt=deadline).
+            values_list("id", flat=True)[:CHUNK_SIZE]
+            )
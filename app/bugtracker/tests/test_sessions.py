@@ -0,0 +1,128 @@
+from unittest import mock
+
+import redis
+
+from django.contrib.sessions.backends import db
+from django.test import TestCase
+
+from app.sessions import SessionStore, get_redis
+
+
+class RedisSessionTestCase(TestCase):
+
+    def setUp(self):
+        self.redis = get_redis()
+        self.session = SessionStore()
+        self.session["user"] = "testing"
+        self.session.save()
+        self.key = SessionStore.redis_key(self.session.session_key)
+
+    def tearDown(self):
+        self.redis.delete(self.key)
+
+    def test_create_is_lazy(self):
+        session = SessionStore()
+        session.create()
+
+        self.assertFalse(session.exists(session.session_key))
+        session.save()
+        self.assertTrue(session.exists(session.session_key))
+        session.delete()
+
+    def test_round_trip(self):
+        session = SessionStore(self.session.session_key)
+
+        self.assertEqual(session["user"], "testing")
+        self.assertFalse(session.modified)
+
+    def test_unchanged_data_not_written(self):
+        session = SessionStore(self.session.session_key)
+        session["user"] = "testing"
+        self.redis.set(self.key, "written by another request")
+        session.save()
+
+        self.assertEqual(
+            self.redis.get(self.key), b"written by another request"
+            )
+
+    def test_changed_data_written(self):
+        session = SessionStore(self.session.session_key)
+        session["user"] = "other"
+        session.save()
+
+        self.assertEqual(
+            SessionStore(self.session.session_key)["user"], "other"
+            )
+
+    def test_expiry_refresh(self):
+        age = self.session.get_expiry_age()
+        self.redis.expire(self.key, 60)
+
+        session = SessionStore(self.session.session_key)
+        session.load()
+        self.assertTrue(session.modified)
+        session.save()
+
+        self.assertGreater(self.redis.ttl(self.key), age - 10)
+
+    def test_cycle_key(self):
+        old_key = self.session.session_key
+        self.session.cycle_key()
+
+        self.assertTrue(self.session.exists(old_key))
+        self.session.save()
+        self.assertFalse(self.session.exists(old_key))
+        self.assertEqual(
+            SessionStore(self.session.session_key)["user"], "testing"
+            )
+        self.redis.delete(SessionStore.redis_key(self.session.session_key))
+
+    def test_database_sessions(self):
+        old = db.SessionStore()
+        old["user"] = "from the database"
+        old.create()
+
+        session = SessionStore(old.session_key)
+        self.assertEqual(session["user"], "from the database")
+        session.save()
+        self.assertTrue(session.exists(old.session_key))
+        session.delete()
+
+    @mock.patch("app.sessions.DB_FALLBACK", True)
+    @mock.patch("app.sessions.get_redis", side_effect=redis.RedisError)
+    def test_database_fallback_cycle_key(self, get_redis):
+        old = db.SessionStore()
+        old["user"] = "testing"
+        old.create()
+
+        with self.assertLogs("app.sessions", "ERROR"):
+            session = SessionStore(old.session_key)
+            self.assertEqual(session["user"], "testing")
+        session.cycle_key()
+        session.save()
+
+        self.assertFalse(db.SessionStore().exists(old.session_key))
+        self.assertEqual(
+            db.SessionStore(session.session_key).load()["user"], "testing"
+            )
+
+    @mock.patch("app.sessions.DB_FALLBACK", True)
+    @mock.patch("app.sessions.get_redis")
+    def test_database_fallback_on_save(self, get_redis):
+        # Redis fails only when the new session is written
+        get_redis.return_value.pipeline.side_effect = redis.RedisError
+        session = SessionStore()
+        session["user"] = "testing"
+
+        with self.assertLogs("app.sessions", "ERROR"):
+            session.save()
+        old_key = session.session_key
+        session.cycle_key()
+        session.save()
+
+        # The database for the rest of the request
+        get_redis.return_value.pipeline.assert_called_once()
+        self.assertFalse(db.SessionStore().exists(old_key))
+        self.assertEqual(
+            db.SessionStore(session.session_key).load()["user"], "testing"
+            )
@@ -0,0 +1,68 @@
+import pickle
+import zlib
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from bugtracker import snapshots
+from bugtracker.models import Issue
+from bugtracker.snapshots import BOARD_ISSUES, API_ISSUES
+
+
+class SnapshotTestCase(SimpleTestCase):
+
+    def setUp(self):
+        now = timezone.now()
+        self.rows = [
+            (1, 1, "Issue", "Big Socks Just Big Socks", "Feature",
+             "Medium", "To do", -1.5, now, now),
+            (2, 2, "Issue2", "", "Bug", "High", "In Progress", 1024.0, now,
+             None),
+            ]
+
+    def test_round_trip(self):
+        rows = BOARD_ISSUES.decode(BOARD_ISSUES.encode(self.rows))
+
+        self.assertEqual([tuple(row) for row in rows], self.rows)
+        self.assertEqual(rows[0].title, "Issue")
+        self.assertEqual(rows[0].pk, 1)
+        self.assertEqual(str(rows[1]), "Issue2")
+
+    def test_empty(self):
+        self.assertEqual(BOARD_ISSUES.decode(BOARD_ISSUES.encode([])), [])
+
+    def test_other_schema_version(self):
+        data = BOARD_ISSUES.encode(self.rows)
+        payload = pickle.loads(zlib.decompress(data))
+        stale = zlib.compress(pickle.dumps(
+            (snapshots.SCHEMA_VERSION - 1, *payload[1:])
+            ))
+
+        self.assertIsNone(BOARD_ISSUES.decode(stale))
+
+    def test_other_fields(self):
+        data = BOARD_ISSUES.encode(self.rows)
+        self.assertIsNone(API_ISSUES.decode(data))
+
+    def test_garbage(self):
+        self.assertIsNone(BOARD_ISSUES.decode(b"not a snapshot"))
+
+    def test_serializable_value(self):
+        now = timezone.now()
+        row = API_ISSUES.decode(API_ISSUES.encode([
+            (1, 7, "Issue", "", 1, "Bug", "Low", "Done", now, now)
+            ]))[0]
+
+        self.assertEqual(row.serializable_value("project"), 7)
+        self.assertEqual(row.serializable_value("title"), "Issue")
+
+    def test_smaller_than_pickled_instances(self):
+        instances = [
+            Issue.from_db("default", BOARD_ISSUES.fields, row)
+            for row in self.rows * 50
+            ]
+        pickled = pickle.dumps(instances, pickle.HIGHEST_PROTOCOL)
+
+        self.assertLess(
+            len(BOARD_ISSUES.encode(self.rows * 50)), len(pickled)
+            )
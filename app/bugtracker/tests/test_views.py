@@ -1,20 +1,28 @@
 import re
 import json
+from unittest import mock
 
 # from django.core import mail
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchQuery
 from django.contrib.auth.tokens import default_token_generator
 from django.contrib.messages import get_messages
+from django.db import connection
 from django.test import RequestFactory, TestCase
 from django.urls import reverse
-from django.utils import translation
+from django.utils import timezone, translation
 from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_encode
 
-from bugtracker.models import Project, Issue
+from rest_framework.authtoken.models import Token
+
+from api.authentication import local_tokens
+from bugtracker import deletion, tasks
+from bugtracker.models import Project, Issue, SEARCH_CONFIGS, UserPreferences
+from bugtracker.preferences import COOKIE_NAME
 from bugtracker.views import (
-    last_modified_issue_of_project, last_created_project,
+    BOARD_COLUMN_SIZE, last_modified_issue_of_project, last_created_project,
     last_update_of_issue
     )
 
@@ -130,10 +138,37 @@ class SettingsTestCase(TestCase):
 
     def test_change_timezone(self):
         self.client.force_login(self.user)
-        data = {"timezone": "UTC"}
+        data = {"timezone": "Europe/Moscow"}
         response = self.client.post(reverse("settings"), data=data)
 
         self.assertRedirects(response, "/settings/")
+        self.assertEqual(
+            UserPreferences.objects.get(user=self.user).timezone,
+            "Europe/Moscow"
+            )
+        # Kept after the logout
+        self.client.logout()
+        self.client.force_login(self.user)
+        self.client.get(reverse("settings"))
+        response = self.client.get(reverse("settings"))
+        self.assertContains(
+            response, '<option value="Europe/Moscow" selected>'
+            )
+
+    def test_change_timezone_unknown(self):
+        self.client.force_login(self.user)
+        data = {"timezone": "Mars/Olympus"}
+        response = self.client.post(reverse("settings"), data=data)
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_preferences_cookie(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("settings"))
+        self.assertTrue(response.cookies[COOKIE_NAME].value)
+
+        response = self.client.get(reverse("logout"))
+        self.assertEqual(response.cookies[COOKIE_NAME].value, "")
 
     def test_change_language(self):
         self.client.force_login(self.user)
@@ -145,6 +180,10 @@ class SettingsTestCase(TestCase):
 
         self.assertRedirects(response, "/")
         self.assertEqual(response.headers["Content-Language"], "ru")
+        self.assertEqual(
+            UserPreferences.objects.get(user=self.user).language, "ru"
+            )
+        translation.activate(settings.LANGUAGE_CODE)
 
 
 class ProjectsTestCase(TestCase):
@@ -195,8 +234,8 @@ class ProjectsTestCase(TestCase):
         self.client.force_login(self.user)
         data = {
             "author": self.user.id,
-            "name": "Testing",
-            "key": "TEST",
+            "name": "testing",
+            "key": "test",
             "type": "Fullstack",
             "starred": 1
             }
@@ -213,6 +252,25 @@ class ProjectsTestCase(TestCase):
                          "Project with that key already exists"
                          )
 
+    def test_post_fail_key(self):
+        self.client.force_login(self.user)
+        data = {
+            "author": self.user.id,
+            "name": "New",
+            "key": "test",
+            "type": "Fullstack",
+            "starred": 1
+            }
+
+        response = self.client.post(reverse("projects"), data=data)
+        messages = list(get_messages(response.wsgi_request))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(remove_html(str(messages[0])),
+                         "Project with that key already exists"
+                         )
+
     def test_put_unfavorite(self):
         self.client.force_login(self.user)
         data = {"icon_id": f"star{self.project.id}", "icon_color": "grey"}
@@ -335,6 +393,136 @@ class BoardsTestCase(TestCase):
         self.assertEqual(issue_status, "In Progress")
 
 
+class BoardColumnsTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            first_name="Test", last_name="Test", username="testing",
+            email="testemail@gmail.com", password="Password123#"
+            )
+        cls.project = Project.objects.create(
+            name="Testing1", key="TEST1",
+            type="Fullstack", author_id=cls.user.id
+            )
+        Issue.objects.bulk_create([
+            Issue(
+                project_id=cls.project.id,
+                title=f"Issue {i}",
+                type="Feature",
+                priority="Medium",
+                status="Done" if i % 3 else "To do",
+                author_id=cls.user.id
+                )
+            for i in range(BOARD_COLUMN_SIZE * 2 + 5)
+            ])
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def get_columns(self):
+        response = self.client.get(reverse("boards", args=[self.project.id]))
+        return {
+            column["status"]: column for column in response.context["columns"]
+            }
+
+    def test_columns_are_capped(self):
+        columns = self.get_columns()
+
+        self.assertEqual(len(columns["To do"]["issues"]), 19)
+        self.assertIsNone(columns["To do"]["cursor"])
+        self.assertEqual(
+            len(columns["Done"]["issues"]), BOARD_COLUMN_SIZE
+            )
+        self.assertIsNotNone(columns["Done"]["cursor"])
+        self.assertEqual(columns["In progress"]["issues"], [])
+
+    def test_ranked_order(self):
+        issues = self.get_columns()["Done"]["issues"]
+        order = [(issue.rank, issue.id) for issue in issues]
+
+        self.assertEqual(order, sorted(order))
+
+    def test_load_column_pages(self):
+        column = self.get_columns()["Done"]
+        titles = [issue.title for issue in column["issues"]]
+        cursor = column["cursor"]
+
+        while cursor:
+            response = self.client.get(
+                reverse("board-column", args=[self.project.id]),
+                {"status": "Done", "cursor": cursor}
+                )
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            titles += re.findall(r"Issue \d+", remove_html(data["cards"]))
+            cursor = data["cursor"]
+
+        expected = Issue.objects.filter(
+            project_id=self.project.id, status="Done"
+            ).values_list("title", flat=True)
+        self.assertEqual(sorted(titles), sorted(expected))
+
+    def test_load_column_bad_request(self):
+        response = self.client.get(
+            reverse("board-column", args=[self.project.id]),
+            {"status": "Done", "cursor": "nope"}
+            )
+
+        self.assertEqual(response.status_code, 400)
+
+    def move(self, *moves):
+        return self.client.post(
+            reverse("board-moves", args=[self.project.id]),
+            data=json.dumps({"moves": [
+                {"issue_id": issue_id, "status": status, "rank": rank}
+                for issue_id, status, rank in moves
+                ]}),
+            content_type="application/json"
+            )
+
+    def test_move_between_cards(self):
+        first, second, third = self.get_columns()["Done"]["issues"][:3]
+        issue = self.get_columns()["To do"]["issues"][0]
+
+        response = self.move(
+            (issue.id, "Done", (first.rank + second.rank) / 2),
+            (third.id, "Done", first.rank - 1)
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["rebalanced"], [])
+        titles = [i.title for i in self.get_columns()["Done"]["issues"][:4]]
+        self.assertEqual(
+            titles, [third.title, first.title, issue.title, second.title]
+            )
+
+    def test_move_same_rank_rebalances(self):
+        first, second = self.get_columns()["Done"]["issues"][:2]
+
+        response = self.move((second.id, "Done", first.rank))
+
+        self.assertEqual(response.json()["rebalanced"], ["Done"])
+        ranks = Issue.objects.filter(
+            project_id=self.project.id, status="Done"
+            ).order_by("rank").values_list("rank", flat=True)
+        self.assertEqual(len(set(ranks)), len(ranks))
+        # The tie is broken by the id, as in the board queries
+        self.assertEqual(
+            [i.id for i in self.get_columns()["Done"]["issues"][:2]],
+            sorted([first.id, second.id])
+            )
+
+    def test_move_bad_request(self):
+        issue = Issue.objects.filter(project_id=self.project.id).first()
+
+        self.assertEqual(self.move((issue.id, "Lost", 1.0)).status_code, 400)
+        self.assertEqual(
+            self.move((issue.id, "Done", float("inf"))).status_code, 400
+            )
+        self.assertEqual(self.move((0, "Done", 1.0)).status_code, 404)
+
+
 class IssueDetailsTestCase(TestCase):
 
     @classmethod
@@ -481,7 +669,7 @@ class ProjectSettingsTestCase(TestCase):
 
     def test_post_fail(self):
         self.client.force_login(self.user)
-        data = {"name": "TestingII", "key": "TESTII"}
+        data = {"name": "testingII", "key": "testii"}
 
         response = self.client.post(
             path=reverse("project-settings", args=[self.project1.id]),
@@ -489,11 +677,25 @@ class ProjectSettingsTestCase(TestCase):
             )
 
         self.assertEqual(response.status_code, 200)
-        self.assertTrue(
-            b"Project with this Name already exists." in response.content
+        self.assertIn(
+            b"Project with this Name already exists.", response.content
             )
-        self.assertTrue(
-            b"Project with this Key already exists." in response.content
+        self.assertIn(
+            b"Project with this Key already exists.", response.content
+            )
+
+    def test_post_fail_key(self):
+        self.client.force_login(self.user)
+        data = {"name": "TestingI", "key": "testii"}
+
+        response = self.client.post(
+            path=reverse("project-settings", args=[self.project1.id]),
+            data=data
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            b"Project with this Key already exists.", response.content
             )
 
 
@@ -547,8 +749,8 @@ class AccountsTestCase(TestCase):
             "user_details": True,
             "first_name": "Test",
             "last_name": "Test",
-            "username": "testingII",
-            "email": "testemail2@gmail.com"
+            "username": "TestingII",
+            "email": "TestEmail2@gmail.com"
             }
 
         response = self.client.post(
@@ -565,6 +767,27 @@ class AccountsTestCase(TestCase):
                          "User with this Email address already exists."
                          )
 
+    def test_post_email_fail(self):
+        self.client.force_login(self.user)
+        data = {
+            "user_details": True,
+            "first_name": "Test",
+            "last_name": "Test",
+            "username": "testing",
+            "email": "TestEmail2@gmail.com"
+            }
+
+        response = self.client.post(
+            path=reverse("accounts", args=[self.user.id]), data=data
+            )
+        messages = list(get_messages(response.wsgi_request))
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(remove_html(str(messages[0])),
+                         "User with this Email address already exists."
+                         )
+
     def test_post_password_success(self):
         self.client.force_login(self.user)
         data = {
@@ -688,6 +911,72 @@ class SearchResultsTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, "search-results.html")
 
+    def test_results(self):
+        project = Project.objects.create(
+            name="Socks", key="SOCKS", type="Fullstack",
+            author_id=self.user.id
+            )
+        Issue.objects.create(
+            project_id=project.id,
+            title="Issue",
+            description="Big Socks Just Big Socks",
+            type="Feature",
+            priority="Medium",
+            status="To do",
+            author_id=self.user.id
+            )
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse("search-results", args=["socks"]))
+
+        self.assertEqual(len(response.context["results_projects"]), 1)
+        self.assertEqual(len(response.context["results_issues"]), 1)
+
+    def test_russian_results(self):
+        project = Project.objects.create(
+            name="Носки", key="NOSKI", type="Fullstack",
+            author_id=self.user.id
+            )
+        Issue.objects.create(
+            project_id=project.id,
+            title="Задача",
+            description="Большие носки",
+            type="Feature",
+            priority="Medium",
+            status="To do",
+            author_id=self.user.id
+            )
+        self.client.force_login(self.user)
+
+        response = self.client.get(
+            reverse("search-results", args=["носки"]),
+            HTTP_ACCEPT_LANGUAGE="ru"
+            )
+
+        self.assertEqual(len(response.context["results_issues"]), 1)
+
+    def test_gin_index_is_used(self):
+        # Seq scan is always cheaper on a few rows, so it's disabled
+        # to check that the search condition can use the index at all.
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+
+        for model, language in (
+                (Project, "en"), (Project, "ru"),
+                (Issue, "en"), (Issue, "ru")
+                ):
+            query = SearchQuery(
+                "socks", config=SEARCH_CONFIGS[language],
+                search_type="websearch"
+                )
+            plan = model.objects.filter(
+                **{f"search_{language}": query}
+                ).explain()
+
+            self.assertIn(
+                f"{model.__name__.lower()}_search_{language}_idx", plan
+                )
+
 
 class LoginTestCase(TestCase):
 
@@ -819,8 +1108,8 @@ class RegisterTestCase(TestCase):
         data = {
             "first_name": "First",
             "last_name": "Last",
-            "username": "testing",
-            "email": "testemail@gmail.com",
+            "username": "Testing",
+            "email": "TestEmail@gmail.com",
             "password1": "Test123#",
             "password2": "Test123#"
             }
@@ -831,6 +1120,22 @@ class RegisterTestCase(TestCase):
         self.assertTemplateUsed(response, "register.html")
         self.assertIn(b"That username already exists", response.content)
         self.assertIn(b"That email already exists", response.content)
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_post_email_fail(self):
+        data = {
+            "first_name": "First",
+            "last_name": "Last",
+            "username": "newuser",
+            "email": "TestEmail@gmail.com",
+            "password1": "Test123#",
+            "password2": "Test123#"
+            }
+
+        response = self.client.post(reverse("register"), data=data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"That email already exists", response.content)
 
 
 class RegisterConfirmTestCase(TestCase):
@@ -986,6 +1291,12 @@ class DeleteProjectTestCase(TestCase):
             name="Testing1", key="TEST1",
             type="Fullstack", author_id=cls.user.id
             )
+        Issue.objects.bulk_create([
+            Issue(project_id=cls.project.id, title=f"Issue {i}",
+                  type="Bug", priority="Low", status="To do",
+                  author_id=cls.user.id)
+            for i in range(3)
+            ])
 
     def test_call_view_anonymous(self):
         response = self.client.get(
@@ -1007,7 +1318,68 @@ class DeleteProjectTestCase(TestCase):
 
         self.assertEqual(response.status_code, 302)
         self.assertEqual(len(messages), 1)
-        self.assertEqual(remove_html(str(messages[0])), "Project deleted!")
+        self.assertEqual(
+            remove_html(str(messages[0])), "Project deleted! Undo"
+            )
+        self.assertFalse(Project.objects.filter(id=self.project.id).exists())
+        # Kept until the purge
+        self.assertTrue(
+            Project.all_objects.filter(id=self.project.id).exists()
+            )
+        self.assertFalse(
+            Issue.objects.of_live_projects().
+            filter(project_id=self.project.id).exists()
+            )
+
+    def test_restore(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse("delete-project", args=[self.project.id]))
+
+        response = self.client.get(
+            reverse("restore-project", args=[self.project.id])
+            )
+
+        self.assertRedirects(
+            response, reverse("boards", args=[self.project.id]),
+            fetch_redirect_response=False
+            )
+        self.assertTrue(Project.objects.filter(id=self.project.id).exists())
+        self.assertEqual(
+            Issue.objects.of_live_projects().
+            filter(project_id=self.project.id).count(), 3
+            )
+
+    def test_restore_name_taken(self):
+        Project.objects.filter(id=self.project.id).soft_delete()
+        Project.objects.create(
+            name="Testing1", key="TEST2",
+            type="Fullstack", author_id=self.user.id
+            )
+        self.client.force_login(self.user)
+
+        response = self.client.get(
+            reverse("restore-project", args=[self.project.id])
+            )
+        messages = list(get_messages(response.wsgi_request))
+
+        self.assertEqual(str(messages[0]), "That project already exists")
+        self.assertFalse(Project.objects.filter(id=self.project.id).exists())
+
+    @mock.patch("bugtracker.deletion.CHUNK_SIZE", 2)
+    def test_purge(self):
+        Project.objects.filter(id=self.project.id).soft_delete()
+        self.assertEqual(tasks.purge_deleted(), 0)
+
+        Project.all_objects.filter(id=self.project.id).update(
+            deleted_at=timezone.now() - deletion.UNDO_WINDOW
+            )
+        self.assertEqual(tasks.purge_deleted(), 3)
+        self.assertFalse(
+            Project.all_objects.filter(id=self.project.id).exists()
+            )
+        self.assertFalse(
+            Issue.all_objects.filter(project_id=self.project.id).exists()
+            )
 
 
 class DeleteIssueTestCase(TestCase):
@@ -1050,7 +1422,41 @@ class DeleteIssueTestCase(TestCase):
 
         self.assertEqual(response.status_code, 302)
         self.assertEqual(len(messages), 1)
-        self.assertEqual(remove_html(str(messages[0])), "Issue deleted!")
+        self.assertEqual(remove_html(str(messages[0])), "Issue deleted! Undo")
+        self.assertFalse(Issue.objects.filter(id=self.issue.id).exists())
+
+    def test_restore(self):
+        Issue.objects.filter(id=self.issue.id).soft_delete()
+        self.client.force_login(self.user)
+
+        response = self.client.get(
+            reverse("restore-issue", args=[self.project.id, self.issue.id])
+            )
+        messages = list(get_messages(response.wsgi_request))
+
+        self.assertEqual(str(messages[0]), "Issue restored!")
+        self.assertTrue(Issue.objects.filter(id=self.issue.id).exists())
+
+    def test_restore_after_undo_window(self):
+        Issue.objects.filter(id=self.issue.id).update(
+            deleted_at=timezone.now() - deletion.UNDO_WINDOW
+            )
+        self.client.force_login(self.user)
+
+        response = self.client.get(
+            reverse("restore-issue", args=[self.project.id, self.issue.id])
+            )
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_purge(self):
+        Issue.objects.filter(id=self.issue.id).update(
+            deleted_at=timezone.now() - deletion.UNDO_WINDOW
+            )
+
+        self.assertEqual(deletion.purge(), 1)
+        self.assertFalse(Issue.all_objects.filter(id=self.issue.id).exists())
+        self.assertTrue(Project.objects.filter(id=self.project.id).exists())
 
 
 class DeleteAccountTestCase(TestCase):
@@ -1083,3 +1489,41 @@ class DeleteAccountTestCase(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertEqual(len(messages), 1)
         self.assertEqual(remove_html(str(messages[0])), "Account deleted!")
+        self.assertFalse(User.objects.filter(id=self.user.id).exists())
+
+    @mock.patch("bugtracker.deletion.LARGE_DELETION", 0)
+    def test_large_account(self):
+        project = Project.objects.create(
+            name="Testing1", key="TEST1",
+            type="Fullstack", author_id=self.user.id
+            )
+        Issue.objects.create(
+            project_id=project.id, title="Issue", type="Bug",
+            priority="Low", status="To do", author_id=self.user.id
+            )
+        self.client.force_login(self.user)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.get(reverse("delete-account", args=[self.user.id]))
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertEqual(len(callbacks), 1)
+
+        tasks.delete_account(self.user.id)
+        self.assertFalse(User.objects.filter(id=self.user.id).exists())
+        self.assertFalse(Project.objects.filter(id=project.id).exists())
+
+    @mock.patch("bugtracker.deletion.LARGE_DELETION", 0)
+    def test_large_account_api_token(self):
+        local_tokens.clear()
+        token = Token.objects.get(user=self.user)
+        auth = {"HTTP_AUTHORIZATION": "Token " + token.key}
+        # The token is cached by the first request
+        response = self.client.get(reverse("project-list"), **auth)
+        self.assertEqual(response.status_code, 200)
+
+        self.client.force_login(self.user)
+        self.client.get(reverse("delete-account", args=[self.user.id]))
+
+        response = self.client.get(reverse("project-list"), **auth)
+        self.assertEqual(response.status_code, 401)
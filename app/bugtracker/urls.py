@@ -7,6 +7,15 @@ urlpatterns = [
     path("", views.projects, name="projects"),
     path("settings/", views.settings, name="settings"),
     path("boards/<int:project_id>/", views.boards, name="boards"),
+    path("boards/<int:project_id>/column/", views.board_column,
+         name="board-column"
+         ),
+    path("boards/<int:project_id>/moves/", views.board_moves,
+         name="board-moves"
+         ),
+    path("boards/<int:project_id>/events/", views.board_events,
+         name="board-events"
+         ),
     path("boards/<int:project_id>/project-settings/", views.project_settings,
          name="project-settings"
          ),
@@ -39,9 +48,15 @@ urlpatterns = [
     path("delete-project/<int:project_id>/", views.delete_project,
          name="delete-project"
          ),
+    path("restore-project/<int:project_id>/", views.restore_project,
+         name="restore-project"
+         ),
     path("delete-issue/<int:project_id>/<int:issue_id>/", views.delete_issue,
          name="delete-issue"
          ),
+    path("restore-issue/<int:project_id>/<int:issue_id>/",
+         views.restore_issue, name="restore-issue"
+         ),
     path("delete-account/<int:user_id>/", views.delete_account,
          name="delete-account"
          ),
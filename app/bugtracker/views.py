@@ -1,5 +1,6 @@
 import os
 import json
+import math
 
 from dotenv import load_dotenv
 
@@ -11,22 +12,34 @@ from django.contrib.auth import (
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib.auth.tokens import default_token_generator
-from django.contrib.postgres.search import SearchQuery, SearchVector
-from django.core.cache import cache
+from django.contrib.postgres.search import SearchQuery
 from django.core.exceptions import ObjectDoesNotExist, BadRequest
 from django.core.paginator import Paginator
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
 from django.contrib.sites.shortcuts import get_current_site
 from django.shortcuts import render, redirect, get_object_or_404
 from django.template.loader import render_to_string
-from django.http import JsonResponse
-from django.views.decorators.http import condition
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.views.decorators.http import condition, require_POST
 from django.utils import timezone
-from django.utils.encoding import force_bytes
-from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
-from django.utils.translation import gettext as _
+from django.utils.html import format_html
+from django.utils.http import urlsafe_base64_decode
+from django.utils.translation import (
+    check_for_language, gettext as _, gettext_lazy
+    )
+from django.views import i18n
 
-from .tasks import send_email
-from .models import Issue, Project
+from .events import board_stream, publish_issue_event
+from . import deletion, tasks
+from .models import (
+    ISSUE_COUNTERS, Issue, Project, SEARCH_CONFIGS, top_rank
+    )
+from .generations import PROJECT, USER, get_generation, versioned_key
+from .preferences import get_timezone, set_preferences
+from .snapshots import BOARD_ISSUES, PROJECTS_LIST
 from .forms import (
     RegisterForm,
     LoginForm,
@@ -44,6 +57,18 @@ from .forms import (
 load_dotenv()
 
 
+# Issues rendered in every board column before it's scrolled
+BOARD_COLUMN_SIZE = 25
+# Moves applied by one request of the board_moves view
+BOARD_MOVES_MAX = 100
+
+BOARD_COLUMNS = [
+    ("To do", gettext_lazy("TO DO")),
+    ("In progress", gettext_lazy("IN PROGRESS")),
+    ("Done", gettext_lazy("DONE")),
+    ]
+
+
 def last_modified_issue_of_project(request, project_id):
     try:
         return (
@@ -68,8 +93,26 @@ def last_created_project(request):
         return None
 
 
+def projects_etag(request):
+    # The issue counters of the projects change without a new project
+    if request.user.is_authenticated:
+        generation = get_generation(USER, request.user.id)
+        return f"{generation}-{request.LANGUAGE_CODE}"
+
+    return None
+
+
 def last_update_of_issue(request, project_id, issue_id):
-    return Issue.objects.only("updated").get(id=issue_id).updated
+    issue = Issue.objects.only("updated").filter(id=issue_id).first()
+    return issue.updated if issue is not None else None
+
+
+def undo_message(message: str, url: str) -> str:
+    """  Message with a link that restores the deleted object  """
+
+    return format_html(
+        '{} <a href="{}" class="alert-link">{}</a>', message, url, _("Undo")
+        )
 
 
 @login_required(login_url="/login/")
@@ -85,7 +128,11 @@ def settings(request):
 
     if request.method == "POST":
         if "timezone" in request.POST:
-            request.session["django_timezone"] = request.POST["timezone"]
+            tzname = request.POST["timezone"]
+            if get_timezone(tzname) is None:
+                raise BadRequest("Unknown time zone")
+
+            set_preferences(user_id, timezone=tzname)
             messages.info(
                 request,
                 _("Use the 'Shift+F5' combination on the projects "
@@ -96,16 +143,27 @@ def settings(request):
         return render(request, "settings.html", context=context)
 
 
-@condition(last_modified_func=last_created_project)
+def set_language(request):
+    """  Django's set_language that keeps the language of the user too  """
+
+    response = i18n.set_language(request)
+
+    language = request.POST.get("language")
+    if (request.method == "POST" and request.user.is_authenticated
+            and language and check_for_language(language)):
+        set_preferences(request.user.id, language=language)
+
+    return response
+
+
+@condition(etag_func=projects_etag, last_modified_func=last_created_project)
 @login_required(login_url="/login/")
 def projects(request):
 
     user_id = request.user.id
-    projects_list = cache.get_or_set(
-        f"projects_list_{user_id}",
-        Project.objects.
-        filter(author_id=user_id).
-        only("id", "name", "key", "type", "starred", "created")
+    projects_list = PROJECTS_LIST.get_or_set(
+        versioned_key("projects_list", USER, user_id),
+        Project.objects.filter(author_id=user_id)
         )
 
     paginator = Paginator(projects_list, 9)
@@ -123,15 +181,17 @@ def projects(request):
         if project_modal_form.is_valid():
             cd = project_modal_form.cleaned_data
 
-            Project.objects.create(
+            project = project_modal_form.save_or_error(
+                Project.objects.create,
                 author_id=user_id,
-                name=cd["name"].capitalize(),
-                key=cd["key"].upper(),
+                name=cd["name"],
+                key=cd["key"],
                 type=cd["type"],
                 starred=cd["starred"]
                 )
-            messages.success(request, _("Project created!"))
-            return redirect("projects")
+            if project is not None:
+                messages.success(request, _("Project created!"))
+                return redirect("projects")
 
         context["project_modal_form"] = project_modal_form
 
@@ -160,29 +220,74 @@ def projects(request):
     return render(request, "projects.html", context)
 
 
+def board_cursor(issue) -> str:
+    """  Position of the card in its column, see board_column()  """
+    return f"{issue.rank!r}_{issue.id}"
+
+
+def board_columns(
+        project_id: int, user_id: int, counts: dict[str, int]
+        ) -> list[dict]:
+    """
+    Returns the issues grouped by status in the order of their ranks,
+    "counts" are the numbers of the issues of the statuses.
+
+    Only the first BOARD_COLUMN_SIZE issues of every column are taken
+    (plus one to know if there are more), the rest are loaded
+    by the board_column view when the column is scrolled.
+    """
+
+    column_rank = Window(
+        RowNumber(),
+        partition_by=[F("status")],
+        order_by=[F("rank"), F("id")]
+        )
+    rows = BOARD_ISSUES.get_or_set(
+        versioned_key("all_issues", PROJECT, project_id),
+        Issue.objects.
+        filter(project_id=project_id, author_id=user_id).
+        annotate(column_rank=column_rank).
+        filter(column_rank__lte=BOARD_COLUMN_SIZE + 1).
+        order_by("rank", "id")
+        )
+
+    issues = {status: [] for status, _title in BOARD_COLUMNS}
+    for row in rows:
+        if row.status in issues:
+            issues[row.status].append(row)
+
+    columns = []
+    for status, title in BOARD_COLUMNS:
+        column = issues[status]
+        has_more = len(column) > BOARD_COLUMN_SIZE
+        column = column[:BOARD_COLUMN_SIZE]
+        columns.append({
+            "status": status,
+            "title": title,
+            "count": counts.get(status, 0),
+            "issues": column,
+            "cursor": board_cursor(column[-1]) if has_more else None
+            })
+
+    return columns
+
+
 @condition(last_modified_func=last_modified_issue_of_project)
 @login_required(login_url="/login/")
 def boards(request, project_id):
 
     user_id = request.user.id
     project = get_object_or_404(
-        Project.objects.only("name", "key", "starred"),
+        Project.objects.only(
+            "name", "key", "starred", *ISSUE_COUNTERS.values()
+            ),
         id=project_id, author_id=user_id
         )
-    all_issues = cache.get_or_set(
-        f"all_issues_{project_id}",
-        Issue.objects.
-        filter(project_id=project_id, author_id=user_id).
-        only("id", "key", "title", "description", "type",
-             "priority", "status", "created", "updated"
-             )
-        )
-
     context = {
         "project": project,
         "user_id": user_id,
         "project_id": project_id,
-        "issues_list": all_issues
+        "columns": board_columns(project_id, user_id, project.issue_counts())
         }
 
     if request.method == "POST":
@@ -191,30 +296,19 @@ def boards(request, project_id):
         if issue_modal_form.is_valid():
             cd = issue_modal_form.cleaned_data
 
-        # Take the key of the last issue to use it
-        # to set the key for the next one
-            try:
-                latest_key = (
-                    Issue.objects.
-                    filter(project_id=project_id).
-                    only("key").
-                    latest("key").key
-                    )
-            except ObjectDoesNotExist:
-                latest_key = 0
-
-            Issue.objects.create(
+            issue = issue_modal_form.save_or_error(
+                Issue.objects.create,
                 project=cd["project"],
-                key=latest_key + 1,
-                title=cd["title"].capitalize(),
+                title=cd["title"],
                 description=cd["description"],
                 type=cd["type"],
                 priority=cd["priority"],
                 status="To do",
                 author_id=user_id
                 )
-            messages.success(request, _("Issue created!"))
-            return redirect("boards", project_id)
+            if issue is not None:
+                messages.success(request, _("Issue created!"))
+                return redirect("boards", project_id)
 
         context["issue_modal_form"] = issue_modal_form
 
@@ -225,11 +319,15 @@ def boards(request, project_id):
     elif request.method == "PUT":
         data = json.load(request)
         target = data["target"]
-        issue = Issue.objects.only("id", "status").get(id=data["issue_id"])
+        # The signals need the project and the author of the issue
+        issue = Issue.objects.only(
+            "id", "status", "project_id", "author_id"
+            ).get(id=data["issue_id"])
 
         if issue.status != target:
             issue.status = target
-            issue.save(update_fields=["status", "updated"])
+            issue.rank = top_rank()
+            issue.save(update_fields=["status", "rank", "updated"])
 
             status = _("Status:")
             updated = _("Updated:")
@@ -253,6 +351,159 @@ def boards(request, project_id):
     return render(request, "boards.html", context)
 
 
+@login_required(login_url="/login/")
+def board_column(request, project_id):
+    """  Next page of a board column, requested when it's scrolled  """
+
+    user_id = request.user.id
+    status = request.GET.get("status")
+    rank, _sep, issue_id = request.GET.get("cursor", "").rpartition("_")
+
+    if status not in dict(Issue.ISSUE_STATUS):
+        raise BadRequest("Unknown status")
+    try:
+        rank = float(rank)
+        issue_id = int(issue_id)
+    except ValueError:
+        raise BadRequest("Invalid cursor")
+    if not math.isfinite(rank):
+        raise BadRequest("Invalid cursor")
+
+    project = get_object_or_404(
+        Project.objects.only("key"),
+        id=project_id, author_id=user_id
+        )
+    issues = list(
+        Issue.objects.
+        filter(project_id=project_id, author_id=user_id, status=status).
+        filter(Q(rank__gt=rank) | Q(rank=rank, id__gt=issue_id)).
+        order_by("rank", "id").
+        only(*BOARD_ISSUES.fields)[:BOARD_COLUMN_SIZE + 1]
+        )
+    has_more = len(issues) > BOARD_COLUMN_SIZE
+    issues = issues[:BOARD_COLUMN_SIZE]
+
+    context = {
+        "project": project,
+        "project_id": project_id,
+        "issues": issues
+        }
+
+    return JsonResponse({
+        "cards": render_to_string("board-cards.html", context, request),
+        "modals": render_to_string("board-issue.html", context, request),
+        "cursor": board_cursor(issues[-1]) if has_more else None
+        })
+
+
+def parse_board_moves(request) -> dict[int, tuple[str, float]]:
+    """
+    {"moves": [{"issue_id": 1, "status": "Done", "rank": 1.5}, ...]}
+    -> {1: ("Done", 1.5)}, the last move of an issue wins.
+    """
+
+    try:
+        moves = json.loads(request.body)["moves"]
+        if not isinstance(moves, list):
+            raise TypeError
+        parsed = {
+            int(move["issue_id"]): (move["status"], float(move["rank"]))
+            for move in moves
+            }
+    except (ValueError, TypeError, KeyError):
+        raise BadRequest("Invalid moves")
+
+    if not 0 < len(moves) <= BOARD_MOVES_MAX:
+        raise BadRequest(f"Send 1 to {BOARD_MOVES_MAX} moves")
+    for status, rank in parsed.values():
+        if status not in dict(Issue.ISSUE_STATUS):
+            raise BadRequest("Unknown status")
+        if not math.isfinite(rank):
+            raise BadRequest("Invalid rank")
+
+    return parsed
+
+
+@require_POST
+@login_required(login_url="/login/")
+def board_moves(request, project_id):
+    """
+    Applies the card moves of the board in one transaction.
+
+    The browser collects the drags of a moment and sends them together,
+    every move sets the status and the rank of one issue. The rank is
+    between the ranks of the new neighbours of the card, so the other
+    issues of the column stay as they are.
+    """
+
+    user_id = request.user.id
+    moves = parse_board_moves(request)
+
+    with transaction.atomic():
+        issues = Issue.objects.filter(
+            project_id=project_id, author_id=user_id
+            ).only(
+            "id", "status", "rank", "project_id", "author_id"
+            ).select_for_update().in_bulk(list(moves))
+        if len(issues) != len(moves):
+            raise Http404
+
+        now = timezone.now()
+        for issue_id, (status, rank) in moves.items():
+            issue = issues[issue_id]
+            issue.status = status
+            issue.rank = rank
+            issue.updated = now
+
+        Issue.objects.bulk_update(
+            issues.values(), ["status", "rank", "updated"]
+            )
+        # Two cards dropped between the same neighbours, or the ranks
+        # ran out of precision: renumber the column once
+        rebalanced = Issue.objects.rebalance_ranks(
+            project_id, {issue.rank for issue in issues.values()}
+            )
+        for issue in issues.values():
+            publish_issue_event("save", issue)
+
+    updated_time = timezone.localtime(now)
+    return JsonResponse({
+        "status": _("Status:"),
+        "updated": _("Updated:"),
+        "updated_time": updated_time,
+        # The ranks in the browser are out of date, it reloads the board
+        "rebalanced": rebalanced,
+        "issues": [
+            {"id": issue.id, "source": _(issue.status)}
+            for issue in issues.values()
+            ]
+        })
+
+
+@login_required(login_url="/login/")
+async def board_events(request, project_id):
+    """
+    Server-Sent Events with the changes of the board issues.
+
+    It's an async view: under the ASGI app a stream is a coroutine
+    waiting for Redis, not a worker held for the whole connection.
+    """
+
+    user = await request.auser()
+    if not await Project.objects.filter(
+            id=project_id, author_id=user.id).aexists():
+        raise Http404
+
+    response = StreamingHttpResponse(
+        board_stream(project_id), content_type="text/event-stream"
+        )
+    response["Cache-Control"] = "no-cache"
+    # Don't let nginx buffer the events
+    response["X-Accel-Buffering"] = "no"
+
+    return response
+
+
 @condition(last_modified_func=last_update_of_issue)
 @login_required(login_url="/login/")
 def issue_details(request, project_id, issue_id):
@@ -283,9 +534,10 @@ def issue_details(request, project_id, issue_id):
             )
 
         if issue_details_form.is_valid():
-            issue_details_form.save()
-            issue = Issue.objects.get(id=issue_id)
-            issue.save()
+            saved = issue_details_form.save_or_error(issue_details_form.save)
+            if saved is not None:
+                issue = Issue.objects.get(id=issue_id)
+                issue.save()
 
         context["issue_details_form"] = issue_details_form
 
@@ -332,7 +584,7 @@ def project_settings(request, project_id):
             )
 
         if project_form.is_valid():
-            project_form.save()
+            project_form.save_or_error(project_form.save)
 
         context["project_form"] = project_form
 
@@ -366,7 +618,7 @@ def accounts(request, user_id):
             user_form = UserForm(request.POST or None, instance=user)
 
             if user_form.is_valid():
-                user_form.save()
+                user_form.save_or_error(user_form.save)
 
             context["user_form"] = user_form
 
@@ -437,30 +689,27 @@ def search(request):
 @login_required(login_url="/login/")
 def search_results(request, q):
 
-    if request.LANGUAGE_CODE == "ru":
-        config = "russian"
-    else:
-        config = "english"
-
-    query = SearchQuery(q, config=config, search_type="websearch")
-    user_id = request.user.id
+    # Stored, GIN-indexed vector of the current language
+    language = request.LANGUAGE_CODE
+    if language not in SEARCH_CONFIGS:
+        language = "en"
 
-    project_vector = SearchVector("name", "key", "type", config=config)
-    issue_vector = SearchVector(
-        "title", "description", "type", "priority", "status",
-        config=config
+    query = SearchQuery(
+        q, config=SEARCH_CONFIGS[language], search_type="websearch"
         )
+    search_field = f"search_{language}"
+    user_id = request.user.id
 
     results_projects = (
         Project.objects.
-        annotate(search=project_vector).
-        filter(search=query, author_id=user_id)
+        filter(author_id=user_id, **{search_field: query}).
+        only("id", "name")
         )
 
     results_issues = (
-        Issue.objects.
-        annotate(search=issue_vector).
-        filter(search=query, author_id=user_id)
+        Issue.objects.of_live_projects().
+        filter(author_id=user_id, **{search_field: query}).
+        only("id", "project_id", "title")
         )
 
     context = {
@@ -512,30 +761,27 @@ def register(request):
     if request.method == "POST":
         register_form = RegisterForm(request.POST)
 
+        user = None
         if register_form.is_valid():
-            user = register_form.save(commit=False)
+            user = register_form.save_or_error(register_form.save)
+
+        if user is not None:
             user.is_active = False
             user.save()
 
             current_site = get_current_site(request)
-            mail_subject = _("Activation link has been sent to your email")
             token = default_token_generator.make_token(user)
-            uid = urlsafe_base64_encode(force_bytes(user.pk))
 
             if request.LANGUAGE_CODE == "ru":
                 page = "register-activate-ru.html"
             else:
                 page = "register-activate-en.html"
 
-            body = render_to_string(page, {
-                "user": user,
-                "domain": current_site.domain,
-                "uid": uid,
-                "token": token
-                })
-
-            to_email = register_form.cleaned_data.get("email")
-            send_email.delay_on_commit(mail_subject, body, [to_email])
+            # The worker renders the email
+            tasks.send_user_email.delay_on_commit(
+                user.id, token, request.LANGUAGE_CODE,
+                "register-activate-subject.txt", page, current_site.domain
+                )
             messages.success(
                 request,
                 _("Almost done! Check your email "
@@ -634,39 +880,101 @@ def password_reset_confirm(request, uidb64, token):
 @login_required(login_url="/login/")
 def delete_project(request, project_id):
 
-    try:
-        project = Project.objects.get(id=project_id, author_id=request.user.id)
-    except ObjectDoesNotExist:
+    projects = Project.objects.filter(id=project_id, author_id=request.user.id)
+    if not projects.soft_delete():
         raise BadRequest("Attempt to delete someone else's project")
-    project.delete()
 
-    messages.success(request, _("Project deleted!"))
+    messages.success(request, undo_message(
+        _("Project deleted!"), reverse("restore-project", args=[project_id])
+        ))
 
     return redirect("projects")
 
 
 @login_required(login_url="/login/")
-def delete_issue(request, project_id, issue_id):
+def restore_project(request, project_id):
 
+    project = Project.all_objects.filter(
+        id=project_id, author_id=request.user.id,
+        deleted_at__gte=deletion.undo_deadline()
+        ).first()
+    if project is None:
+        raise BadRequest("Attempt to restore someone else's project")
+
+    project.deleted_at = None
     try:
-        issue = Issue.objects.get(id=issue_id, author_id=request.user.id)
-    except ObjectDoesNotExist:
+        with transaction.atomic():
+            project.save(update_fields=["deleted_at"])
+    except IntegrityError:
+        # Its name or key was taken after the deletion
+        messages.error(request, _("That project already exists"))
+        return redirect("projects")
+
+    messages.success(request, _("Project restored!"))
+
+    return redirect("boards", project_id)
+
+
+@login_required(login_url="/login/")
+def delete_issue(request, project_id, issue_id):
+
+    issues = Issue.objects.filter(id=issue_id, author_id=request.user.id)
+    if not issues.soft_delete():
         raise BadRequest("Attempt to delete someone else's issue")
-    issue.delete()
 
-    messages.success(request, _("Issue deleted!"))
+    messages.success(request, undo_message(
+        _("Issue deleted!"),
+        reverse("restore-issue", args=[project_id, issue_id])
+        ))
 
     return redirect("boards", project_id)
 
 
+@login_required(login_url="/login/")
+def restore_issue(request, project_id, issue_id):
+
+    issue = Issue.all_objects.filter(
+        id=issue_id, author_id=request.user.id,
+        deleted_at__gte=deletion.undo_deadline()
+        ).first()
+    if issue is None:
+        raise BadRequest("Attempt to restore someone else's issue")
+
+    issue.deleted_at = None
+    try:
+        with transaction.atomic():
+            # "updated" changes the Last-Modified of the board
+            issue.save(update_fields=["deleted_at", "updated"])
+    except IntegrityError:
+        messages.error(request, _("Issue with that title already exists"))
+        return redirect("boards", project_id)
+
+    messages.success(request, _("Issue restored!"))
+
+    return redirect("issue-details", project_id, issue_id)
+
+
 @login_required(login_url="/login/")
 def delete_account(request, user_id):
 
     if user_id != request.user.id:
         raise BadRequest("Attempt to delete someone else's account")
 
-    user = User.objects.get(id=user_id)
-    user.delete()
+    if deletion.is_large(Issue.all_objects.filter(author_id=user_id)):
+        # Can't log in while the task deletes the issues. Saved, not
+        # updated, for the signal that drops the cached API tokens
+        request.user.is_active = False
+        request.user.save(update_fields=["is_active"])
+        tasks.delete_account.delay_on_commit(user_id)
+        logout(request)
+        messages.info(
+            request, _("The account will be deleted in a few minutes.")
+            )
+        return redirect("login")
+
+    Project.all_objects.filter(author_id=user_id).delete_cascading()
+    # Only the small rows are left for the collector: token, preferences
+    User.objects.get(id=user_id).delete()
 
     messages.success(request, _("Account deleted!"))
 
@@ -16,69 +16,259 @@ function getCookie(name) {
 const csrftoken = getCookie("csrftoken");
 
 
-const draggables = document.querySelectorAll('.card.mb-2')
 const containers = document.querySelectorAll('.card-body.droppable')
+const modals = document.getElementById('board-modals')
+const board = document.getElementById('board');
 
-var source;  // Get source status
-var target;  // Get target status
-var url;     // Get url for fetch API
+const RANK_STEP = 1024;       // Gap between the ranks, see Issue.rank
+const MOVES_DELAY = 300;      // Drags of this many ms are sent together
 
-draggables.forEach(draggable => {
-  draggable.addEventListener('dragstart', () => {
+var pendingMoves = new Map();  // Issue id -> its last move, not sent yet
+var movesTimer = null;
 
-    draggable.classList.add('dragging');
-	url = draggable.getAttribute("data");
-	source = draggable.parentElement.id;
-  });
+// Cards of the next pages are added later, so the listener is on the document
+document.addEventListener('dragstart', e => {
+	const draggable = e.target.closest('.card.mb-2');
+	if (!draggable) {
+		return;
+	}
+
+	draggable.classList.add('dragging');
 });
 
+document.addEventListener('dragend', e => {
+	const draggable = e.target.closest('.card.mb-2');
+	if (draggable) {
+		draggable.classList.remove('dragging');
+	}
+});
+
+// Load the next page of the column when it's scrolled to the bottom
+let loadColumn = function (container) {
+	const cursor = container.dataset.cursor;
+
+	if (!cursor || container.dataset.loading) {
+		return;
+	}
+	container.dataset.loading = "1";
+
+	const params = new URLSearchParams({"status": container.id, "cursor": cursor});
+
+	fetch(container.dataset.url + "?" + params, {
+		credentials: "same-origin",
+		headers: {
+			"Accept": "application/json",
+			"X-Requested-With": "XMLHttpRequest"
+		}
+	})
+	.then(response => {
+		if (!response.ok) {
+			throw new Error("HTTP request unsuccessful");
+		}
+		return response.json();
+	})
+	.then(data => {
+		container.insertAdjacentHTML("beforeend", data["cards"]);
+		modals.insertAdjacentHTML("beforeend", data["modals"]);
+		container.dataset.cursor = data["cursor"] || "";
+	})
+	.catch(error => console.log(error))
+	.finally(() => delete container.dataset.loading);
+}
+
+// The card of the column below the pointer, the dragged one goes before it
+let cardBelow = function (container, y) {
+	const cards = container.querySelectorAll('.card.mb-2:not(.dragging)');
+
+	for (const card of cards) {
+		const box = card.getBoundingClientRect();
+		if (y < box.top + box.height / 2) {
+			return card;
+		}
+	}
+	return null;
+}
+
+// The number of the issues in the header of the column, see Project.todo_count
+let addCount = function (status, delta) {
+	const header = document.querySelector('.card-header[name="' + status + '"] .issue-count');
+	if (header) {
+		header.textContent = Math.max(parseInt(header.textContent) + delta, 0);
+	}
+}
+
+// A rank between the ranks of the neighbours of the card
+let rankBetween = function (previous, next) {
+	const before = previous ? parseFloat(previous.dataset.rank) : null;
+	const after = next ? parseFloat(next.dataset.rank) : null;
+
+	if (before === null && after === null) {
+		return 0;
+	}
+	if (before === null) {
+		return after - RANK_STEP;
+	}
+	if (after === null) {
+		return before + RANK_STEP;
+	}
+	// Equal when the precision runs out, the server renumbers the column
+	return before + (after - before) / 2;
+}
+
+let sendMoves = function (keepalive) {
+	clearTimeout(movesTimer);
+	movesTimer = null;
+
+	if (!pendingMoves.size) {
+		return;
+	}
+	const moves = Array.from(pendingMoves.values());
+	pendingMoves.clear();
+
+	fetch(board.dataset.moves, {
+		method: "POST",
+		credentials: "same-origin",
+		keepalive: keepalive,                              // Sent even if the page is closed
+		headers: {
+			"Accept": "application/json",
+			"Content-Type": "application/json",
+			"X-Requested-With": "XMLHttpRequest",
+			"X-CSRFToken": csrftoken
+		},
+		body: JSON.stringify({"moves": moves})
+	})
+	.then(response => {
+		if (!response.ok) {
+			throw new Error("HTTP request unsuccessful");
+		}
+		return response.json();
+	})
+	.then(data => {                                        // Work with received data from views.py (board_moves view)
+		if (data["rebalanced"].length) {
+			// The ranks of the cards changed, take the new ones
+			window.location.reload();
+			return;
+		}
+
+		const date = new Date(data["updated_time"]).toLocaleString()
+		data["issues"].forEach(issue => {
+			const issue_modal_status = document.getElementById("status" + issue["id"])
+			const issue_modal_updated = document.getElementById("updated" + issue["id"])
+
+			if (issue_modal_status) {
+				issue_modal_status.innerHTML = data["status"] + " " + issue["source"];
+			}
+			if (issue_modal_updated) {
+				issue_modal_updated.innerHTML = data["updated"] + " " + date;
+			}
+		});
+	})
+	.catch(error => console.log(error));
+}
+
 containers.forEach(container => {
-  container.addEventListener('dragover', e => {
-    e.preventDefault();
+	container.addEventListener('scroll', () => {
+		if (container.scrollTop + container.clientHeight >= container.scrollHeight - 100) {
+			loadColumn(container);
+		}
+	});
+
+	container.addEventListener('dragover', e => {
+		e.preventDefault();
 	});
 
 	container.addEventListener('drop', e => {
 		e.preventDefault();
 
 		const draggable = document.querySelector('.dragging');
-		container.appendChild(draggable);
+		if (!draggable) {
+			return;
+		}
 		draggable.classList.remove('dragging');
-		
-		var issue_id = draggable.id.split("card")[1]
-		target = draggable.parentElement.id;
-        
-		if (source != target) {                                // Check if card was drag to another issue status
-
-			response = fetch(url, {                            // If so: make POST request and send data in body
-				method: "PUT",
-				credentials: "same-origin",
-				headers: {
-					"Accept": "application/json",
-					"X-Requested-With": "XMLHttpRequest",
-					"X-CSRFToken": csrftoken                  // Taken from getCookie function in favorite.js
-				},
-				body: JSON.stringify({
-					"target": target,
-					"issue_id": issue_id,
-				})
-			})
-			.then(response => {
-				if (!response.ok) {
-					console.log("HTTP request unsuccessful");
-				}
-				return response.json();
-			})
-			.then(data => {                                                                 // Work with received data from views.py (boards view)
-				const issue_modal_status = document.getElementById("status" + data["id"])    // Take an issue modal status text
-				const issue_modal_updated = document.getElementById("updated" + data["id"])  // Take an issue modal updated text
-				const date = new Date(data["updated_time"]).toLocaleString()
-
-				issue_modal_status.innerHTML = data["status"] + " " + data["source"];        // And update them
-				issue_modal_updated.innerHTML = data["updated"] + " " + date;
-			})
+
+		// Move the card right away, the server gets the moves later
+		const source = draggable.closest('.card-body.droppable');
+		const next = cardBelow(container, e.clientY);
+		container.insertBefore(draggable, next);
+		if (source && source !== container) {
+			addCount(source.id, -1);
+			addCount(container.id, 1);
+		}
+
+		const previous = draggable.previousElementSibling;
+		const rank = rankBetween(previous, next);
+		draggable.dataset.rank = rank;
+
+		const issue_id = draggable.id.split("card")[1];
+		pendingMoves.set(issue_id, {
+			"issue_id": issue_id,
+			"status": container.id,
+			"rank": rank
+		});
+
+		clearTimeout(movesTimer);
+		movesTimer = setTimeout(sendMoves, MOVES_DELAY);
+	});
+});
+
+window.addEventListener('pagehide', () => sendMoves(true));
+
+
+// Changes made in the other browsers, see the board_events view
+if (window.EventSource && board) {
+	const events = new EventSource(board.dataset.events);
+
+	events.onmessage = e => {
+		const data = JSON.parse(e.data);
+		const card = document.getElementById("card" + data["id"]);
+
+		// The card isn't loaded yet or is being dragged here
+		if (!card || card.classList.contains('dragging')) {
+			return;
+		}
+
+		const source = card.closest('.card-body.droppable');
+		if (data["event"] === "delete") {
+			const modal = document.getElementById("staticBackdropBoard" + data["id"]);
+			addCount(source.id, -1);
+			card.remove();
+			if (modal) {
+				modal.remove();
+			}
+			return;
+		}
+
+		if (data["title"]) {
+			card.querySelector('.card-body').textContent = data["title"];
+		}
+
+		const column = document.getElementById(data["status"]);
+		if (!column || data["rank"] === undefined || pendingMoves.has(String(data["id"]))) {
+			return;
+		}
+		if (source !== column) {
+			addCount(source.id, -1);
+			addCount(column.id, 1);
+		}
+
+		// Before the first card with a greater rank
+		card.dataset.rank = data["rank"];
+		const next = Array.from(column.querySelectorAll('.card.mb-2')).find(
+			other => other !== card && parseFloat(other.dataset.rank) > data["rank"]
+		);
+		if (next) {
+			column.insertBefore(card, next);
+		}
+		else if (!column.dataset.cursor) {
+			column.append(card);
 		}
 		else {
-			console.log("Error");
+			// Its place is on a page that isn't loaded yet
+			const modal = document.getElementById("staticBackdropBoard" + data["id"]);
+			card.remove();
+			if (modal) {
+				modal.remove();
+			}
 		}
-	});		
-});
+	};
+}
@@ -1 +1,34 @@
-function getCookie(e){let t=null;if(document.cookie&&""!==document.cookie){const r=document.cookie.split(";");for(let n=0;n<r.length;n++){const o=r[n].trim();if(o.substring(0,e.length+1)===e+"="){t=decodeURIComponent(o.substring(e.length+1));break}}}return t}const csrftoken=getCookie("csrftoken"),draggables=document.querySelectorAll(".card.mb-2"),containers=document.querySelectorAll(".card-body.droppable");var source,target,url;draggables.forEach((e=>{e.addEventListener("dragstart",(()=>{e.classList.add("dragging"),url=e.getAttribute("data"),source=e.parentElement.id}))})),containers.forEach((e=>{e.addEventListener("dragover",(e=>{e.preventDefault()})),e.addEventListener("drop",(t=>{t.preventDefault();const r=document.querySelector(".dragging");e.appendChild(r),r.classList.remove("dragging");var n=r.id.split("card")[1];target=r.parentElement.id,source!=target?response=fetch(url,{method:"PUT",credentials:"same-origin",headers:{Accept:"application/json","X-Requested-With":"XMLHttpRequest","X-CSRFToken":csrftoken},body:JSON.stringify({target:target,issue_id:n})}).then((e=>(e.ok||console.log("HTTP request unsuccessful"),e.json()))).then((e=>{const t=document.getElementById("status"+e.id),r=document.getElementById("updated"+e.id),n=new Date(e.updated_time).toLocaleString();t.innerHTML=e.status+" "+e.source,r.innerHTML=e.updated+" "+n})):console.log("Error")}))}));
\ No newline at end of file
+function getCookie(name){let cookieValue=null;if(document.cookie&&document.cookie!==""){const cookies=document.cookie.split(";");for(let i=0;i<cookies.length;i++){const cookie=cookies[i].trim();if(cookie.substring(0,name.length+1)===(name+"=")){cookieValue=decodeURIComponent(cookie.substring(name.length+1));break;}}}
+return cookieValue;}
+const csrftoken=getCookie("csrftoken");const containers=document.querySelectorAll('.card-body.droppable')
+const modals=document.getElementById('board-modals')
+const board=document.getElementById('board');const RANK_STEP=1024;const MOVES_DELAY=300;var pendingMoves=new Map();var movesTimer=null;document.addEventListener('dragstart',e=>{const draggable=e.target.closest('.card.mb-2');if(!draggable){return;}
+draggable.classList.add('dragging');});document.addEventListener('dragend',e=>{const draggable=e.target.closest('.card.mb-2');if(draggable){draggable.classList.remove('dragging');}});let loadColumn=function(container){const cursor=container.dataset.cursor;if(!cursor||container.dataset.loading){return;}
+container.dataset.loading="1";const params=new URLSearchParams({"status":container.id,"cursor":cursor});fetch(container.dataset.url+"?"+params,{credentials:"same-origin",headers:{"Accept":"application/json","X-Requested-With":"XMLHttpRequest"}}).then(response=>{if(!response.ok){throw new Error("HTTP request unsuccessful");}
+return response.json();}).then(data=>{container.insertAdjacentHTML("beforeend",data["cards"]);modals.insertAdjacentHTML("beforeend",data["modals"]);container.dataset.cursor=data["cursor"]||"";}).catch(error=>console.log(error)).finally(()=>delete container.dataset.loading);}
+let cardBelow=function(container,y){const cards=container.querySelectorAll('.card.mb-2:not(.dragging)');for(const card of cards){const box=card.getBoundingClientRect();if(y<box.top+box.height/2){return card;}}
+return null;}
+let addCount=function(status,delta){const header=document.querySelector('.card-header[name="'+status+'"] .issue-count');if(header){header.textContent=Math.max(parseInt(header.textContent)+delta,0);}}
+let rankBetween=function(previous,next){const before=previous?parseFloat(previous.dataset.rank):null;const after=next?parseFloat(next.dataset.rank):null;if(before===null&&after===null){return 0;}
+if(before===null){return after-RANK_STEP;}
+if(after===null){return before+RANK_STEP;}
+return before+(after-before)/2;}
+let sendMoves=function(keepalive){clearTimeout(movesTimer);movesTimer=null;if(!pendingMoves.size){return;}
+const moves=Array.from(pendingMoves.values());pendingMoves.clear();fetch(board.dataset.moves,{method:"POST",credentials:"same-origin",keepalive:keepalive,headers:{"Accept":"application/json","Content-Type":"application/json","X-Requested-With":"XMLHttpRequest","X-CSRFToken":csrftoken},body:JSON.stringify({"moves":moves})}).then(response=>{if(!response.ok){throw new Error("HTTP request unsuccessful");}
+return response.json();}).then(data=>{if(data["rebalanced"].length){window.location.reload();return;}
+const date=new Date(data["updated_time"]).toLocaleString()
+data["issues"].forEach(issue=>{const issue_modal_status=document.getElementById("status"+issue["id"])
+const issue_modal_updated=document.getElementById("updated"+issue["id"])
+if(issue_modal_status){issue_modal_status.innerHTML=data["status"]+" "+issue["source"];}
+if(issue_modal_updated){issue_modal_updated.innerHTML=data["updated"]+" "+date;}});}).catch(error=>console.log(error));}
+containers.forEach(container=>{container.addEventListener('scroll',()=>{if(container.scrollTop+container.clientHeight>=container.scrollHeight-100){loadColumn(container);}});container.addEventListener('dragover',e=>{e.preventDefault();});container.addEventListener('drop',e=>{e.preventDefault();const draggable=document.querySelector('.dragging');if(!draggable){return;}
+draggable.classList.remove('dragging');const source=draggable.closest('.card-body.droppable');const next=cardBelow(container,e.clientY);container.insertBefore(draggable,next);if(source&&source!==container){addCount(source.id,-1);addCount(container.id,1);}
+const previous=draggable.previousElementSibling;const rank=rankBetween(previous,next);draggable.dataset.rank=rank;const issue_id=draggable.id.split("card")[1];pendingMoves.set(issue_id,{"issue_id":issue_id,"status":container.id,"rank":rank});clearTimeout(movesTimer);movesTimer=setTimeout(sendMoves,MOVES_DELAY);});});window.addEventListener('pagehide',()=>sendMoves(true));if(window.EventSource&&board){const events=new EventSource(board.dataset.events);events.onmessage=e=>{const data=JSON.parse(e.data);const card=document.getElementById("card"+data["id"]);if(!card||card.classList.contains('dragging')){return;}
+const source=card.closest('.card-body.droppable');if(data["event"]==="delete"){const modal=document.getElementById("staticBackdropBoard"+data["id"]);addCount(source.id,-1);card.remove();if(modal){modal.remove();}
+return;}
+if(data["title"]){card.querySelector('.card-body').textContent=data["title"];}
+const column=document.getElementById(data["status"]);if(!column||data["rank"]===undefined||pendingMoves.has(String(data["id"]))){return;}
+if(source!==column){addCount(source.id,-1);addCount(column.id,1);}
+card.dataset.rank=data["rank"];const next=Array.from(column.querySelectorAll('.card.mb-2')).find(other=>other!==card&&parseFloat(other.dataset.rank)>data["rank"]);if(next){column.insertBefore(card,next);}
+else if(!column.dataset.cursor){column.append(card);}
+else{const modal=document.getElementById("staticBackdropBoard"+data["id"]);card.remove();if(modal){modal.remove();}}};}
\ No newline at end of file